@@ -0,0 +1,135 @@
+# accumulator.py
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import metrics
+import utils
+from config import MEASURE_DTYPE
+from data_processor import CATEGORY_COLUMNS, MERGED_COLUMNS
+
+# site-day마다 값이 하나인 컬럼: 행마다 저장하지 않고 구간(run)마다 한 번만 기록
+RUN_COLUMNS = ['Project', 'Site_Unit', 'Factory', 'Date', 'Resolution']
+
+
+def _grow(buffer, capacity, rows):
+    grown = np.empty(capacity, dtype=buffer.dtype)
+    grown[:rows] = buffer[:rows]
+    return grown
+
+
+class FrameAccumulator:
+    """
+    site-day DataFrame(process_dataframe/resample_15m_to_30m 결과)을 모드별 열 버퍼에 이어 붙이는 누적기.
+
+    Time과 측정값은 용량을 두 배씩 늘리는 numpy 버퍼에 복사하고, 메타데이터(Project, Site_Unit, Factory,
+    Date, Resolution)는 site-day마다 (행 수, 값) 구간 하나로만 기록합니다. to_frame()은 작은 DataFrame
+    수천 개를 pd.concat하는 대신 merge_dataframes와 같은 컬럼/dtype의 DataFrame을 한 번에 만듭니다.
+    행 순서는 append 순서를 따릅니다. 여러 크롤러 워커 스레드에서 함께 사용할 수 있습니다.
+    """
+
+    def __init__(self, mode, initial_rows=4096):
+        if mode not in MERGED_COLUMNS:
+            raise ValueError(f"[ERROR] 지원되지 않는 모드: {mode}")
+        self.mode = mode
+        self.value_columns = [column for column in MERGED_COLUMNS[mode]
+                              if column not in ('Date', 'Time', 'DateTime') and column not in CATEGORY_COLUMNS]
+        self._lock = threading.Lock()
+        self._reset(initial_rows)
+
+    def _reset(self, capacity):
+        self._capacity = capacity
+        self._rows = 0
+        self._time = np.empty(capacity, dtype='int16')
+        self._values = {column: np.empty(capacity, dtype=MEASURE_DTYPE) for column in self.value_columns}
+        self._run_lengths = []
+        self._run_values = []
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def site_days(self):
+        return len(self._run_lengths)
+
+    def _reserve(self, rows):
+        needed = self._rows + rows
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2)
+        self._time = _grow(self._time, capacity, self._rows)
+        self._values = {column: _grow(buffer, capacity, self._rows) for column, buffer in self._values.items()}
+        self._capacity = capacity
+
+    def append(self, df: pd.DataFrame):
+        """
+        site-day 1건을 추가합니다. 메타데이터는 첫 행 값을 사용하므로 여러 site-day가 섞인 DataFrame은 넣지 마세요.
+        """
+        rows = len(df)
+        if rows == 0:
+            return
+        time = df['Time'].to_numpy(dtype='int16')
+        values = [df[column].to_numpy(dtype=MEASURE_DTYPE) for column in self.value_columns]
+        run = tuple(df[column].iat[0] for column in RUN_COLUMNS)
+
+        with self._lock:
+            self._reserve(rows)
+            start, end = self._rows, self._rows + rows
+            self._time[start:end] = time
+            for column, array in zip(self.value_columns, values):
+                self._values[column][start:end] = array
+            self._run_lengths.append(rows)
+            self._run_values.append(run)
+            self._rows = end
+
+    def clear(self):
+        with self._lock:
+            self._reset(self._capacity)
+
+    def _columns(self):
+        """
+        구간 정보를 행 단위로 펼쳐 컬럼별 배열을 만듭니다. 메타데이터는 구간별 값의 사전 코드만 반복합니다.
+        """
+        with self._lock:
+            rows = self._rows
+            lengths = np.array(self._run_lengths, dtype='int64')
+            runs = list(self._run_values)
+            # 이후 append는 rows 뒤에만 기록하므로 앞부분 view를 그대로 사용해도 안전
+            time = self._time[:rows]
+            values = {column: buffer[:rows] for column, buffer in self._values.items()}
+
+        run_of_row = np.repeat(np.arange(len(runs)), lengths)
+        columns = {'Time': time, **values}
+        for position, column in enumerate(RUN_COLUMNS):
+            categories, codes = np.unique(np.array([run[position] for run in runs], dtype=object).astype(str),
+                                          return_inverse=True)
+            row_codes = codes[run_of_row]
+            if column == 'Date':
+                columns['Date'] = categories.astype(object)[row_codes]
+                days = pd.to_datetime(categories, format='%Y-%m-%d').to_numpy()
+                columns['DateTime'] = days[row_codes] + (time.astype('int64') * utils.SLOT_MINUTES).astype('timedelta64[m]')
+            else:
+                columns[column] = pd.Categorical.from_codes(row_codes, categories=categories.tolist())
+        return columns
+
+    @metrics.timed('data.accumulator_to_frame')
+    def to_frame(self) -> pd.DataFrame:
+        """
+        merge_dataframes(dfs, mode)와 같은 컬럼 순서/dtype의 DataFrame을 만듭니다.
+        """
+        if not self._rows:
+            return pd.DataFrame(columns=MERGED_COLUMNS[self.mode])
+        columns = self._columns()
+        return pd.DataFrame({column: columns[column] for column in MERGED_COLUMNS[self.mode]}, copy=False)
+
+    @metrics.timed('data.accumulator_to_arrow')
+    def to_arrow(self) -> pa.Table:
+        """
+        같은 내용을 pyarrow Table로 만듭니다. 메타데이터는 dictionary 컬럼, Time은 슬롯 번호(int16)입니다.
+        """
+        if not self._rows:
+            return pa.table({column: pa.array([]) for column in MERGED_COLUMNS[self.mode]})
+        columns = self._columns()
+        return pa.table({column: pa.array(columns[column]) for column in MERGED_COLUMNS[self.mode]})
@@ -0,0 +1,599 @@
+# benchmark.py
+"""
+크롤링/가공 단계 성능 비교용 벤치마크 스크립트.
+
+사용 예:
+    python benchmark.py extract_table
+    python benchmark.py extract_table --browser   # 로컬 Headless Chrome으로 브라우저 구간까지 측정
+    python benchmark.py chrome_profile --url https://pp.kepco.co.kr/   # 기존/경량 Chrome 프로필 비교
+    python benchmark.py pipeline --scales 1,100,1000   # site-month 규모별 단계 처리량 (benchmark_history.jsonl에 누적)
+    python benchmark.py replay_http                    # 로컬 재생 서버 대상 HTTP 조회
+    python benchmark.py replay_crawl                   # 로컬 재생 서버 대상 Selenium 조회 (Chrome 필요)
+    python benchmark.py accumulator                    # site-day 10,000건 누적: pd.concat vs FrameAccumulator
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from replay import ReplayServer, make_table_rows, render_table_html
+from web_crawler import TABLE_COLUMNS, EXTRACT_ROWS_SCRIPT, parse_table_html, rows_to_dataframe
+
+# 단계별 처리량 기록 (커밋 간 비교용, 한 줄에 측정 1건)
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_history.jsonl')
+
+
+def _timeit(func, repeat):
+    """
+    func를 repeat번 실행하고 (최소, 평균) 소요 시간(초)을 반환합니다.
+    """
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return min(durations), sum(durations) / len(durations)
+
+
+def _print_result(name, best, mean):
+    print(f"[BENCH] {name:<40} best={best * 1000:9.3f}ms  mean={mean * 1000:9.3f}ms")
+
+
+def make_page_html(rows, filler_blocks=2000):
+    """
+    실제 데이터 페이지처럼 메뉴/스크립트 등 테이블 외 마크업이 많은 전체 페이지 HTML을 만듭니다.
+    """
+    filler = "".join(
+        f'<div class="menu"><a href="#m{i}">메뉴 {i}</a><span>설명 텍스트 {i}</span></div>'
+        for i in range(filler_blocks)
+    )
+    return (
+        "<html><head><title>rs0101N</title></head><body>"
+        f"{filler}{render_table_html(rows)}"
+        "</body></html>"
+    )
+
+
+def legacy_extract_table(html, table_id='tableListChart'):
+    """
+    기존 extract_table 경로: 페이지 전체를 BeautifulSoup으로 파싱하고 문자열 컬럼 DataFrame 생성.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', {'id': table_id})
+    rows = []
+    for tr in table.select("tbody tr"):
+        cols = [td.get_text(strip=True).replace(',', '') for td in tr.find_all(['td', 'th'])]
+        if len(cols) == 16:
+            rows.append(cols[:8])
+            rows.append(cols[8:])
+        elif len(cols) == 8:
+            rows.append(cols)
+    return pd.DataFrame(rows, columns=TABLE_COLUMNS)
+
+
+def bench_extract_table(repeat=50, browser=False):
+    """
+    기존 page_source + BeautifulSoup 경로와 execute_script 배열 경로를 비교합니다.
+    오프라인 측정은 파이썬 쪽 비용만 포함하며, 브라우저의 page_source 직렬화 비용은
+    --browser 옵션으로 실제 Chrome에서 측정합니다.
+    """
+    print(f"\n[BENCH] extract_table (repeat={repeat})")
+    for mode in ('15m', '30m'):
+        rows = make_table_rows(mode)
+        html = make_page_html(rows)
+        # execute_script가 돌려주는 것과 같은 형태 (쉼표 제거된 셀 배열)
+        js_rows = [[cell.replace(',', '') for cell in row] for row in rows]
+
+        _print_result(f"{mode} legacy page_source+bs4", *_timeit(lambda: legacy_extract_table(html), repeat))
+        _print_result(f"{mode} scoped bs4 (parse_table_html)", *_timeit(lambda: parse_table_html(html), repeat))
+        _print_result(f"{mode} js rows -> rows_to_dataframe", *_timeit(lambda: rows_to_dataframe(js_rows), repeat))
+
+    if browser:
+        _bench_extract_table_browser(repeat)
+
+
+def _bench_extract_table_browser(repeat):
+    from webdriver_initializer import initialize_chrome_driver
+
+    html = make_page_html(make_table_rows('15m'))
+    with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8') as f:
+        f.write(html)
+        page_path = f.name
+
+    driver = initialize_chrome_driver()
+    try:
+        driver.get(f"file://{page_path}")
+        _print_result("browser extract_table", *_timeit(lambda: parse_table_html(driver.page_source), repeat))
+        _print_result("browser legacy page_source+bs4", *_timeit(lambda: legacy_extract_table(driver.page_source), repeat))
+        _print_result("browser extract_table_fast", *_timeit(
+            lambda: rows_to_dataframe(driver.execute_script(EXTRACT_ROWS_SCRIPT, 'tableListChart')), repeat
+        ))
+    finally:
+        driver.quit()
+        os.remove(page_path)
+
+
+def make_date_time_frame(rows, mode='15m', seed=0):
+    """
+    merge_dataframes 입력과 같은 Date/Time 문자열 컬럼을 rows 행만큼 만듭니다.
+    """
+    step = 15 if mode == '15m' else 30
+    slots = [f"{m // 60:02d}:{m % 60:02d}" for m in range(step, 24 * 60 + 1, step)]
+    days = rows // len(slots) + 1
+    dates = pd.date_range('2024-01-01', periods=days, freq='D').strftime('%Y-%m-%d')
+    frame = pd.DataFrame({
+        'Date': pd.Series(dates).repeat(len(slots)).to_numpy()[:rows],
+        'Time': (slots * days)[:rows],
+    })
+    return frame
+
+
+def bench_merge_datetime(repeat=1, rows=1_000_000):
+    """
+    merge_dataframes의 DateTime 생성: 기존 행 단위 apply(fix_datetime) vs 벡터화(build_datetime).
+    """
+    import utils
+
+    print(f"\n[BENCH] merge_dataframes DateTime ({rows:,}행, repeat={repeat})")
+    frame = make_date_time_frame(rows)
+
+    def legacy():
+        return pd.to_datetime(frame.apply(utils.fix_datetime, axis=1))
+
+    def vectorized():
+        return utils.build_datetime(frame['Date'], frame['Time'])
+
+    pd.testing.assert_series_equal(legacy(), vectorized(), check_names=False)
+    _print_result("legacy apply(fix_datetime)", *_timeit(legacy, repeat))
+    _print_result("vectorized build_datetime", *_timeit(vectorized, repeat))
+
+
+def make_merged_frame(rows, mode='15m', seed=0, sites=20):
+    """
+    merge_dataframes 결과와 같은 wide 포맷 DataFrame을 rows 행만큼 만듭니다.
+    """
+    import numpy as np
+    import utils
+
+    rng = np.random.default_rng(seed)
+    frame = make_date_time_frame(rows, mode, seed)
+    frame['DateTime'] = utils.build_datetime(frame['Date'], frame['Time'])
+    suffix = '_30m' if mode == '30m' else ''
+    for name in ('Electricity consumption', 'Peak power', 'Leading reactive power', 'Lagging reactive power',
+                 'CO2', 'Leading power factor', 'Lagging power factor'):
+        frame[name + suffix] = rng.uniform(0, 1000, rows)
+    site_ids = rng.integers(0, sites, rows)
+    frame['Project'] = np.array([f"Project {i % 3}" for i in range(sites)], dtype=object)[site_ids]
+    frame['Site_Unit'] = np.array([f"Site {i}" for i in range(sites)], dtype=object)[site_ids]
+    frame['Factory'] = ''
+    frame['Resolution'] = mode
+    return frame
+
+
+def legacy_transform_for_bigquery(df, mode):
+    """
+    기존 transform_for_bigquery (copy + melt + apply 2회 + object 상수 컬럼), 출력문 제외.
+    """
+    from datetime import datetime, timezone
+
+    suffix = '_30m' if mode == '30m' else ''
+    units = {
+        'Electricity consumption': 'kWh', 'Peak power': 'kW', 'Leading reactive power': 'kVarh',
+        'Lagging reactive power': 'kVarh', 'CO2': 'tCO2', 'Leading power factor': '%', 'Lagging power factor': '%',
+    }
+    value_columns = {name + suffix: (name, unit) for name, unit in units.items()}
+    temp_df = df.copy()
+    melted = temp_df.melt(
+        id_vars=['DateTime', 'Project', 'Site_Unit', 'Factory'],
+        value_vars=[col for col in value_columns if col in temp_df.columns],
+        var_name='original_column',
+        value_name='measure_value'
+    )
+    melted['measure_point'] = melted['original_column'].apply(lambda x: value_columns[x][0])
+    melted['measure_unit'] = melted['original_column'].apply(lambda x: value_columns[x][1])
+    melted['measure_value'] = pd.to_numeric(melted['measure_value'], errors='coerce')
+    melted['measure_time'] = pd.to_datetime(melted['DateTime'], format='%Y-%m-%d %H:%M')
+    melted['country'] = 'South Korea'
+    melted['source_name'] = 'kepco_power_planner_rpa'
+    melted['business_unit'] = melted['Project']
+    melted['site_unit'] = melted['Site_Unit']
+    melted['factory'] = melted['Factory']
+    melted['insertion_time'] = datetime.now(timezone.utc)
+    result = melted[[
+        'measure_time', 'measure_point', 'measure_value', 'measure_unit', 'country', 'source_name',
+        'business_unit', 'site_unit', 'factory', 'insertion_time'
+    ]]
+    result['measure_point'].value_counts()
+    return result
+
+
+def _peak_memory(func):
+    """
+    func 실행 중 tracemalloc 기준 최대 메모리(MB)와 결과를 반환합니다.
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024, result
+
+
+def bench_transform_for_bigquery(repeat=3, rows=500_000):
+    """
+    transform_for_bigquery: 기존 copy/melt/apply 경로 vs categorical 코드 배열 경로의 시간과 최대 메모리.
+    """
+    import contextlib
+    import io
+    import data_processor
+
+    print(f"\n[BENCH] transform_for_bigquery (wide {rows:,}행 → long {rows * 7:,}행, repeat={repeat})")
+    frame = make_merged_frame(rows)
+
+    def current():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return data_processor.transform_for_bigquery(frame, '15m')
+
+    legacy_result = legacy_transform_for_bigquery(frame, '15m')
+    current_result = current()
+    compare_columns = [col for col in legacy_result.columns if col != 'insertion_time']
+    pd.testing.assert_frame_equal(
+        legacy_result[compare_columns].reset_index(drop=True),
+        current_result[compare_columns].astype({col: object for col in compare_columns if col not in ('measure_time', 'measure_value')}),
+        check_dtype=False,
+    )
+
+    _print_result("legacy copy+melt+apply", *_timeit(lambda: legacy_transform_for_bigquery(frame, '15m'), repeat))
+    _print_result("categorical transform", *_timeit(current, repeat))
+
+    legacy_peak, legacy_result = _peak_memory(lambda: legacy_transform_for_bigquery(frame, '15m'))
+    current_peak, current_result = _peak_memory(current)
+    legacy_size = legacy_result.memory_usage(deep=True).sum() / 1024 / 1024
+    current_size = current_result.memory_usage(deep=True).sum() / 1024 / 1024
+    print(f"[BENCH] {'legacy peak / result memory':<40} {legacy_peak:9.1f}MB / {legacy_size:9.1f}MB")
+    print(f"[BENCH] {'categorical peak / result memory':<40} {current_peak:9.1f}MB / {current_size:9.1f}MB")
+
+
+def bench_output_formats(repeat=1, rows=200_000):
+    """
+    merge 결과 기록: 기존 to_excel(openpyxl) vs Parquet(snappy/zstd)의 기록 시간과 파일 크기.
+    """
+    from output_writer import create_output_writer
+
+    print(f"\n[BENCH] output formats (wide {rows:,}행, repeat={repeat})")
+    frame = make_merged_frame(rows)
+    directory = tempfile.mkdtemp(prefix='kepco_bench_')
+
+    def legacy_xlsx():
+        path = os.path.join(directory, 'legacy.xlsx')
+        frame.to_excel(path, index=False)
+        return path
+
+    def parquet(compression):
+        def write():
+            writer = create_output_writer('parquet', directory, f'bench_{compression}', compression=compression)
+            # 배치가 도착하는 대로 row group으로 기록하는 상황을 흉내내어 10개로 나누어 기록
+            for chunk in range(10):
+                writer.write(frame.iloc[chunk * rows // 10:(chunk + 1) * rows // 10])
+            return writer.close()
+        return write
+
+    cases = [('legacy to_excel (xlsx)', legacy_xlsx), ('parquet snappy', parquet('snappy')), ('parquet zstd', parquet('zstd'))]
+    try:
+        for name, func in cases:
+            paths = []
+            best, mean = _timeit(lambda: paths.append(func()), repeat)
+            size_mb = os.path.getsize(paths[-1]) / 1024 / 1024
+            print(f"[BENCH] {name:<40} best={best * 1000:9.1f}ms  size={size_mb:8.2f}MB")
+    finally:
+        for file_name in os.listdir(directory):
+            os.remove(os.path.join(directory, file_name))
+        os.rmdir(directory)
+
+
+def _process_tree_rss_mb(root_pid):
+    """
+    root_pid와 모든 하위 프로세스(chromedriver → chrome 렌더러 등)의 RSS 합계(MB). /proc 기반(리눅스 전용).
+    """
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # comm에 공백이 있을 수 있으므로 마지막 ')' 이후를 파싱
+                fields = f.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total_kb = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def bench_chrome_profile(repeat=3, url=None):
+    """
+    기존 Chrome 옵션과 경량 프로필(lean)의 드라이버 시작 시간, 페이지 로드 시간, 프로세스 트리 RSS를 비교합니다.
+    url을 지정하지 않으면 조회 결과 표가 있는 로컬 HTML 페이지를 사용합니다.
+    """
+    from webdriver_initializer import initialize_chrome_driver
+
+    page_path = None
+    if url is None:
+        with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8') as f:
+            f.write(make_page_html(make_table_rows('15m')))
+            page_path = f.name
+        url = f"file://{page_path}"
+
+    print(f"\n[BENCH] chrome_profile (url={url}, repeat={repeat})")
+    try:
+        for lean in (False, True):
+            label = 'lean' if lean else 'default'
+            startups, loads, rss = [], [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                driver = initialize_chrome_driver(lean=lean)
+                startups.append(time.perf_counter() - started)
+                try:
+                    for _ in range(3):
+                        started = time.perf_counter()
+                        driver.get(url)
+                        loads.append(time.perf_counter() - started)
+                    rss.append(_process_tree_rss_mb(driver.service.process.pid))
+                finally:
+                    driver.quit()
+            print(f"[BENCH] {label + ' startup':<40} best={min(startups) * 1000:9.1f}ms  mean={sum(startups) / len(startups) * 1000:9.1f}ms")
+            print(f"[BENCH] {label + ' page load':<40} best={min(loads) * 1000:9.1f}ms  mean={sum(loads) / len(loads) * 1000:9.1f}ms")
+            print(f"[BENCH] {label + ' RSS (driver+chrome)':<40} max={max(rss):9.1f}MB  mean={sum(rss) / len(rss):9.1f}MB")
+    finally:
+        if page_path is not None:
+            os.remove(page_path)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _frame_memory_mb(dfs):
+    return sum(df.memory_usage(deep=True).sum() for df in dfs) / 1024 / 1024
+
+
+def bench_accumulator(repeat=3, site_days=10_000):
+    """
+    site-day DataFrame 누적/병합: 리스트에 모아 merge_dataframes(pd.concat) vs FrameAccumulator(열 버퍼 + 메타데이터 구간).
+    보관 메모리는 크롤링 중 누적 상태로 들고 있는 크기, 최대 메모리는 병합(materialize) 중 tracemalloc 기준입니다.
+    """
+    import data_processor
+    from accumulator import FrameAccumulator
+
+    print(f"\n[BENCH] accumulator (15분 site-day {site_days:,}건 = {site_days * 96:,}행, repeat={repeat})")
+    raw = [parse_table_html(render_table_html(make_table_rows('15m', seed=i))) for i in range(32)]
+    dfs = [
+        data_processor.process_dataframe(raw[i % len(raw)].copy(), '15m', f"Project {i % 3}", f"Site {i % 200}", '',
+                                         (pd.Timestamp('2024-01-01') + pd.Timedelta(days=i // 200)).strftime('%Y-%m-%d'))
+        for i in range(site_days)
+    ]
+
+    def accumulate():
+        accumulator = FrameAccumulator('15m')
+        for df in dfs:
+            accumulator.append(df)
+        return accumulator
+
+    accumulator = accumulate()
+    pd.testing.assert_frame_equal(accumulator.to_frame(), data_processor.merge_dataframes(dfs, '15m'))
+
+    _print_result("list + merge_dataframes (concat)", *_timeit(lambda: data_processor.merge_dataframes(dfs, '15m'), repeat))
+    best, mean = _timeit(accumulate, repeat)
+    _print_result("accumulator append", best, mean)
+    # append는 크롤링 중 site-day마다 나누어 실행되므로 1건 비용도 함께 출력
+    print(f"[BENCH] {'accumulator append (site-day 1건)':<40} best={best / site_days * 1000:9.3f}ms")
+    _print_result("accumulator to_frame", *_timeit(accumulator.to_frame, repeat))
+    _print_result("accumulator to_arrow", *_timeit(accumulator.to_arrow, repeat))
+
+    buffer_mb = (accumulator._time.nbytes + sum(buffer.nbytes for buffer in accumulator._values.values())) / 1024 / 1024
+    concat_peak, merged = _peak_memory(lambda: data_processor.merge_dataframes(dfs, '15m'))
+    accumulator_peak, _ = _peak_memory(accumulator.to_frame)
+    merged_mb = merged.memory_usage(deep=True).sum() / 1024 / 1024
+    print(f"[BENCH] {'list of frames retained / merge peak':<40} {_frame_memory_mb(dfs):9.1f}MB / {concat_peak:9.1f}MB")
+    print(f"[BENCH] {'accumulator buffers / to_frame peak':<40} {buffer_mb:9.1f}MB / {accumulator_peak:9.1f}MB")
+    print(f"[BENCH] {'merged frame':<40} {merged_mb:9.1f}MB")
+
+
+def _load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _append_history(path, entries):
+    with open(path, 'a', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _accumulate(dfs, mode):
+    from accumulator import FrameAccumulator
+
+    accumulator = FrameAccumulator(mode)
+    for df in dfs:
+        accumulator.append(df)
+    return accumulator
+
+
+def bench_pipeline(repeat=1, scales=(1, 100, 1000), history=DEFAULT_HISTORY_PATH):
+    """
+    합성 site-month(사이트 1개 × 30일, 15분) 규모별로 extract → process → resample → merge → transform
+    단계의 처리량(행/초)을 측정하고 history 파일에 누적해 이전 커밋 측정값과 비교합니다.
+    """
+    import data_processor
+
+    revision = _git_revision()
+    previous = {}
+    for entry in _load_history(history):
+        if entry.get('revision') != revision:
+            previous[(entry['scale_site_months'], entry['stage'])] = entry
+
+    entries = []
+    for scale in scales:
+        site_days = scale * 30
+        print(f"\n[BENCH] pipeline ({scale} site-month = site-day {site_days:,}건, repeat={repeat}, revision={revision})")
+        # 페이지 생성은 측정에서 제외하고, 서로 다른 페이지를 순환 사용
+        pages = [render_table_html(make_table_rows('15m', seed=i)) for i in range(min(site_days, 64))]
+        keys = [(f"Site {i // 30}", f"2024-01-{i % 30 + 1:02d}") for i in range(site_days)]
+
+        state = {}
+        stages = [
+            ('extract', lambda: state.__setitem__('raw', [parse_table_html(pages[i % len(pages)]) for i in range(site_days)])),
+            ('process', lambda: state.__setitem__('processed', [
+                data_processor.process_dataframe(df.copy(), '15m', 'Project', site_unit, '', date)
+                for df, (site_unit, date) in zip(state['raw'], keys)
+            ])),
+            ('resample_30m', lambda: [data_processor.resample_15m_to_30m(df) for df in state['processed']]),
+            ('merge', lambda: state.__setitem__('merged', data_processor.merge_dataframes(state['processed'], '15m'))),
+            ('accumulate', lambda: _accumulate(state['processed'], '15m').to_frame()),
+            ('transform', lambda: state.__setitem__('long', data_processor.transform_for_bigquery(state['merged'], '15m'))),
+        ]
+        for stage, func in stages:
+            best, _ = _timeit(func, repeat)
+            rows = len(state['long']) if stage == 'transform' else site_days * 96
+            rows_per_sec = rows / best if best > 0 else float('inf')
+            baseline = previous.get((scale, stage))
+            delta = ""
+            if baseline:
+                change = (rows_per_sec / baseline['rows_per_sec'] - 1) * 100
+                delta = f"  vs {baseline['revision']} {change:+.1f}%"
+            print(f"[BENCH] {stage:<40} best={best * 1000:9.1f}ms  {rows_per_sec:12,.0f} rows/s{delta}")
+            entries.append({
+                'recorded_at': datetime.now(timezone.utc).isoformat(),
+                'revision': revision,
+                'scale_site_months': scale,
+                'stage': stage,
+                'seconds': round(best, 4),
+                'rows': rows,
+                'rows_per_sec': round(rows_per_sec, 1),
+            })
+        state.clear()
+
+    if history:
+        _append_history(history, entries)
+        print(f"[BENCH] 처리량 기록 {len(entries)}건 추가: {history}")
+
+
+def bench_replay_http(repeat=1, days=30):
+    """
+    로컬 재생 서버(합성 데이터)를 대상으로 HTTP 백엔드 조회 + 파싱 시간을 측정합니다. 브라우저 불필요.
+    """
+    from crawl_backend import HttpBackend, SeleniumBackend
+
+    dates = [f"2024-01-{day:02d}" for day in range(1, days + 1)]
+    with ReplayServer() as server:
+        backend = HttpBackend(None, fallback=SeleniumBackend(None, data_page_url=f"{server.base_url}/data"))
+        backend.lookup_url = f"{server.base_url}/data"
+        backend.lookup_method = 'get'
+
+        print(f"\n[BENCH] replay_http ({days}일 × 2모드, repeat={repeat})")
+        best, mean = _timeit(lambda: [backend.fetch_http(date, mode) for date in dates for mode in ('15m', '30m')], repeat)
+        _print_result("http fetch_http (전체)", best, mean)
+        print(f"[BENCH] {'http fetch_http (조회 1건)':<40} best={best / (days * 2) * 1000:9.3f}ms")
+
+
+def bench_replay_crawl(repeat=1, days=5):
+    """
+    로컬 재생 서버를 대상으로 실제 Chrome(Selenium 백엔드)에서 로그인부터 날짜별 15분/30분 조회까지 측정합니다.
+    """
+    from crawl_backend import SeleniumBackend
+    from webdriver_initializer import initialize_chrome_driver
+    from web_crawler import WebCrawler
+    from config import ID_SELECTOR, PW_SELECTOR, SUBMIT_SELECTOR
+
+    dates = [f"2024-01-{day:02d}" for day in range(1, days + 1)]
+    with ReplayServer() as server:
+        driver = initialize_chrome_driver()
+        try:
+            crawler = WebCrawler(driver)
+            backend = SeleniumBackend(crawler, data_page_url=f"{server.base_url}/data")
+            print(f"\n[BENCH] replay_crawl ({days}일 × 2모드, repeat={repeat})")
+            _print_result("selenium login", *_timeit(lambda: (crawler.reset_session(), crawler.login(
+                'replay', 'replay', f"{server.base_url}/login", ID_SELECTOR, PW_SELECTOR, SUBMIT_SELECTOR
+            )), repeat))
+            backend.open()
+            best, mean = _timeit(lambda: [backend.fetch(date, mode) for date in dates for mode in ('15m', '30m')], repeat)
+            _print_result("selenium fetch (전체)", best, mean)
+            print(f"[BENCH] {'selenium fetch (조회 1건)':<40} best={best / (days * 2) * 1000:9.3f}ms")
+        finally:
+            driver.quit()
+
+
+BENCHMARKS = {
+    'extract_table': bench_extract_table,
+    'merge_datetime': bench_merge_datetime,
+    'transform_for_bigquery': bench_transform_for_bigquery,
+    'output_formats': bench_output_formats,
+    'accumulator': bench_accumulator,
+    'chrome_profile': bench_chrome_profile,
+    'pipeline': bench_pipeline,
+    'replay_http': bench_replay_http,
+    'replay_crawl': bench_replay_crawl,
+}
+# Chrome이 필요하거나 오래 걸리는 벤치마크는 이름을 지정했을 때만 실행
+BROWSER_BENCHMARKS = {'chrome_profile', 'replay_crawl'}
+EXPLICIT_BENCHMARKS = BROWSER_BENCHMARKS | {'pipeline'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KEPCO 크롤러 벤치마크")
+    parser.add_argument('names', nargs='*', default=[name for name in BENCHMARKS if name not in EXPLICIT_BENCHMARKS], help=f"실행할 벤치마크: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--repeat', type=int, default=None, help="반복 횟수")
+    parser.add_argument('--browser', action='store_true', help="로컬 Chrome을 띄워 브라우저 구간까지 측정")
+    parser.add_argument('--url', default=None, help="chrome_profile에서 로드할 페이지 (기본: 로컬 조회 결과 페이지)")
+    parser.add_argument('--scales', default='1,100,1000', help="pipeline 벤치마크의 site-month 규모 (쉼표 구분)")
+    parser.add_argument('--history', default=DEFAULT_HISTORY_PATH, help="pipeline 처리량 기록 파일 (빈 값이면 기록 안 함)")
+    args = parser.parse_args()
+
+    import metrics
+    # 측정 대상 함수의 span JSON 로그가 벤치마크 출력에 섞이지 않도록 비활성화
+    metrics.METRICS_JSON_LOG = False
+
+    for name in args.names:
+        kwargs = {}
+        if args.repeat:
+            kwargs['repeat'] = args.repeat
+        if name == 'extract_table':
+            kwargs['browser'] = args.browser
+        if name == 'chrome_profile':
+            kwargs['url'] = args.url
+        if name == 'pipeline':
+            kwargs['scales'] = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+            kwargs['history'] = args.history
+        BENCHMARKS[name](**kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# checkpoint.py
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+
+class CheckpointStore:
+    """
+    수집이 끝난 site-day를 (Site_Unit, Factory, mode, date) 키로 기록하는 SQLite 저장소.
+    재실행/재시작 시 이미 적재된 날짜를 건너뛰는 데 사용합니다.
+    여러 크롤러 워커 스레드에서 함께 사용할 수 있습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    site_unit TEXT NOT NULL,
+                    factory TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    completed_at TEXT NOT NULL,
+                    PRIMARY KEY (site_unit, factory, mode, date)
+                )
+            """)
+
+    def completed_dates(self, site_unit, factory, mode) -> set:
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT date FROM checkpoints WHERE site_unit = ? AND factory = ? AND mode = ?",
+                (site_unit, factory or '', mode)
+            )
+            return {date for (date,) in cursor.fetchall()}
+
+    def is_done(self, site_unit, factory, mode, date) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT 1 FROM checkpoints WHERE site_unit = ? AND factory = ? AND mode = ? AND date = ?",
+                (site_unit, factory or '', mode, date)
+            )
+            return cursor.fetchone() is not None
+
+    def mark_done(self, site_unit, factory, mode, date):
+        self.mark_done_many([(site_unit, factory, mode, date)])
+
+    def mark_done_many(self, keys):
+        completed_at = datetime.now(timezone.utc).isoformat()
+        rows = [(site_unit, factory or '', mode, date, completed_at) for site_unit, factory, mode, date in keys]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoints (site_unit, factory, mode, date, completed_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        print(f"[INFO] 체크포인트 {len(rows)}건 기록")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# KEPCO 데이터 날짜 기준 시간대
+KST = timezone(timedelta(hours=9))
+# 하루치 슬롯 수 (15분: 00:15~24:00, 30분: 00:30~24:00)
+SLOTS_PER_DAY = {'15m': 96, '30m': 48}
+# 슬롯 값이 채워졌는지 판단하는 컬럼 (아직 집계되지 않은 구간은 '-' → NaN)
+USAGE_COLUMNS = {'15m': 'Electricity consumption', '30m': 'Electricity consumption_30m'}
+
+
+def frame_site_day_keys(df, mode, today=None):
+    """
+    병합된 DataFrame(여러 site-day)에서 완료로 기록할 중복 없는 체크포인트 키를 만듭니다.
+    오늘(KST) 이후 날짜와 슬롯이 빠졌거나 사용량이 비어 있는 site-day는 다음 실행에서 다시 수집하도록 제외합니다.
+    """
+    if df.empty:
+        return []
+    today = today or datetime.now(KST).strftime('%Y-%m-%d')
+    keys = ['Site_Unit', 'Factory', 'Date']
+    frame = df[keys + ['Time']].assign(_filled=df[USAGE_COLUMNS[mode]].notna().to_numpy())
+    stats = frame.groupby(keys, observed=True, sort=False).agg(slots=('Time', 'nunique'), filled=('_filled', 'all'))
+    dates = stats.index.get_level_values('Date').astype(str)
+    complete = (stats['slots'] >= SLOTS_PER_DAY[mode]) & stats['filled'] & (dates < today)
+    skipped = int((~complete).sum())
+    if skipped:
+        print(f"[INFO] 당일(KST) 이후이거나 슬롯이 비어 있는 {mode} site-day {skipped}건은 체크포인트에 기록하지 않습니다.")
+    return [(site_unit, factory, mode, date) for site_unit, factory, date in stats.index[complete.to_numpy()]]
+
+
+class FirestoreCheckpointStore:
+    """
+    CheckpointStore와 같은 인터페이스의 Firestore 저장소. 컨테이너가 재시작되어도 남아 있으므로
+    Cloud Run Job에서 이어받기에 사용합니다. (Site_Unit, Factory, mode)마다 문서 1개에 완료 날짜 배열을 둡니다.
+    """
+    # Firestore batch 쓰기 1회 최대 작업 수
+    MAX_BATCH_WRITES = 500
+
+    def __init__(self, collection_name, client=None):
+        if client is None:
+            import google_service as gcp
+            client = gcp.get_firestore_client()
+        self.collection_name = collection_name
+        self._collection = client.collection(collection_name)
+        self._client = client
+
+    @staticmethod
+    def _document_id(site_unit, factory, mode):
+        # 문서 ID에는 '/'를 쓸 수 없으므로 키 전체의 해시를 사용 (문자 치환은 'A/B'와 'A_B'가 충돌)
+        key = '\x1f'.join([str(site_unit), factory or '', mode])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def completed_dates(self, site_unit, factory, mode) -> set:
+        snapshot = self._collection.document(self._document_id(site_unit, factory, mode)).get()
+        if not snapshot.exists:
+            return set()
+        return set((snapshot.to_dict() or {}).get('dates', []))
+
+    def is_done(self, site_unit, factory, mode, date) -> bool:
+        return date in self.completed_dates(site_unit, factory, mode)
+
+    def mark_done(self, site_unit, factory, mode, date):
+        self.mark_done_many([(site_unit, factory, mode, date)])
+
+    def mark_done_many(self, keys):
+        from google.cloud import firestore
+
+        dates_by_document = {}
+        for site_unit, factory, mode, date in keys:
+            key = (site_unit, factory or '', mode)
+            dates_by_document.setdefault(key, set()).add(date)
+        if not dates_by_document:
+            return
+
+        completed_at = datetime.now(timezone.utc).isoformat()
+        items = list(dates_by_document.items())
+        for start in range(0, len(items), self.MAX_BATCH_WRITES):
+            batch = self._client.batch()
+            for (site_unit, factory, mode), dates in items[start:start + self.MAX_BATCH_WRITES]:
+                batch.set(self._collection.document(self._document_id(site_unit, factory, mode)), {
+                    'site_unit': site_unit,
+                    'factory': factory,
+                    'mode': mode,
+                    'dates': firestore.ArrayUnion(sorted(dates)),
+                    'completed_at': completed_at,
+                }, merge=True)
+            batch.commit()
+        print(f"[INFO] 체크포인트 {sum(len(dates) for _, dates in items)}건 기록 (Firestore {self.collection_name})")
+
+    def close(self):
+        pass
+
+
+FIRESTORE_PREFIX = 'firestore://'
+
+
+def open_checkpoint_store(path):
+    """
+    'firestore://컬렉션'이면 Firestore, 그 밖의 값은 SQLite 파일 경로로 봅니다.
+    경로가 비어 있으면 체크포인트를 사용하지 않습니다(None 반환).
+    """
+    if not path:
+        return None
+    print(f"[INFO] 체크포인트 저장소 사용: {path}")
+    if path.startswith(FIRESTORE_PREFIX):
+        return FirestoreCheckpointStore(path[len(FIRESTORE_PREFIX):])
+    return CheckpointStore(path)
@@ -1,6 +1,8 @@
 # config.py
+import os
 
-DATA_PAGE_URL = "https://pp.kepco.co.kr/rs/rs0101N.do?menu_id=O010201"
+# 데이터(조회) 페이지. 로컬 재생 서버(replay.py)로 실행할 때는 KEPCO_DATA_PAGE_URL로 바꿔 지정
+DATA_PAGE_URL = os.environ.get('KEPCO_DATA_PAGE_URL', "https://pp.kepco.co.kr/rs/rs0101N.do?menu_id=O010201")
 ID_SELECTOR = "#RSA_USER_ID"
 PW_SELECTOR = "#RSA_USER_PWD"
 SUBMIT_SELECTOR = ".intro_btn"
@@ -10,3 +12,91 @@ GOOGLE_DRIVE_FOLDER_ID = "1zoLPlU3rovSdiyUAboSoT29ZK-81fIth"
 SCOPES = ['https://www.googleapis.com/auth/drive']
 TOKEN_PICKLE = 'token.pickle'
 
+# 동시에 실행할 크롤러 워커(=Chrome 드라이버) 수. 워커 1개당 메모리 약 300~500MB 필요
+MAX_WORKERS = int(os.environ.get('KEPCO_MAX_WORKERS', '1'))
+
+# 크롤링 백엔드: 'selenium'(브라우저 조회) 또는 'http'(로그인 쿠키로 조회 요청 직접 호출, 실패 시 selenium)
+CRAWL_BACKEND = os.environ.get('KEPCO_CRAWL_BACKEND', 'selenium')
+# HTTP 백엔드 조회 URL. 비어 있으면 데이터 페이지의 조회 폼 action을 사용
+LOOKUP_URL = os.environ.get('KEPCO_LOOKUP_URL', '')
+HTTP_TIMEOUT = float(os.environ.get('KEPCO_HTTP_TIMEOUT', '30'))
+
+# 수집 완료(BigQuery 적재까지 끝난) site-day 체크포인트. 빈 값이면 사용 안 함.
+# 'firestore://컬렉션'이면 Firestore(컨테이너 재시작 후에도 유지), 그 밖의 값은 로컬 SQLite 파일 경로.
+# SQLite(WAL)는 GCS FUSE 마운트에서 잠금이 보장되지 않으므로 로컬 디스크에서만 사용
+# 중단된 실행을 site-day 단위로 이어받으려면 스트리밍 업로드(KEPCO_STREAMING_UPLOAD=1)가 필요합니다.
+# 일괄 모드는 마지막 BigQuery 적재가 끝난 뒤에야 체크포인트를 기록합니다.
+CHECKPOINT_DB = os.environ.get('KEPCO_CHECKPOINT_DB', 'firestore://kepco_checkpoints')
+
+# 스트리밍 업로드: 수집된 site-day를 배치 단위로 바로 BigQuery에 적재 (1이면 사용)
+STREAMING_UPLOAD = os.environ.get('KEPCO_STREAMING_UPLOAD', '0') == '1'
+# 배치 적재 기준: 모드별 누적 행 수 또는 첫 데이터 이후 경과 시간(초) 중 먼저 도달하는 쪽
+STREAM_BATCH_ROWS = int(os.environ.get('KEPCO_STREAM_BATCH_ROWS', '20000'))
+STREAM_BATCH_SECONDS = float(os.environ.get('KEPCO_STREAM_BATCH_SECONDS', '300'))
+
+# static 문서가 없는 Google API의 discovery 문서 디스크 캐시 경로
+DISCOVERY_CACHE_DIR = os.environ.get('KEPCO_DISCOVERY_CACHE_DIR', '/tmp/kepco_discovery_cache')
+
+# Drive 출력 형식: 'parquet'(기본) 또는 'xlsx'. Parquet 압축: 'zstd' 또는 'snappy'
+OUTPUT_FORMAT = os.environ.get('KEPCO_OUTPUT_FORMAT', 'parquet')
+PARQUET_COMPRESSION = os.environ.get('KEPCO_PARQUET_COMPRESSION', 'zstd')
+# site-day 요약 엑셀(Google Sheet 변환)도 함께 업로드할지 여부 (1이면 사용)
+EXCEL_SUMMARY = os.environ.get('KEPCO_EXCEL_SUMMARY', '0') == '1'
+
+# BigQuery 적재 방식: 'append'(WRITE_APPEND) 또는 'upsert'(staging 테이블 + MERGE, 재실행해도 중복 없음)
+# upsert는 resolution까지 키로 비교하므로 resolution이 NULL인 기존 행과는 매칭되지 않습니다.
+# :00/:30 행은 15분/30분 모두에 있어 measure_time만으로 채울 수 없으니, 기존 행의 resolution을 채운 뒤 upsert로 전환
+BQ_LOAD_MODE = os.environ.get('KEPCO_BQ_LOAD_MODE', 'append')
+
+# 30분 조회를 생략하고 15분 데이터로 재계산할 Site_Unit 목록 (쉼표 구분, '*'이면 전체)
+DERIVE_30M_SITES = {site.strip() for site in os.environ.get('KEPCO_DERIVE_30M_SITES', '').split(',') if site.strip()}
+# 재계산 검증: 날짜 중 이 비율만큼 30분도 실제 조회해 재계산 값과 비교 (0이면 검증 안 함)
+VERIFY_30M_SAMPLE_RATE = float(os.environ.get('KEPCO_VERIFY_30M_SAMPLE_RATE', '0'))
+
+# 경량 Chrome 프로필: 이미지/폰트 차단, eager 페이지 로드, 백그라운드 기능 비활성화 (1이면 사용)
+# 조회 버튼이 이미지(btn_blue_lookup.png)라서 이미지 차단 시 is_displayed() 판단이 달라질 수 있으므로,
+# 작업 이미지에서 benchmark.py chrome_profile / replay_crawl로 확인하기 전까지 기본은 사용 안 함
+CHROME_LEAN = os.environ.get('KEPCO_CHROME_LEAN', '0') == '1'
+# 경량 프로필에서 스타일시트까지 차단할지 여부. 화면 요소 표시 여부 판단이 달라질 수 있어 기본은 사용 안 함
+CHROME_BLOCK_CSS = os.environ.get('KEPCO_CHROME_BLOCK_CSS', '0') == '1'
+
+# 단계별 span을 JSON 한 줄 로그로 출력할지 여부 (Cloud Logging 구조화 로그, 0이면 요약만 출력)
+METRICS_JSON_LOG = os.environ.get('KEPCO_METRICS_JSON_LOG', '1') == '1'
+# 실행 종료 시 단계별/사이트별 p50·p95 요약 JSON을 저장할 경로. 빈 값이면 저장 안 함
+METRICS_SUMMARY_PATH = os.environ.get('KEPCO_METRICS_SUMMARY_PATH', '/tmp/kepco_metrics_summary.json')
+
+# 조회 결과 HTML을 fixture로 기록할 디렉토리 (replay.py 재생 서버/벤치마크용). 빈 값이면 기록 안 함
+RECORD_FIXTURES_DIR = os.environ.get('KEPCO_RECORD_FIXTURES_DIR', '')
+
+# 수집 스케줄러: 'pool'(레코드 단위 워커 풀) 또는 'async'(site-day 작업 큐 + 요청 속도 제한 + 최근 날짜 우선)
+SCHEDULER = os.environ.get('KEPCO_SCHEDULER', 'pool')
+# async 스케줄러의 KEPCO 조회 요청 속도 제한 (초당 요청 수, 0이면 제한 없음): 전체 / 계정별
+RATE_LIMIT_PER_SEC = float(os.environ.get('KEPCO_RATE_LIMIT_PER_SEC', '1.0'))
+ACCOUNT_RATE_LIMIT_PER_SEC = float(os.environ.get('KEPCO_ACCOUNT_RATE_LIMIT_PER_SEC', '0.5'))
+# 조회 대기 시간 초과(TimeoutException) 시 재시도 횟수와 첫 대기 시간(초, 재시도마다 2배)
+RETRY_MAX_ATTEMPTS = int(os.environ.get('KEPCO_RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BACKOFF_SEC = float(os.environ.get('KEPCO_RETRY_BACKOFF_SEC', '2.0'))
+
+# 실패 분석용 아티팩트(스크린샷, failures.jsonl) 저장 경로와 상한. 빈 값이면 저장 안 함
+ARTIFACT_DIR = os.environ.get('KEPCO_ARTIFACT_DIR', '/tmp/kepco_artifacts')
+ARTIFACT_MAX_FILES = int(os.environ.get('KEPCO_ARTIFACT_MAX_FILES', '50'))
+ARTIFACT_MAX_MB = float(os.environ.get('KEPCO_ARTIFACT_MAX_MB', '50'))
+# 계정별 차단기: 연속 실패 횟수 기준(0이면 사용 안 함)과 조회 중단 시간(초)
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('KEPCO_CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_COOLDOWN_SEC = float(os.environ.get('KEPCO_CIRCUIT_COOLDOWN_SEC', '300'))
+# 실패한 site-day를 실행 끝에 새 브라우저 세션으로 한 번 더 시도할지 여부 (0이면 사용 안 함)
+RETRY_FAILED_AT_END = os.environ.get('KEPCO_RETRY_FAILED_AT_END', '1') == '1'
+
+# Cloud Run Job 병렬 task 샤딩: task마다 시트 레코드 중 자기 몫만 수집 (로컬에서는 두 환경 변수를 직접 지정해 시뮬레이션)
+TASK_INDEX = int(os.environ.get('CLOUD_RUN_TASK_INDEX', '0'))
+TASK_COUNT = int(os.environ.get('CLOUD_RUN_TASK_COUNT', '1'))
+# 같은 실행의 task들이 출력을 모으는 실행 ID (Cloud Run Job은 CLOUD_RUN_EXECUTION을 제공)
+RUN_ID = os.environ.get('KEPCO_RUN_ID', os.environ.get('CLOUD_RUN_EXECUTION', ''))
+# 샤드별 출력과 manifest를 모을 공유 경로 (GCS 볼륨 마운트 등). 비어 있으면 샤드마다 Drive에 따로 업로드
+SHARD_OUTPUT_DIR = os.environ.get('KEPCO_SHARD_OUTPUT_DIR', '')
+# 마지막으로 끝난 샤드가 reduce(샤드 출력 병합 + Drive 업로드)를 실행할지 여부 (0이면 python shard.py reduce로 별도 실행)
+SHARD_AUTO_REDUCE = os.environ.get('KEPCO_SHARD_AUTO_REDUCE', '1') == '1'
+
+# 측정값 컬럼 dtype: 'float32'(기본, 메모리 절반) 또는 'float64'
+# float32는 유효숫자 약 7자리로, 소수 둘째 자리 값은 65,536 미만까지 그대로 보존됩니다
+MEASURE_DTYPE = os.environ.get('KEPCO_MEASURE_DTYPE', 'float32')
@@ -0,0 +1,180 @@
+# crawl_backend.py
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+
+from web_crawler import parse_table_html
+import utils
+import metrics
+from config import DATA_PAGE_URL, LOOKUP_URL, HTTP_TIMEOUT
+
+# 조회 모드 → T_MODE 라디오 값
+T_MODE_VALUES = {'15m': '15', '30m': '30'}
+
+# 조건 대기로 바꾸기 전, 모드 1회 조회에 들어가던 고정 sleep 합계 (모드 전환 2초 + 조회 전 1초 + 조회 후 2초)
+LEGACY_FIXED_SLEEP_SEC = 5.0
+
+
+class SeleniumBackend:
+    """
+    브라우저에서 날짜/모드를 설정하고 조회 버튼을 눌러 테이블을 읽는 기본 백엔드.
+    """
+    name = 'selenium'
+
+    def __init__(self, crawler, data_page_url=None):
+        self.crawler = crawler
+        self.data_page_url = data_page_url or DATA_PAGE_URL
+
+    def open(self):
+        print("[INFO] 데이터 페이지로 이동 중...")
+        self.crawler.move_to_data_page(self.data_page_url)
+
+    def fetch(self, date_string, mode, timer=None, recorder=None):
+        """
+        recorder(date, mode, html)가 주어지면 조회 결과 테이블 HTML을 fixture로 넘깁니다(replay.FixtureStore).
+        """
+        if mode not in T_MODE_VALUES:
+            raise ValueError(f"[ERROR] 지원되지 않는 모드: {mode}")
+        timer = timer or utils.StepTimer()
+
+        with timer.step(f'{mode}_set_date'):
+            self.crawler.set_date(date_string)
+        with timer.step(f'{mode}_background'):
+            self.crawler.wait_for_background_disappear()
+
+        with timer.step(f'{mode}_set_mode_wait'):
+            if mode == '15m':
+                self.crawler.set_mode_15m()
+            else:
+                self.crawler.set_mode_30m()
+        with timer.step(f'{mode}_lookup_wait'):
+            self.crawler.click_lookup(date_string, T_MODE_VALUES[mode])
+        with timer.step(f'{mode}_background'):
+            self.crawler.wait_for_background_disappear()
+        if recorder is not None:
+            recorder(date_string, mode, self.crawler.table_outer_html())
+        with timer.step(f'{mode}_extract'):
+            try:
+                return self.crawler.extract_table_fast()
+            except Exception:
+                return self.crawler.extract_table()
+
+
+class HttpBackend:
+    """
+    Selenium으로 로그인한 세션의 쿠키를 HTTP 클라이언트에 넘겨
+    rs0101N 조회 요청을 브라우저 없이 직접 호출하는 백엔드.
+    HTTP 조회가 실패하면 같은 날짜/모드를 Selenium 백엔드로 다시 조회합니다.
+    """
+    name = 'http'
+
+    # 연속 실패가 이 횟수에 도달하면 해당 세션에서는 Selenium만 사용
+    MAX_CONSECUTIVE_FAILURES = 3
+
+    def __init__(self, crawler, fallback=None, session=None):
+        self.crawler = crawler
+        self.fallback = fallback or SeleniumBackend(crawler)
+        self.session = session or _create_http_session()
+        self.lookup_url = None
+        self.lookup_method = 'post'
+        self.form_fields = []
+        self.consecutive_failures = 0
+
+    def open(self):
+        # 로그인된 브라우저로 데이터 페이지를 한 번 열어 세션과 조회 폼 정보를 확보
+        self.fallback.open()
+        self._capture_session()
+        self.consecutive_failures = 0
+
+    def _capture_session(self):
+        driver = self.crawler.driver
+
+        self.session.cookies.clear()
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+        self.session.headers.update({
+            'User-Agent': driver.execute_script("return navigator.userAgent;"),
+            'Referer': self.fallback.data_page_url,
+        })
+
+        # SELECT_DT 입력란이 속한 폼의 action/method/필드 값을 그대로 재사용
+        form = driver.execute_script("""
+            var input = document.getElementById('SELECT_DT');
+            var form = input ? input.form : null;
+            if (!form) { return null; }
+            var fields = [];
+            new FormData(form).forEach(function (value, key) { fields.push([key, value]); });
+            return {action: form.action, method: form.method, fields: fields};
+        """)
+
+        if LOOKUP_URL:
+            self.lookup_url = LOOKUP_URL
+        elif form and form.get('action'):
+            self.lookup_url = urljoin(self.fallback.data_page_url, form['action'])
+        else:
+            self.lookup_url = self.fallback.data_page_url
+
+        if form:
+            self.lookup_method = (form.get('method') or 'post').lower()
+            self.form_fields = [tuple(field) for field in form.get('fields', [])]
+
+        print(f"[INFO] HTTP 조회 세션 준비 완료: {self.lookup_method.upper()} {self.lookup_url}")
+
+    def _build_params(self, date_string, mode):
+        params = [(k, v) for k, v in self.form_fields if k not in ('SELECT_DT', 'T_MODE')]
+        params.append(('SELECT_DT', date_string))
+        params.append(('T_MODE', T_MODE_VALUES[mode]))
+        return params
+
+    @metrics.timed('http.fetch_http')
+    def fetch_http(self, date_string, mode, recorder=None):
+        params = self._build_params(date_string, mode)
+        if self.lookup_method == 'get':
+            response = self.session.get(self.lookup_url, params=params, timeout=HTTP_TIMEOUT)
+        else:
+            response = self.session.post(self.lookup_url, data=params, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        df = parse_table_html(response.text)
+        if df.empty:
+            # 표를 AJAX로 채우는 페이지면 폼 POST 응답에는 빈 표만 있으므로 실패로 보고 Selenium으로 대체
+            raise ValueError(f"[ERROR] HTTP 조회 결과 표가 비어 있습니다: {date_string} {mode}")
+        if recorder is not None:
+            recorder(date_string, mode, response.text)
+        return df
+
+    def fetch(self, date_string, mode, timer=None, recorder=None):
+        if mode not in T_MODE_VALUES:
+            raise ValueError(f"[ERROR] 지원되지 않는 모드: {mode}")
+        timer = timer or utils.StepTimer()
+
+        if self.consecutive_failures < self.MAX_CONSECUTIVE_FAILURES:
+            try:
+                with timer.step(f'{mode}_http_lookup'):
+                    df = self.fetch_http(date_string, mode, recorder=recorder)
+                self.consecutive_failures = 0
+                print(f"[INFO] HTTP 조회 완료: {date_string} {mode}, {len(df)}건")
+                return df
+            except Exception as e:
+                self.consecutive_failures += 1
+                print(f"[WARN] HTTP 조회 실패 ({self.consecutive_failures}/{self.MAX_CONSECUTIVE_FAILURES}), Selenium으로 대체: {e}")
+
+        return self.fallback.fetch(date_string, mode, timer=timer, recorder=recorder)
+
+
+def _create_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=2)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def create_backend(crawler, backend_name='selenium', data_page_url=None):
+    if backend_name == 'http':
+        return HttpBackend(crawler, fallback=SeleniumBackend(crawler, data_page_url))
+    if backend_name == 'selenium':
+        return SeleniumBackend(crawler, data_page_url)
+    raise ValueError(f"[ERROR] 지원되지 않는 크롤링 백엔드: {backend_name}")
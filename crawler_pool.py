@@ -0,0 +1,430 @@
+# crawler_pool.py
+import queue
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from web_crawler import WebCrawler
+from crawl_backend import create_backend, LEGACY_FIXED_SLEEP_SEC
+from webdriver_initializer import initialize_chrome_driver
+import data_processor
+import metrics
+import utils
+from failures import FailureTracker, get_artifact_store
+from config import (ID_SELECTOR, PW_SELECTOR, SUBMIT_SELECTOR, CRAWL_BACKEND,
+                    DERIVE_30M_SITES, VERIFY_30M_SAMPLE_RATE, RETRY_FAILED_AT_END)
+
+
+def derives_30m(site_unit):
+    """
+    30분 데이터를 조회 대신 15분 데이터로 재계산하는 사이트인지 여부.
+    """
+    return '*' in DERIVE_30M_SITES or site_unit in DERIVE_30M_SITES
+
+
+def is_verify_sample(site_unit, factory, date, rate=VERIFY_30M_SAMPLE_RATE):
+    """
+    site-day 키의 해시로 검증 표본을 고릅니다. 재실행해도 같은 날짜가 선택됩니다.
+    """
+    if rate <= 0:
+        return False
+    return zlib.crc32(f"{site_unit}|{factory}|{date}".encode('utf-8')) / 2 ** 32 < rate
+
+
+def _report_30m_mismatches(site_unit, current_date, derived, crawled):
+    mismatches = data_processor.compare_30m(derived, crawled)
+    if mismatches.empty:
+        print(f"    [VERIFY] 30분 재계산 일치: Site_Unit={site_unit}, 날짜 {current_date}")
+        return False
+    print(f"    [VERIFY] 30분 재계산 불일치 {len(mismatches)}건: Site_Unit={site_unit}, 날짜 {current_date}")
+    for record in mismatches.head(5).itertuples(index=False):
+        print(f"        {record.Time} {record.column}: 재계산 {record.derived} / 조회 {record.crawled}")
+    return True
+
+
+def _login(crawler, row, login_url):
+    crawler.login(
+        user_id=row['ID'],
+        password=row['PW'],
+        login_url=login_url,
+        id_selector=ID_SELECTOR,
+        pw_selector=PW_SELECTOR,
+        submit_selector=SUBMIT_SELECTOR
+    )
+
+
+def pending_site_days(row, checkpoint=None):
+    """
+    레코드의 날짜 범위 중 체크포인트상 15분/30분이 모두 끝나지 않은 날짜를 구합니다.
+    Returns:
+        (pending_dates, done_15m, done_30m)
+    """
+    done_15m = set()
+    done_30m = set()
+    if checkpoint is not None:
+        done_15m = checkpoint.completed_dates(row['Site_Unit'], row.get('Factory', ''), '15m')
+        done_30m = checkpoint.completed_dates(row['Site_Unit'], row.get('Factory', ''), '30m')
+    done_both = done_15m & done_30m
+
+    pending_dates = list(utils.generate_date_range(row['start_date'], row['end_date'], skip_dates=done_both))
+    if not pending_dates:
+        print(f"[SKIP] 체크포인트상 모든 날짜 수집 완료: Site_Unit={row['Site_Unit']}, Factory={row.get('Factory', '')}")
+    elif done_both:
+        print(f"[INFO] 체크포인트로 {len(done_both)}일 건너뜀, 남은 날짜 {len(pending_dates)}일")
+    return pending_dates, done_15m, done_30m
+
+
+def login_and_open(crawler, backend, row, login_url):
+    """
+    로그인(같은 ID로 이미 로그인된 세션이면 재사용) 후 데이터 페이지를 엽니다. 실패 시 예외를 던집니다.
+    """
+    crawler.handle_popup()
+    print("[INFO] 로그인 시도 중...")
+    _login(crawler, row, login_url)
+    try:
+        backend.open()
+    except Exception as e:
+        # 재사용한 세션이 서버에서 만료된 경우: 세션을 비우고 한 번 다시 로그인
+        print(f"[WARN] 데이터 페이지 이동 실패, 다시 로그인합니다: {e}")
+        crawler.reset_session()
+        _login(crawler, row, login_url)
+        backend.open()
+
+
+def crawl_site_day(backend, row, current_date, need_15m, need_30m, emit, recorder=None, timer=None):
+    """
+    site-day 1건의 15분/30분 데이터를 조회해 emit(mode, df)로 넘깁니다. 실패하면 예외를 던집니다.
+    DERIVE_30M_SITES에 포함된 사이트는 30분 조회 대신 15분 데이터로 재계산하며,
+    검증 표본일에는 30분도 조회해 재계산 값과 비교한 결과를 출력합니다.
+    Returns:
+        검증하지 않았으면 None, 검증했으면 불일치 여부(bool)
+    """
+    site_unit = row['Site_Unit']
+    factory = row.get('Factory', '')
+    derive = derives_30m(site_unit)
+    verify = is_verify_sample(site_unit, factory, current_date)
+    # 재계산 대상이면 30분 적재에도 15분 데이터가 필요하고, 검증 표본일이면 30분도 조회
+    fetch_15m = need_15m or (need_30m and (derive or verify))
+    fetch_30m = need_30m and (not derive or verify)
+    timer = timer or utils.StepTimer()
+
+    df_15m = None
+    df_30m = None
+    mismatched = None
+
+    # 1. 15분 모드
+    if fetch_15m:
+        print("    [STEP] 15분 모드 조회 시작")
+        df_15m = backend.fetch(current_date, '15m', timer=timer, recorder=recorder)
+        df_15m = data_processor.process_dataframe(
+            df_15m, '15m', row['Project'], site_unit, factory, current_date
+        )
+        if need_15m:
+            emit('15m', df_15m)
+        print("    [DONE] 15분 데이터 처리 완료")
+
+    # 2. 30분 모드
+    if fetch_30m:
+        print("    [STEP] 30분 모드 조회 시작")
+        df_30m = backend.fetch(current_date, '30m', timer=timer, recorder=recorder)
+        df_30m = data_processor.process_dataframe(
+            df_30m, '30m', row['Project'], site_unit, factory, current_date
+        )
+
+    if need_30m:
+        derived_30m = data_processor.resample_15m_to_30m(df_15m) if df_15m is not None else None
+        if verify and derived_30m is not None and df_30m is not None:
+            mismatched = _report_30m_mismatches(site_unit, current_date, derived_30m, df_30m)
+        # 실제 조회한 값이 있으면 우선 사용
+        emit('30m', df_30m if df_30m is not None else derived_30m)
+        print(f"    [DONE] 30분 데이터 처리 완료 ({'조회' if fetch_30m else '재계산'})")
+
+    return mismatched
+
+
+def report_verification(row, outcomes):
+    outcomes = [outcome for outcome in outcomes if outcome is not None]
+    if outcomes:
+        print(f"[VERIFY] Site_Unit={row['Site_Unit']}, Factory={row.get('Factory', '')}: 30분 재계산 검증 "
+              f"{len(outcomes)}일 중 불일치 {sum(outcomes)}일")
+
+
+def crawl_record(crawler, backend, row, login_url, checkpoint=None, on_site_day=None, fixtures=None,
+                 failures=None, record_index=None):
+    """
+    시트 레코드 1건(계정 1개)에 대해 로그인 후 날짜 범위 전체를 수집합니다.
+    날짜/모드별 조회는 backend(Selenium 또는 HTTP)가 담당하며,
+    checkpoint에 완료로 기록된 날짜/모드는 건너뜁니다.
+    on_site_day(mode, df)가 주어지면 결과를 모아두지 않고 site-day마다 바로 넘깁니다.
+    fixtures(replay.FixtureStore)가 주어지면 조회 결과 HTML을 fixture로 기록합니다.
+    failures(FailureTracker)가 주어지면 실패한 site-day와 로그인 실패 레코드의 날짜를 재시도 대상으로 모으고,
+    계정 차단기가 열려 있는 동안은 조회하지 않고 보류합니다.
+    Returns:
+        (dfs_15m, dfs_30m): 날짜별 DataFrame 리스트 (on_site_day 사용 시 빈 리스트)
+    """
+    frames = {'15m': [], '30m': []}
+
+    def emit(mode, df):
+        if on_site_day is not None:
+            on_site_day(mode, df)
+        else:
+            frames[mode].append(df)
+
+    pending_dates, done_15m, done_30m = pending_site_days(row, checkpoint)
+    if not pending_dates:
+        return frames['15m'], frames['30m']
+
+    account = row.get('ID')
+    site_unit = row['Site_Unit']
+    if failures is not None and not failures.breaker.allow(account):
+        print(f"[WARN] 계정 차단기가 열려 있어 보류합니다: Site_Unit={site_unit}, {len(pending_dates)}일")
+        for current_date in pending_dates:
+            failures.add(record_index, row, current_date, current_date not in done_15m,
+                         current_date not in done_30m, 'circuit_open')
+        return frames['15m'], frames['30m']
+
+    try:
+        login_and_open(crawler, backend, row, login_url)
+    except Exception as e:
+        print(f"[ERROR] 로그인 실패: Site_Unit={site_unit}, Factory={row.get('Factory', '')}, 에러: {e}")
+        if failures is not None:
+            failures.breaker.record_failure(account)
+            for current_date in pending_dates:
+                failures.add(record_index, row, current_date, current_date not in done_15m,
+                             current_date not in done_30m, 'login', e)
+        return frames['15m'], frames['30m']
+
+    recorder = fixtures.recorder(site_unit) if fixtures is not None else None
+    if derives_30m(site_unit):
+        print(f"[INFO] 30분 데이터는 15분 데이터로 재계산합니다: Site_Unit={site_unit}")
+    outcomes = []
+    deferred = 0
+    # 레코드 시작 시 받은 allow()를 첫 날짜에 사용 (half-open이면 그 날짜가 시험 조회)
+    granted = True
+
+    # 날짜 범위 순회
+    for current_date in pending_dates:
+        need_15m = current_date not in done_15m
+        need_30m = current_date not in done_30m
+        allowed, granted = granted or failures is None or failures.breaker.allow(account), False
+        if not allowed:
+            failures.add(record_index, row, current_date, need_15m, need_30m, 'circuit_open')
+            deferred += 1
+            continue
+
+        print(f"[INFO] Site_Unit={site_unit}, Factory={row.get('Factory', '')}, 날짜 {current_date} 처리 중...")
+        emitted = set()
+
+        def day_emit(mode, df):
+            emitted.add(mode)
+            emit(mode, df)
+
+        timer = utils.StepTimer()
+        try:
+            outcomes.append(crawl_site_day(
+                backend, row, current_date, need_15m=need_15m, need_30m=need_30m,
+                emit=day_emit, recorder=recorder, timer=timer
+            ))
+            if failures is not None:
+                failures.breaker.record_success(account)
+        except Exception as e:
+            print(f"[ERROR] 날짜 {current_date} 처리 실패: {e}")
+            if failures is not None:
+                # 이미 넘긴 모드는 제외하고 재시도 대상으로 보관
+                failures.breaker.record_failure(account)
+                failures.add(record_index, row, current_date, need_15m and '15m' not in emitted,
+                             need_30m and '30m' not in emitted, 'error', e)
+            continue
+        finally:
+            timer.report(
+                f"Site_Unit={site_unit}, 날짜 {current_date}",
+                baseline_wait_sec=LEGACY_FIXED_SLEEP_SEC * 2
+            )
+
+    if deferred:
+        print(f"[WARN] 계정 차단기로 {deferred}일 보류: Site_Unit={site_unit}")
+    report_verification(row, outcomes)
+    return frames['15m'], frames['30m']
+
+
+def retry_failed_site_days(failures, login_url, emit, fixtures=None):
+    """
+    실행 중 실패/보류된 site-day를 새 Chrome 세션으로 한 번 더 수집합니다.
+    emit(record_index, date, mode, df)로 결과를 넘기며, 차단기가 여전히 열려 있는 계정과
+    다시 실패한 site-day는 포기(체크포인트 미기록)로 남겨 다음 실행에서 재수집되게 합니다.
+    """
+    items = failures.drain()
+    if not items:
+        return
+    print(f"\n[INFO] 실패한 site-day {len(items)}건을 새 세션으로 재시도합니다.")
+
+    worker = CrawlWorker('R')
+    try:
+        worker.start()
+    except Exception as e:
+        print(f"[ERROR] 재시도 워커 시작 실패: {e}")
+        for item in items:
+            failures.give_up(item, 'retry_worker_failed', e)
+        return
+
+    try:
+        opened_record = None
+        for item in sorted(items, key=lambda failed: (failed.record_index or 0, failed.date)):
+            row = item.row
+            account = row.get('ID')
+            if not failures.breaker.allow(account):
+                failures.give_up(item, 'circuit_open')
+                continue
+            with metrics.context(worker='R', site_unit=row['Site_Unit']):
+                try:
+                    worker.ensure_alive()
+                    if opened_record != item.record_index or worker.crawler.logged_in_as != account:
+                        opened_record = None
+                        login_and_open(worker.crawler, worker.backend, row, login_url)
+                        opened_record = item.record_index
+                    print(f"[INFO][WR] Site_Unit={row['Site_Unit']}, 날짜 {item.date} 재시도 중...")
+                    crawl_site_day(
+                        worker.backend, row, item.date, item.need_15m, item.need_30m,
+                        emit=lambda mode, df, idx=item.record_index, date=item.date: emit(idx, date, mode, df),
+                        recorder=fixtures.recorder(row['Site_Unit']) if fixtures is not None else None
+                    )
+                    failures.breaker.record_success(account)
+                except Exception as e:
+                    print(f"[ERROR] 재시도 실패: Site_Unit={row['Site_Unit']}, 날짜 {item.date}, 에러: {e}")
+                    failures.breaker.record_failure(account)
+                    failures.give_up(item, f'retry_failed ({item.reason})', e)
+                    opened_record = None
+    finally:
+        worker.close()
+
+
+def _is_driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class CrawlWorker:
+    """
+    Chrome 드라이버 1개와 WebCrawler 세션을 소유하는 워커.
+    드라이버가 죽으면 다음 레코드 처리 전에 새로 띄웁니다.
+    """
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.driver = None
+        self.crawler = None
+        self.backend = None
+
+    def start(self):
+        print(f"[INFO][W{self.worker_id}] Chrome 드라이버 실행 중...")
+        self.driver = initialize_chrome_driver()
+        self.crawler = WebCrawler(self.driver)
+        self.backend = create_backend(self.crawler, CRAWL_BACKEND)
+
+    def ensure_alive(self):
+        if self.driver is None or not _is_driver_alive(self.driver):
+            print(f"[WARN][W{self.worker_id}] 드라이버 세션이 유효하지 않아 재시작합니다.")
+            self.close()
+            self.start()
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"[WARN][W{self.worker_id}] 드라이버 종료 중 오류: {e}")
+            self.driver = None
+            self.crawler = None
+            self.backend = None
+
+
+def run_crawl_pool(records, login_url, max_workers=1, checkpoint=None, on_site_day=None, fixtures=None,
+                   failures=None):
+    """
+    레코드를 max_workers 개의 독립된 Chrome 세션에 분배하여 병렬로 수집합니다.
+    같은 로그인 ID의 레코드는 한 워커에 묶어 로그인 세션을 재사용하고,
+    레코드 단위로 실패가 격리되며, 결과는 시트 순서대로 병합됩니다.
+    on_site_day(스트리밍 적재용), fixtures(fixture 기록용)는 crawl_record에 그대로 전달됩니다.
+    실패한 site-day는 failures(없으면 새로 생성)에 모았다가 마지막에 새 세션으로 재시도합니다.
+    Returns:
+        (dfs_15m, dfs_30m)
+    """
+    total = len(records)
+    if failures is None:
+        failures = FailureTracker(artifacts=get_artifact_store())
+
+    # 같은 로그인 ID의 레코드는 한 워커가 연달아 처리하도록 묶어 로그인 세션을 재사용
+    groups = {}
+    for idx, row in enumerate(records, 1):
+        groups.setdefault(row.get('ID'), []).append((idx, row))
+
+    record_queue = queue.Queue()
+    for group in groups.values():
+        record_queue.put(group)
+
+    results = {}
+    results_lock = threading.Lock()
+
+    def worker_loop(worker_id):
+        worker = CrawlWorker(worker_id)
+        try:
+            worker.start()
+        except Exception as e:
+            # 드라이버를 못 띄운 워커는 빠지고, 남은 레코드는 다른 워커가 처리
+            print(f"[ERROR][W{worker_id}] 워커 시작 실패: {e}")
+            return
+
+        try:
+            while True:
+                try:
+                    group = record_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                for idx, row in group:
+                    print(f"\n[INFO][W{worker_id}][{idx}/{total}] 프로젝트 시작: Site_Unit={row['Site_Unit']}, Factory={row.get('Factory', '')}")
+                    try:
+                        worker.ensure_alive()
+                        with metrics.context(worker=worker_id, site_unit=row['Site_Unit']):
+                            record_result = crawl_record(worker.crawler, worker.backend, row, login_url,
+                                                         checkpoint=checkpoint, on_site_day=on_site_day, fixtures=fixtures,
+                                                         failures=failures, record_index=idx)
+                        with results_lock:
+                            results[idx] = record_result
+                    except Exception as e:
+                        print(f"[ERROR][W{worker_id}] 전체 처리 중 예외 발생: Site_Unit={row.get('Site_Unit')}, 에러: {e}")
+        finally:
+            worker.close()
+            print(f"[INFO][W{worker_id}] 크롬 드라이버 종료")
+
+    max_workers = max(1, min(max_workers, len(groups))) if groups else 1
+    print(f"[INFO] 크롤러 워커 {max_workers}개로 수집 시작 (계정 {len(groups)}개, 레코드 {total}건)")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crawler') as executor:
+        for future in [executor.submit(worker_loop, worker_id) for worker_id in range(1, max_workers + 1)]:
+            future.result()
+
+    if not record_queue.empty():
+        print(f"[ERROR] 실행 가능한 워커가 없어 계정 {record_queue.qsize()}개의 레코드가 처리되지 않았습니다.")
+
+    if RETRY_FAILED_AT_END:
+        def emit_retry(idx, date, mode, df):
+            if on_site_day is not None:
+                on_site_day(mode, df)
+            else:
+                results.setdefault(idx, ([], []))[0 if mode == '15m' else 1].append(df)
+
+        retry_failed_site_days(failures, login_url, emit_retry, fixtures=fixtures)
+    failures.report()
+
+    # 워커별 결과를 시트 순서대로 병합
+    dfs_15m = []
+    dfs_30m = []
+    for idx in sorted(results):
+        record_15m, record_30m = results[idx]
+        dfs_15m.extend(record_15m)
+        dfs_30m.extend(record_30m)
+
+    return dfs_15m, dfs_30m
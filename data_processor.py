@@ -1,7 +1,15 @@
 # data_processor.py
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone 
 import utils
+import metrics
+from config import MEASURE_DTYPE
+
+# 병합 결과에서 categorical(코드 배열 + 카테고리)로 보관할 메타데이터 컬럼.
+# site-day 프레임에서는 상수 문자열로 두고 병합 후 한 번에 변환합니다
+# (카테고리가 서로 다른 categorical끼리의 concat은 컬럼마다 카테고리를 다시 맞추느라 오히려 느림)
+CATEGORY_COLUMNS = ['Project', 'Site_Unit', 'Factory', 'Resolution']
 
 def add_metadata(df: pd.DataFrame, project: str, customer: str, factory: str, date: str) -> pd.DataFrame:
     df['Project'] = project
@@ -11,6 +19,7 @@ def add_metadata(df: pd.DataFrame, project: str, customer: str, factory: str, da
     return df
 
 # data_processor.py
+@metrics.timed('data.process_dataframe')
 def process_dataframe(df, mode, project, site_unit, factory, current_date):
     if df.empty:
         raise ValueError("[ERROR] 입력 데이터프레임이 비어 있습니다.")
@@ -48,38 +57,170 @@ def process_dataframe(df, mode, project, site_unit, factory, current_date):
     else:
         raise ValueError(f"[ERROR] 지원되지 않는 모드: {mode}")
 
+    # 15m/30m 데이터를 같은 테이블에서 구분하기 위한 해상도
+    df['Resolution'] = mode
     return df
 
 
+# 15분 → 30분 재계산: 합계 컬럼(사용량/무효전력/CO2)과 최대 컬럼(최대수요)
+RESAMPLE_SUM_COLUMNS = {
+    'Electricity consumption': 'Electricity consumption_30m',
+    'Leading reactive power': 'Leading reactive power_30m',
+    'Lagging reactive power': 'Lagging reactive power_30m',
+    'CO2': 'CO2_30m',
+}
+RESAMPLE_MAX_COLUMNS = {
+    'Peak power': 'Peak power_30m',
+}
+COLUMNS_30M = [
+    'Time', 'Electricity consumption_30m', 'Peak power_30m',
+    'Leading reactive power_30m', 'Lagging reactive power_30m',
+    'CO2_30m', 'Leading power factor_30m', 'Lagging power factor_30m'
+]
+METADATA_COLUMNS = ['Project', 'Site_Unit', 'Factory', 'Date']
+
+
+def _power_factor(active, reactive):
+    """
+    역률(%) = kWh / sqrt(kWh² + kVarh²) × 100. 사용량과 무효전력이 모두 0이면 0으로 둡니다.
+    """
+    apparent = np.hypot(active, reactive)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factor = np.where(apparent > 0, active / apparent * 100, 0.0)
+    return np.round(factor, 2)
+
+
+@metrics.timed('data.resample_15m_to_30m')
+def resample_15m_to_30m(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    process_dataframe(..., '15m') 결과를 30분 단위로 재계산해 process_dataframe(..., '30m')과 같은 형태로 반환합니다.
+    HH:15, HH:30 슬롯은 HH:30으로, HH:45, (HH+1):00 슬롯은 (HH+1):00으로 묶고(슬롯 번호 2k-1, 2k → 2k),
+    사용량/무효전력/CO2는 합계, 최대수요는 최대값, 역률은 합계값으로 다시 계산합니다.
+    15분 슬롯 2개가 모두 있는 30분 구간만 남깁니다(당일 진행 중인 구간 등 제외).
+    """
+    if df.empty:
+        raise ValueError("[ERROR] 입력 데이터프레임이 비어 있습니다.")
+
+    slot = (df['Time'] + 1) // 2 * 2
+
+    keys = [df[column] for column in METADATA_COLUMNS] + [slot.rename('_slot')]
+    grouped = df.groupby(keys, sort=True, dropna=True, observed=True)
+    aggregated = pd.DataFrame({
+        **{target: grouped[source].sum(min_count=2) for source, target in RESAMPLE_SUM_COLUMNS.items()},
+        **{target: grouped[source].max() for source, target in RESAMPLE_MAX_COLUMNS.items()},
+    })
+    counts = grouped.size()
+    complete = counts == 2
+    if not complete.all():
+        print(f"[WARN] 15분 슬롯이 부족한 30분 구간 {int((~complete).sum())}건은 제외합니다.")
+    aggregated = aggregated[complete.to_numpy()].reset_index()
+
+    aggregated['Leading power factor_30m'] = _power_factor(
+        aggregated['Electricity consumption_30m'].to_numpy(dtype='float64'),
+        aggregated['Leading reactive power_30m'].to_numpy(dtype='float64')).astype(MEASURE_DTYPE)
+    aggregated['Lagging power factor_30m'] = _power_factor(
+        aggregated['Electricity consumption_30m'].to_numpy(dtype='float64'),
+        aggregated['Lagging reactive power_30m'].to_numpy(dtype='float64')).astype(MEASURE_DTYPE)
+
+    aggregated['Time'] = aggregated['_slot'].astype('int16')
+    aggregated['Resolution'] = '30m'
+    return aggregated[COLUMNS_30M + METADATA_COLUMNS + ['Resolution']]
+
+
+@metrics.timed('data.compare_30m')
+def compare_30m(derived: pd.DataFrame, crawled: pd.DataFrame, atol=0.01, rtol=0.001) -> pd.DataFrame:
+    """
+    15분 데이터로 재계산한 30분 데이터와 실제 조회한 30분 데이터를 Time 기준으로 비교합니다.
+    Returns:
+        허용 오차를 넘는 셀 목록 (Time('HH:MM'), column, derived, crawled). 한쪽에만 있는 슬롯도 포함됩니다.
+    """
+    value_columns = [column for column in COLUMNS_30M if column != 'Time']
+    joined = derived[['Time'] + value_columns].merge(
+        crawled[['Time'] + value_columns], on='Time', how='outer', suffixes=('_derived', '_crawled')
+    )
+    mismatches = []
+    for column in value_columns:
+        left = pd.to_numeric(joined[f'{column}_derived'], errors='coerce').to_numpy(dtype='float64')
+        right = pd.to_numeric(joined[f'{column}_crawled'], errors='coerce').to_numpy(dtype='float64')
+        close = np.isclose(left, right, atol=atol, rtol=rtol, equal_nan=True)
+        for index in np.flatnonzero(~close):
+            mismatches.append((utils.SLOT_LABELS[joined['Time'].iat[index]], column, left[index], right[index]))
+    return pd.DataFrame(mismatches, columns=['Time', 'column', 'derived', 'crawled'])
+
+
 
+# merge_dataframes 결과 컬럼 순서
+MERGED_COLUMNS = {
+    '15m': [
+        'Date', 'Time', 'DateTime',
+        'Electricity consumption', 'Peak power',
+        'Leading reactive power', 'Lagging reactive power',
+        'CO2', 'Leading power factor', 'Lagging power factor',
+        'Project', 'Site_Unit', 'Factory', 'Resolution'
+    ],
+    '30m': [
+        'Date', 'Time', 'DateTime',
+        'Electricity consumption_30m', 'Peak power_30m',
+        'Leading reactive power_30m', 'Lagging reactive power_30m',
+        'CO2_30m', 'Leading power factor_30m', 'Lagging power factor_30m',
+        'Project', 'Site_Unit', 'Factory', 'Resolution'
+    ],
+}
+
+
+@metrics.timed('data.merge_dataframes')
 def merge_dataframes(dfs, mode):
     merged_df = pd.concat(dfs, ignore_index=True)
-    merged_df['DateTime'] = merged_df.apply(utils.fix_datetime, axis=1)
-    merged_df['DateTime'] = pd.to_datetime(merged_df['DateTime'])
+    for column in CATEGORY_COLUMNS:
+        if column in merged_df.columns:
+            merged_df[column] = merged_df[column].astype('category')
+    merged_df['DateTime'] = utils.build_datetime(merged_df['Date'], merged_df['Time'])
+
+    return merged_df[MERGED_COLUMNS['30m' if mode == '30m' else '15m']]
+
+
+BIGQUERY_COLUMNS = [
+    'measure_time', 'measure_point', 'measure_value', 'measure_unit',
+    'country', 'source_name',
+    'business_unit', 'site_unit', 'factory', 'resolution',
+    'insertion_time'
+]
+
+
+def _tiled_categorical(series: pd.Series, repeats: int) -> pd.Categorical:
+    """
+    wide 컬럼을 categorical로 바꾼 뒤 코드만 repeats번 이어붙여 long 포맷 컬럼을 만듭니다.
+    """
+    categorical = series.astype('category')
+    return pd.Categorical.from_codes(np.tile(categorical.cat.codes.to_numpy(), repeats), categories=categorical.cat.categories)
 
-    if mode == '30m':
-        column_order = [
-            'Date', 'Time', 'DateTime', 
-            'Electricity consumption_30m', 'Peak power_30m',
-            'Leading reactive power_30m', 'Lagging reactive power_30m',
-            'CO2_30m', 'Leading power factor_30m', 'Lagging power factor_30m',
-            'Project', 'Site_Unit', 'Factory'
-        ]
-    else:
-        column_order = [
-            'Date', 'Time', 'DateTime', 
-            'Electricity consumption', 'Peak power', 
-            'Leading reactive power', 'Lagging reactive power',
-            'CO2', 'Leading power factor', 'Lagging power factor',
-            'Project', 'Site_Unit', 'Factory'
-        ]
 
-    return merged_df[column_order]
+def _constant_categorical(value: str, length: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(np.zeros(length, dtype='int8'), categories=[value])
 
 
+def _widen_measures(values: np.ndarray) -> np.ndarray:
+    """
+    측정값을 float64로 넓힙니다. float32 값은 그대로 넓히면 12345.67 → 12345.669921875처럼 꼬리가 생기므로
+    유효숫자 7자리로 반올림하고, 반올림한 값이 원래 float32 값으로 돌아가지 않을 때만 넓힌 값을 그대로 씁니다.
+    """
+    wide = values.astype('float64')
+    if values.dtype != np.float32:
+        return wide
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponent = np.floor(np.log10(np.abs(wide)))
+        scale = 10.0 ** (6 - np.where(np.isfinite(exponent), exponent, 0))
+        rounded = np.round(wide * scale) / scale
+    return np.where(rounded.astype('float32') == values, rounded, wide)
+
+
+@metrics.timed('data.transform_for_bigquery')
 def transform_for_bigquery(df: pd.DataFrame, mode: str) -> pd.DataFrame:
     """
     Wide format → Long format with units for BigQuery
+
+    melt/apply 대신 측정 컬럼 순서대로 값을 이어붙이고, 항목/단위/메타데이터는
+    categorical(사전 인코딩) 코드 배열로 만들어 복사와 문자열 객체 생성을 최소화합니다.
     """
     if mode == '30m':
         value_columns = {
@@ -103,69 +244,53 @@ def transform_for_bigquery(df: pd.DataFrame, mode: str) -> pd.DataFrame:
             'Lagging power factor': ('Lagging power factor', '%')
         }
 
-    id_vars = ['DateTime', 'Project', 'Site_Unit', 'Factory']
-    
-    # DataFrame의 복사본으로 작업하여 SettingWithCopyWarning 방지
-    temp_df = df.copy() 
-    
-    melted = temp_df.melt(
-        id_vars=id_vars,
-        value_vars=[col for col in value_columns.keys() if col in temp_df.columns], # 존재하는 컬럼만 melt
-        var_name='original_column',
-        value_name='measure_value'
-    )
-    
-    # melt 결과가 비어있으면 빈 DataFrame 반환
-    if melted.empty:
+    # 존재하는 컬럼만 변환
+    present_columns = [col for col in value_columns if col in df.columns]
+
+    # 변환 결과가 비어있으면 빈 DataFrame 반환
+    if df.empty or not present_columns:
         print("[WARN] BigQuery 변환 결과, 데이터가 비어있습니다.")
-        return pd.DataFrame(columns=[
-            'measure_time', 'measure_point', 'measure_value', 'measure_unit',
-            'country', 'source_name', 'business_unit', 'site_unit', 'factory',
-            'insertion_time'
-        ])
+        return pd.DataFrame(columns=BIGQUERY_COLUMNS)
+
+    row_count = len(df)
+    column_count = len(present_columns)
+    total = row_count * column_count
 
-    # measure_point, measure_unit 매핑 적용
-    melted['measure_point'] = melted['original_column'].apply(lambda x: value_columns[x][0])
-    melted['measure_unit'] = melted['original_column'].apply(lambda x: value_columns[x][1])
+    # measure_point, measure_unit: 측정 컬럼별 코드를 행 수만큼 반복 (melt 결과와 같은 컬럼 우선 순서)
+    points = [value_columns[col][0] for col in present_columns]
+    units = [value_columns[col][1] for col in present_columns]
+    unit_categories = list(dict.fromkeys(units))
+    point_codes = np.repeat(np.arange(column_count, dtype='int8'), row_count)
+    unit_codes = np.repeat(np.array([unit_categories.index(unit) for unit in units], dtype='int8'), row_count)
 
-    melted['measure_value'] = pd.to_numeric(melted['measure_value'], errors='coerce')
+    measure_value = np.concatenate([
+        _widen_measures(pd.to_numeric(df[col], errors='coerce').to_numpy()) for col in present_columns
+    ])
 
-    # 데이터 타입 변환 및 정리
     # 'DateTime' 컬럼이 문자열인 경우 datetime 객체로 변환
-    try:
-        melted['measure_time'] = pd.to_datetime(melted['DateTime'], format='%Y-%m-%d %H:%M')
-    except:
-        # 만약 형식이 다를 경우, pandas가 자동으로 추론하도록 시도
-        melted['measure_time'] = pd.to_datetime(melted['DateTime'], errors='coerce') 
-
-    # 기타 메타데이터 추가
-    melted['country'] = 'South Korea'
-    melted['source_name'] = 'kepco_power_planner_rpa'
-    melted['business_unit'] = melted['Project']
-    melted['site_unit'] = melted['Site_Unit']
-    melted['factory'] = melted['Factory']
-    # 삽입 시간은 UTC로 명시
-    melted['insertion_time'] = datetime.now(timezone.utc) 
-
-    # 최종 컬럼 순서
-    final_cols = [
-        'measure_time', 'measure_point', 'measure_value', 'measure_unit',
-        'country', 'source_name',
-        'business_unit', 'site_unit', 'factory',
-        'insertion_time'
-    ]
-
-    result = melted[final_cols]
-    
+    measure_time = df['DateTime']
+    if not pd.api.types.is_datetime64_any_dtype(measure_time):
+        try:
+            measure_time = pd.to_datetime(measure_time, format='%Y-%m-%d %H:%M')
+        except (ValueError, TypeError):
+            # 만약 형식이 다를 경우, pandas가 자동으로 추론하도록 시도
+            measure_time = pd.to_datetime(measure_time, errors='coerce')
+
+    result = pd.DataFrame({
+        'measure_time': np.tile(measure_time.to_numpy(), column_count),
+        'measure_point': pd.Categorical.from_codes(point_codes, categories=points),
+        'measure_value': measure_value,
+        'measure_unit': pd.Categorical.from_codes(unit_codes, categories=unit_categories),
+        'country': _constant_categorical('South Korea', total),
+        'source_name': _constant_categorical('kepco_power_planner_rpa', total),
+        'business_unit': _tiled_categorical(df['Project'], column_count),
+        'site_unit': _tiled_categorical(df['Site_Unit'], column_count),
+        'factory': _tiled_categorical(df['Factory'], column_count),
+        'resolution': (_tiled_categorical(df['Resolution'], column_count) if 'Resolution' in df.columns
+                       else _constant_categorical(mode, total)),
+        # 삽입 시간은 UTC로 명시
+        'insertion_time': datetime.now(timezone.utc),
+    }, columns=BIGQUERY_COLUMNS)
+
     print(f"[SUCCESS] BigQuery 변환 완료: {len(result)}행 x {len(result.columns)}열")
-    print(f"[DEBUG] 최종 컬럼: {list(result.columns)}")
-    
-    # 샘플 데이터 출력
-    if not result.empty:
-        print("\n[SAMPLE] 변환된 데이터 샘플 (처음 5행):")
-        print(result.head(5).to_string())
-        
-        print(f"\n[STATS] 측정항목별 데이터 수:")
-        print(result['measure_point'].value_counts().to_string())
-
-    return result
\ No newline at end of file
+    return result
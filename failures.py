@@ -0,0 +1,217 @@
+# failures.py
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from config import (ARTIFACT_DIR, ARTIFACT_MAX_FILES, ARTIFACT_MAX_MB,
+                    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SEC)
+
+
+class ArtifactStore:
+    """
+    스크린샷 등 실패 분석용 파일을 개수/용량 상한 안에서 보관합니다. 상한을 넘으면 오래된 파일부터 삭제합니다.
+    실패 내역은 failures.jsonl에 한 줄씩 기록하며, 이 파일도 상한의 1/4을 넘으면 한 번 회전합니다.
+    """
+    LOG_NAME = 'failures.jsonl'
+
+    def __init__(self, directory, max_files=100, max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _artifacts(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.LOG_NAME):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def _enforce_limits(self):
+        entries = self._artifacts()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_files or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def save(self, label, data: bytes, extension):
+        """
+        파일 1개를 저장하고 경로를 반환합니다. 단일 파일이 용량 상한보다 크면 저장하지 않습니다.
+        """
+        if len(data) > self.max_bytes:
+            print(f"[WARN] 아티팩트가 용량 상한보다 커서 저장하지 않습니다: {label} ({len(data)} bytes)")
+            return None
+        safe_label = re.sub(r'[^\w.-]+', '_', label).strip('_')
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{safe_label}.{extension}"
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            with open(path, 'wb') as f:
+                f.write(data)
+            self._enforce_limits()
+        return path
+
+    def save_screenshot(self, driver, label):
+        """
+        드라이버 화면을 PNG로 저장합니다. 스크린샷 실패가 원래 오류를 가리지 않도록 예외를 삼킵니다.
+        """
+        try:
+            return self.save(label, driver.get_screenshot_as_png(), 'png')
+        except Exception as e:
+            print(f"[WARN] 스크린샷 저장 실패: {e}")
+            return None
+
+    def log_failure(self, record):
+        path = os.path.join(self.directory, self.LOG_NAME)
+        line = json.dumps({'logged_at': datetime.now(timezone.utc).isoformat(), **record},
+                          ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            try:
+                if os.path.exists(path) and os.path.getsize(path) + len(line) > self.max_bytes // 4:
+                    os.replace(path, path + '.1')
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"[WARN] 실패 내역 기록 실패: {e}")
+
+
+_artifact_store = None
+_artifact_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """
+    설정(ARTIFACT_DIR)으로 만든 프로세스 공용 ArtifactStore. 경로가 비어 있으면 None.
+    """
+    global _artifact_store
+    if not ARTIFACT_DIR:
+        return None
+    with _artifact_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore(ARTIFACT_DIR, max_files=ARTIFACT_MAX_FILES,
+                                            max_bytes=int(ARTIFACT_MAX_MB * 1024 * 1024))
+        return _artifact_store
+
+
+class CircuitBreaker:
+    """
+    계정별 차단기. 연속 실패가 failure_threshold회에 도달하면 cooldown_sec 동안 해당 계정 작업을 보내지 않고(open),
+    쿨다운이 지나면 시험 작업 1건만 허용합니다(half-open). 시험이 성공하면 다시 닫힙니다.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown_sec=CIRCUIT_COOLDOWN_SEC):
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self._failures = {}
+        self._opened_at = {}
+        self._trial = set()
+        self._lock = threading.Lock()
+
+    def allow(self, account):
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            opened_at = self._opened_at.get(account)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.cooldown_sec or account in self._trial:
+                return False
+            self._trial.add(account)
+            print(f"[INFO] 차단기 half-open: 계정 {account} 시험 조회")
+            return True
+
+    def is_open(self, account):
+        with self._lock:
+            return account in self._opened_at
+
+    def record_success(self, account):
+        with self._lock:
+            if account in self._opened_at:
+                print(f"[INFO] 차단기 닫힘: 계정 {account}")
+            self._failures.pop(account, None)
+            self._opened_at.pop(account, None)
+            self._trial.discard(account)
+
+    def record_failure(self, account):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures[account] = self._failures.get(account, 0) + 1
+            self._trial.discard(account)
+            if self._failures[account] >= self.failure_threshold:
+                if account not in self._opened_at:
+                    print(f"[WARN] 차단기 열림: 계정 {account} 연속 실패 {self._failures[account]}회, "
+                          f"{self.cooldown_sec:.0f}초 동안 조회 중단")
+                self._opened_at[account] = time.monotonic()
+
+
+FailedSiteDay = namedtuple('FailedSiteDay', ['record_index', 'row', 'date', 'need_15m', 'need_30m', 'reason'])
+
+
+class FailureTracker:
+    """
+    실패/보류된 site-day를 모아 두었다가 실행 끝에 새 세션으로 재시도할 수 있게 합니다.
+    need_15m/need_30m은 실패 시점까지 넘기지 못한 모드이므로, 재시도 시 이미 넘긴 데이터를 다시 적재하지 않습니다.
+    """
+
+    def __init__(self, breaker=None, artifacts=None):
+        self.breaker = breaker or CircuitBreaker()
+        self.artifacts = artifacts
+        self._items = []
+        self._given_up = []
+        self._lock = threading.Lock()
+
+    def add(self, record_index, row, date, need_15m, need_30m, reason, error=None):
+        item = FailedSiteDay(record_index, row, date, need_15m, need_30m, reason)
+        with self._lock:
+            self._items.append(item)
+        self._log(item, 'deferred', error)
+
+    def give_up(self, item, reason, error=None):
+        with self._lock:
+            self._given_up.append(item._replace(reason=reason))
+        self._log(item._replace(reason=reason), 'given_up', error)
+
+    def drain(self):
+        with self._lock:
+            items, self._items = self._items, []
+        return items
+
+    def _log(self, item, status, error):
+        if self.artifacts is None:
+            return
+        self.artifacts.log_failure({
+            'status': status,
+            'site_unit': item.row.get('Site_Unit'),
+            'factory': item.row.get('Factory', ''),
+            'account': item.row.get('ID'),
+            'date': item.date,
+            'modes': [mode for mode, needed in (('15m', item.need_15m), ('30m', item.need_30m)) if needed],
+            'reason': item.reason,
+            'error': f"{type(error).__name__}: {error}" if error is not None else None,
+        })
+
+    def report(self):
+        with self._lock:
+            given_up = list(self._given_up)
+            pending = len(self._items)
+        if given_up or pending:
+            print(f"[SUMMARY] 최종 실패 site-day {len(given_up)}건 (체크포인트 미기록 → 다음 실행에서 재수집)")
+            for item in given_up[:20]:
+                print(f"    Site_Unit={item.row.get('Site_Unit')}, Factory={item.row.get('Factory', '')}, "
+                      f"날짜 {item.date}: {item.reason}")
+        return given_up
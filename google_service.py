@@ -1,57 +1,177 @@
 # google_service.py
+import hashlib
 import io
+import os
+import threading
+import time
+import uuid
 import pandas as pd
 from googleapiclient.discovery import build
+from googleapiclient.discovery_cache.base import Cache
+from googleapiclient.errors import UnknownApiNameOrVersion
 from googleapiclient.http import MediaFileUpload
 import google.auth
 from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
 from google.auth.transport.requests import Request 
 from google.cloud import secretmanager
 from google.cloud import firestore
 from itertools import zip_longest
 import json
 # 기존 config에서 필요한 값들만 임포트
-from config import SCOPES, SHEET_ID, SHEET_RANGE
+from config import SCOPES, SHEET_ID, SHEET_RANGE, DISCOVERY_CACHE_DIR
+import metrics
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
-def get_credentials():
+# 프로세스 전역 자격 증명/클라이언트 캐시
+_credentials_cache = {}
+_clients = {}
+_registry_lock = threading.Lock()
+# discovery 기반 클라이언트(httplib2)는 스레드 안전하지 않으므로 스레드별로 보관
+_thread_local = threading.local()
+
+
+def get_credentials(scopes=SCOPES):
     """
     Cloud Run 환경에서 서비스 계정 자격 증명을 로드합니다 (ADC 사용).
     Google Sheets, Drive 등에 접근하기 위해 필요한 SCOPES를 지정합니다.
+    scopes별로 한 번만 로드해 재사용하며, 토큰이 만료된 경우에만 갱신합니다.
     """
+    key = tuple(scopes) if scopes else None
     try:
-        # ADC(Application Default Credentials)를 사용하여 Cloud Run 서비스 계정의
-        # 자격 증명을 자동으로 로드합니다.
-        creds, project = google.auth.default(scopes=SCOPES)
-        
-        # 만료되었을 경우 갱신을 시도합니다. (대부분 자동으로 처리되지만, 안전을 위해 유지)
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            
+        with _registry_lock:
+            creds = _credentials_cache.get(key)
+            if creds is None:
+                # ADC(Application Default Credentials)를 사용하여 Cloud Run 서비스 계정의
+                # 자격 증명을 자동으로 로드합니다.
+                creds, project = google.auth.default(scopes=scopes)
+                _credentials_cache[key] = creds
+
+            # 만료되었을 경우에만 갱신합니다. (대부분 자동으로 처리되지만, 안전을 위해 유지)
+            if creds and creds.expired:
+                creds.refresh(Request())
+
         return creds
         
     except Exception as e:
         # 클라우드런 배포 후, 이 오류가 발생하면 서비스 계정 권한(IAM) 설정을 확인해야 합니다.
         print(f"[ERROR] 인증 정보 로드 실패. Cloud Run 서비스 계정 권한(IAM)을 확인하세요: {e}")
         raise e
-    
+
+
+class FileDiscoveryCache(Cache):
+    """
+    discovery 문서를 디스크에 저장하는 캐시. 라이브러리에 포함된 정적 문서가 없는 API에만 사용됩니다.
+    """
+
+    def __init__(self, directory, max_age=86400):
+        self.directory = directory
+        self.max_age = max_age
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url):
+        path = self._path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, url, content):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(url)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(url))
+        except OSError as e:
+            print(f"[WARN] discovery 문서 캐시 저장 실패: {e}")
+
+
+_discovery_cache = FileDiscoveryCache(DISCOVERY_CACHE_DIR)
+
+
+def get_discovery_service(service_name, version):
+    """
+    Sheets/Drive 등 discovery 기반 클라이언트를 스레드별로 한 번만 생성해 재사용합니다.
+    """
+    services = getattr(_thread_local, 'services', None)
+    if services is None:
+        services = _thread_local.services = {}
+
+    key = (service_name, version)
+    if key not in services:
+        creds = get_credentials()
+        try:
+            # 라이브러리에 포함된 정적 discovery 문서 사용 (네트워크 요청 없음)
+            services[key] = build(service_name, version, credentials=creds, static_discovery=True)
+        except UnknownApiNameOrVersion:
+            services[key] = build(service_name, version, credentials=creds,
+                                  static_discovery=False, cache=_discovery_cache)
+    return services[key]
+
+
+def _get_client(key, factory):
+    """
+    스레드 안전한 클라이언트(BigQuery, Firestore, Secret Manager)를 프로세스당 한 번만 생성합니다.
+    """
+    with _registry_lock:
+        client = _clients.get(key)
+    if client is not None:
+        return client
+
+    client = factory()
+    with _registry_lock:
+        # 동시에 생성된 경우 먼저 등록된 클라이언트를 사용
+        return _clients.setdefault(key, client)
+
+
+def get_bigquery_client(project_id):
+    def factory():
+        credentials = get_credentials(scopes=None)
+        return bigquery.Client(credentials=credentials, project=project_id)
+    return _get_client(('bigquery', project_id), factory)
+
+
+def get_firestore_client():
+    return _get_client(('firestore',), firestore.Client)
+
+
+def get_secretmanager_client():
+    return _get_client(('secretmanager',), secretmanager.SecretManagerServiceClient)
+
+
+def reset_clients():
+    """
+    캐시된 자격 증명과 클라이언트를 모두 버립니다. (프로세스 fork 이후 등)
+    """
+    with _registry_lock:
+        _credentials_cache.clear()
+        _clients.clear()
+        _ensured_tables.clear()
+    _thread_local.services = {}
 
 
 # Get data from firestore  
+@metrics.timed('gcp.get_firestore_data')
 def get_firestore_data(collection_name):
 
-    firestore_client = firestore.Client()
+    firestore_client = get_firestore_client()
     collection_ref = firestore_client.collection(collection_name)
     firestore_data = collection_ref.get()
-    firestore_client.close()
     return firestore_data
 
 
 # Get data from secretmanager  
+@metrics.timed('gcp.get_secretmanager_data')
 def get_secretmanager_data(secret_name):
     
-    secret_client = secretmanager.SecretManagerServiceClient()
+    secret_client = get_secretmanager_client()
     
     response = secret_client.access_secret_version(request={"name": secret_name})
     payload = response.payload.data.decode("UTF-8")
@@ -60,12 +180,12 @@ def get_secretmanager_data(secret_name):
 
 
 
+@metrics.timed('gcp.read_google_sheet')
 def read_google_sheet() -> list[dict]:
     """
     Google Sheet에서 데이터를 읽어와 리스트로 반환
     """
-    creds = get_credentials()
-    service = build('sheets', 'v4', credentials=creds)
+    service = get_discovery_service('sheets', 'v4')
     sheet = service.spreadsheets() # type: ignore
 
     result = sheet.values().get(
@@ -92,19 +212,27 @@ def read_google_sheet() -> list[dict]:
     return data
 
 
-def upload_to_drive(file_path, file_name, folder_id): 
-    creds = get_credentials()
-    drive_service = build('drive', 'v3', credentials=creds)
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+GOOGLE_SHEET_MIMETYPE = 'application/vnd.google-apps.spreadsheet'
+
+
+@metrics.timed('gcp.upload_to_drive')
+def upload_to_drive(file_path, file_name, folder_id, mimetype=XLSX_MIMETYPE, convert_to=GOOGLE_SHEET_MIMETYPE): 
+    """
+    파일을 Drive 폴더에 업로드합니다. convert_to가 None이면 변환 없이 원본 형식 그대로 저장합니다.
+    """
+    drive_service = get_discovery_service('drive', 'v3')
 
     file_metadata = {
         'name': file_name,
-        'mimeType': 'application/vnd.google-apps.spreadsheet',
         'parents': [folder_id]  # [변경점] 전달받은 folder_id 사용
     }
+    if convert_to:
+        file_metadata['mimeType'] = convert_to
 
     media = MediaFileUpload(
         file_path,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        mimetype=mimetype,
         resumable=True
     )
 
@@ -118,20 +246,229 @@ def upload_to_drive(file_path, file_name, folder_id):
     return uploaded.get('id')
 
 
-def upload_to_bigquery(df: pd.DataFrame, full_table_id: str, write_disposition: str = 'WRITE_APPEND') -> None:
+# transform_for_bigquery 결과(long 포맷)의 관리 스키마
+# measure_time은 KST 기준 벽시계 시각(타임존 없음)이므로 DATETIME, insertion_time은 UTC TIMESTAMP
+BIGQUERY_SCHEMA = [
+    bigquery.SchemaField('measure_time', 'DATETIME'),
+    bigquery.SchemaField('measure_point', 'STRING'),
+    bigquery.SchemaField('measure_value', 'FLOAT'),
+    bigquery.SchemaField('measure_unit', 'STRING'),
+    bigquery.SchemaField('country', 'STRING'),
+    bigquery.SchemaField('source_name', 'STRING'),
+    bigquery.SchemaField('business_unit', 'STRING'),
+    bigquery.SchemaField('site_unit', 'STRING'),
+    bigquery.SchemaField('factory', 'STRING'),
+    bigquery.SchemaField('resolution', 'STRING', description='측정 해상도 (15m / 30m)'),
+    bigquery.SchemaField('insertion_time', 'TIMESTAMP'),
+]
+BIGQUERY_PARTITION_FIELD = 'measure_time'
+BIGQUERY_CLUSTERING_FIELDS = ['resolution', 'site_unit', 'measure_point']
+
+# 같은 프로세스에서 이미 생성/검증한 테이블 → 적재에 사용할 스키마
+_ensured_tables = {}
+# 테이블별 잠금: 스키마 검증/갱신(etag 경합)과 staging + MERGE(같은 파티션 갱신)만 테이블 단위로 직렬화
+_table_locks = {}
+
+
+def _table_lock(full_table_id):
+    with _registry_lock:
+        return _table_locks.setdefault(full_table_id, threading.RLock())
+
+# Parquet timestamp는 두 타입 모두로 적재 가능하므로 기존 테이블 타입을 그대로 따름
+_COMPATIBLE_TIME_TYPES = {'DATETIME', 'TIMESTAMP'}
+
+
+def _normalize_field_type(field_type):
+    return {'FLOAT64': 'FLOAT', 'INT64': 'INTEGER', 'BOOL': 'BOOLEAN'}.get(field_type, field_type)
+
+
+def _is_compatible_type(existing_type, expected_type):
+    existing_type = _normalize_field_type(existing_type)
+    expected_type = _normalize_field_type(expected_type)
+    return existing_type == expected_type or {existing_type, expected_type} <= _COMPATIBLE_TIME_TYPES
+
+
+@metrics.timed('gcp.ensure_bigquery_table')
+def ensure_bigquery_table(client, full_table_id: str):
+    """
+    첫 적재 전에 테이블을 관리 스키마로 생성하거나, 기존 테이블의 스키마/파티션/클러스터링을 검증합니다.
+    - 테이블이 없으면 measure_time 일 단위 파티션 + site_unit/measure_point 클러스터링으로 생성
+    - 누락된 컬럼은 추가하고 클러스터링 설정이 다르면 갱신
+    - 컬럼 타입이 다르면 적재 전에 오류 발생 (스키마 drift 방지)
+    Returns:
+        적재 job에 사용할 스키마
+    """
+    # 15분/30분 sink가 같은 테이블을 동시에 검증하면 update_table이 같은 etag로 두 번 호출되어 412가 나므로 테이블 단위로 잠금
+    with _table_lock(full_table_id):
+        with _registry_lock:
+            if full_table_id in _ensured_tables:
+                return _ensured_tables[full_table_id]
+        return _ensure_bigquery_table(client, full_table_id)
+
+
+def _ensure_bigquery_table(client, full_table_id):
+    load_schema = BIGQUERY_SCHEMA
+
+    try:
+        table = client.get_table(full_table_id)
+    except NotFound:
+        table = bigquery.Table(full_table_id, schema=BIGQUERY_SCHEMA)
+        table.time_partitioning = bigquery.TimePartitioning(
+            type_=bigquery.TimePartitioningType.DAY,
+            field=BIGQUERY_PARTITION_FIELD
+        )
+        table.clustering_fields = BIGQUERY_CLUSTERING_FIELDS
+        client.create_table(table, exists_ok=True)
+        print(f"[INFO] BigQuery 테이블 생성: {full_table_id} (파티션: {BIGQUERY_PARTITION_FIELD}, 클러스터링: {BIGQUERY_CLUSTERING_FIELDS})")
+    else:
+        existing = {field.name: field for field in table.schema}
+        mismatched = [
+            f"{field.name}({existing[field.name].field_type} != {field.field_type})"
+            for field in BIGQUERY_SCHEMA
+            if field.name in existing and not _is_compatible_type(existing[field.name].field_type, field.field_type)
+        ]
+        if mismatched:
+            raise ValueError(f"[ERROR] BigQuery 테이블 스키마 불일치: {full_table_id}, {', '.join(mismatched)}")
+
+        updates = []
+        missing = [field for field in BIGQUERY_SCHEMA if field.name not in existing]
+        if missing:
+            table.schema = list(table.schema) + missing
+            updates.append('schema')
+        if table.clustering_fields != BIGQUERY_CLUSTERING_FIELDS:
+            table.clustering_fields = BIGQUERY_CLUSTERING_FIELDS
+            updates.append('clustering_fields')
+        if updates:
+            client.update_table(table, updates)
+            print(f"[INFO] BigQuery 테이블 갱신: {full_table_id} ({', '.join(updates)})")
+
+        load_schema = [
+            bigquery.SchemaField(field.name, existing[field.name].field_type) if field.name in existing else field
+            for field in BIGQUERY_SCHEMA
+        ]
+
+        partitioning = table.time_partitioning
+        if partitioning is None or partitioning.field != BIGQUERY_PARTITION_FIELD:
+            # 기존 테이블의 파티션 설정은 변경할 수 없으므로 경고만 남김 (CREATE TABLE ... AS SELECT로 이관 필요)
+            print(f"[WARN] {full_table_id}는 {BIGQUERY_PARTITION_FIELD} 파티션 테이블이 아닙니다. 쿼리 시 파티션 pruning이 적용되지 않습니다.")
+
+    with _registry_lock:
+        _ensured_tables[full_table_id] = load_schema
+    return load_schema
+
+
+# upsert 시 같은 측정값으로 보는 키
+BIGQUERY_MERGE_KEYS = ['measure_time', 'measure_point', 'site_unit', 'factory', 'resolution']
+
+
+def _build_merge_query(full_table_id, staging_table_id, columns, time_type):
+    keys = BIGQUERY_MERGE_KEYS
+    # 해시 조인이 가능하도록 OR 없이 등호로만 비교하고, 문자열 키는 NULL을 ''와 같게 취급
+    on_clause = " AND ".join(
+        f"T.{k} = S.{k}" if k == 'measure_time' else f"IFNULL(T.{k}, '') = IFNULL(S.{k}, '')"
+        for k in keys
+    )
+    update_columns = [c for c in columns if c not in keys]
+    update_clause = ", ".join(f"{c} = S.{c}" for c in update_columns)
+    column_list = ", ".join(columns)
+    value_list = ", ".join(f"S.{c}" for c in columns)
+    partition_keys = ", ".join(keys)
+    return f"""
+        MERGE `{full_table_id}` T
+        USING (
+            SELECT * EXCEPT (_rn) FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY {partition_keys} ORDER BY insertion_time DESC) AS _rn
+                FROM `{staging_table_id}`
+            )
+            WHERE _rn = 1
+        ) S
+        ON T.measure_time BETWEEN CAST(@min_time AS {time_type}) AND CAST(@max_time AS {time_type})
+            AND {on_clause}
+        WHEN MATCHED THEN
+            UPDATE SET {update_clause}
+        WHEN NOT MATCHED THEN
+            INSERT ({column_list}) VALUES ({value_list})
+    """
+
+
+@metrics.timed('gcp.upsert_to_bigquery')
+def upsert_to_bigquery(df: pd.DataFrame, full_table_id: str) -> None:
+    """
+    staging 테이블에 적재한 뒤 MERGE로 대상 테이블에 반영합니다.
+    BIGQUERY_MERGE_KEYS가 같은 행은 갱신되고 새로운 행만 추가되므로, 같은 기간을 다시 수집해도 중복이 생기지 않습니다.
+    """
+    missing_keys = [k for k in BIGQUERY_MERGE_KEYS if k not in df.columns]
+    if missing_keys:
+        raise ValueError(f"[ERROR] upsert 키 컬럼 누락: {missing_keys}")
+    if df.empty:
+        print(f"[INFO] BigQuery upsert 대상이 없습니다: {full_table_id}")
+        return
+
+    # 같은 날짜 파티션을 건드리는 MERGE가 동시에 실행되지 않도록 테이블 단위로 직렬화
+    with _table_lock(full_table_id):
+        project_id = full_table_id.split('.')[0]
+        client = get_bigquery_client(project_id)
+        load_schema = ensure_bigquery_table(client, full_table_id)
+
+        # 대상 테이블과 같은 데이터셋에 하루 뒤 자동 삭제되는 staging 테이블 생성
+        staging_table_id = f"{full_table_id}__staging_{uuid.uuid4().hex[:12]}"
+        staging_table = bigquery.Table(staging_table_id, schema=load_schema)
+        staging_table.expires = datetime.now(timezone.utc) + timedelta(days=1)
+        client.create_table(staging_table)
+
+        try:
+            job_config = bigquery.LoadJobConfig(
+                write_disposition='WRITE_TRUNCATE',
+                source_format=bigquery.SourceFormat.PARQUET,
+                schema=load_schema,
+                autodetect=False
+            )
+            buffer = io.BytesIO()
+            df.to_parquet(buffer, index=False, allow_truncated_timestamps=True, coerce_timestamps='us')
+            buffer.seek(0)
+
+            print(f"[INFO] BigQuery staging 적재 시작: {staging_table_id}")
+            client.load_table_from_file(buffer, staging_table_id, job_config=job_config).result()
+
+            time_type = next(field.field_type for field in load_schema if field.name == 'measure_time')
+            query = _build_merge_query(full_table_id, staging_table_id, [field.name for field in load_schema], time_type)
+            query_config = bigquery.QueryJobConfig(query_parameters=[
+                bigquery.ScalarQueryParameter('min_time', 'STRING', df['measure_time'].min().strftime('%Y-%m-%d %H:%M:%S')),
+                bigquery.ScalarQueryParameter('max_time', 'STRING', df['measure_time'].max().strftime('%Y-%m-%d %H:%M:%S')),
+            ])
+            job = client.query(query, job_config=query_config)
+            job.result()
+            print(f"[SUCCESS] {full_table_id} upsert 완료: {len(df)}행 중 {job.num_dml_affected_rows}행 반영")
+        finally:
+            client.delete_table(staging_table_id, not_found_ok=True)
+
+
+@metrics.timed('gcp.upload_to_bigquery')
+def upload_to_bigquery(df: pd.DataFrame, full_table_id: str, write_disposition: str = 'WRITE_APPEND',
+                       load_mode: str = 'append') -> None:
     """
     Args:
         full_table_id (str): "프로젝트ID.데이터셋ID.테이블ID" 형태의 전체 경로
+        load_mode (str): 'append'(write_disposition으로 바로 적재) 또는 'upsert'(staging + MERGE)
     """
     try:
+        if load_mode == 'upsert':
+            upsert_to_bigquery(df, full_table_id)
+            return
+        if load_mode != 'append':
+            raise ValueError(f"[ERROR] 지원되지 않는 적재 모드: {load_mode}")
+
+        # append 적재 job은 동시에 실행해도 되므로 잠그지 않음 (스키마 검증만 ensure_bigquery_table에서 직렬화)
         project_id = full_table_id.split('.')[0]
-        credentials, _ = google.auth.default()
-        client = bigquery.Client(credentials=credentials, project=project_id)
+        client = get_bigquery_client(project_id)
+        load_schema = ensure_bigquery_table(client, full_table_id)
 
+        # 스키마 추론(autodetect) 대신 관리 스키마로 적재
         job_config = bigquery.LoadJobConfig(
             write_disposition=write_disposition,
             source_format=bigquery.SourceFormat.PARQUET,
-            autodetect=True 
+            schema=load_schema,
+            autodetect=False
         )
 
         # 4. DataFrame을 메모리에서 Parquet로 변환
@@ -147,7 +484,6 @@ def upload_to_bigquery(df: pd.DataFrame, full_table_id: str, write_disposition:
         # 6. 결과 확인
         table = client.get_table(full_table_id)
         print(f"[SUCCESS] {full_table_id}에 {job.output_rows}행 업로드 완료. (총 {table.num_rows}행)")
-        
     except Exception as e:
         print(f"[ERROR] BigQuery 업로드 실패: {e}")
         raise
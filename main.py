@@ -1,16 +1,49 @@
 #main.py
-from selenium import webdriver
-from web_crawler import WebCrawler
-import data_processor
 from config import *
 import utils
 from datetime import datetime
-import os
-from googleapiclient.errors import HttpError
-import time 
-from selenium.common.exceptions import TimeoutException
-from webdriver_initializer import initialize_chrome_driver
+from crawler_pool import run_crawl_pool
+from scheduler import run_scheduled_crawl
+from checkpoint import open_checkpoint_store
+from replay import open_fixture_store
+from streaming_uploader import StreamingUploader
+from accumulator import FrameAccumulator
+from pipeline import PostCrawlPipeline, FileDriveSink, ShardOutputSink, BigQuerySink
+from shard import current_shard, select_shard, shard_label, run_directory, write_manifest, try_reduce
 import google_service as gcp 
+import metrics
+
+
+def build_file_sinks(folder_id, current_time, shard=None):
+    """
+    Drive로 내보낼 파일 sink 목록. 전체 데이터는 OUTPUT_FORMAT(기본 Parquet)으로,
+    EXCEL_SUMMARY가 켜져 있으면 site-day 요약 엑셀을 추가로 업로드합니다.
+    여러 task로 샤딩 중이고 SHARD_OUTPUT_DIR이 있으면 전체 데이터는 공유 경로에 샤드 파일로 기록하고
+    (reduce 단계가 병합해 업로드), 없으면 파일 이름에 샤드 번호를 붙여 샤드마다 업로드합니다.
+    """
+    sharded = shard is not None and shard.count > 1
+    if sharded:
+        current_time = f"{current_time}_{shard_label(shard)}"
+    if sharded and SHARD_OUTPUT_DIR:
+        sinks = [ShardOutputSink(run_directory(SHARD_OUTPUT_DIR, shard.run_id), shard_label(shard),
+                                 compression=PARQUET_COMPRESSION)]
+    else:
+        sinks = [FileDriveSink(folder_id, current_time, output_format=OUTPUT_FORMAT, compression=PARQUET_COMPRESSION)]
+    if EXCEL_SUMMARY:
+        sinks.append(FileDriveSink(folder_id, current_time, output_format='xlsx', summarize=True))
+    return sinks
+
+def finish_shard(shard, file_sinks, folder_id, error=None):
+    """
+    샤드 출력 결과를 manifest로 남기고, 모든 샤드가 끝났으면 reduce를 실행합니다.
+    """
+    shard_sinks = [sink for sink in file_sinks if isinstance(sink, ShardOutputSink)]
+    if not shard_sinks:
+        return
+    write_manifest(SHARD_OUTPUT_DIR, shard, shard_sinks[0].outputs,
+                   status='ok' if error is None else 'failed', error=error)
+    if error is None and SHARD_AUTO_REDUCE:
+        try_reduce(SHARD_OUTPUT_DIR, shard, folder_id=folder_id)
 
 def main():
     # 1. Firestore에서 크롤링 메타정보 가져오기
@@ -47,174 +80,91 @@ def main():
     records = gcp.read_google_sheet()
     print(f"[INFO] 총 {len(records)}개의 프로젝트 레코드 로드됨")
 
-    dfs_15m = []
-    dfs_30m = []
-
-    print("[INFO] Chrome 드라이버 실행 중...")
-    options = webdriver.ChromeOptions()
-    options.add_argument("--guest")
-    driver = initialize_chrome_driver() 
-    crawler = WebCrawler(driver)
-
-    for idx, row in enumerate(records, 1):
+    # 날짜 유효성 체크
+    valid_records = []
+    for row in records:
+        start_date = row.get('start_date')
+        end_date = row.get('end_date')
+
+        if not start_date or not end_date or start_date > end_date:
+            print(f"[SKIP] 잘못된 날짜 범위: Site_Unit={row.get('Site_Unit')}, Factory={row.get('Factory', '')}")
+            continue
+        valid_records.append(row)
+
+    # Cloud Run Job의 여러 task로 실행 중이면 이 task 몫의 레코드만 수집
+    shard = current_shard()
+    valid_records = select_shard(valid_records, shard)
+
+    # 이전 실행에서 BigQuery 적재까지 끝난 site-day는 건너뜀
+    checkpoint = open_checkpoint_store(CHECKPOINT_DB)
+    # 지정된 경우 조회 결과 HTML을 재생/벤치마크용 fixture로 기록
+    fixtures = open_fixture_store(RECORD_FIXTURES_DIR)
+    # 'async'이면 site-day 작업 큐 + 요청 속도 제한 + 최근 날짜 우선 스케줄러 사용
+    crawl = run_scheduled_crawl if SCHEDULER == 'async' else run_crawl_pool
+
+    if STREAMING_UPLOAD:
+        # 수집과 동시에 배치 단위로 BigQuery 적재 (전체 결과를 메모리에 모아두지 않음)
+        print("[INFO] 스트리밍 업로드 모드로 실행합니다.")
+        file_sinks = build_file_sinks(folder_id, datetime.now().strftime('%Y%m%d_%H%M%S'), shard)
+        uploader = StreamingUploader(
+            table_id,
+            max_rows=STREAM_BATCH_ROWS,
+            max_seconds=STREAM_BATCH_SECONDS,
+            checkpoint=checkpoint,
+            load_mode=BQ_LOAD_MODE,
+            file_sinks=file_sinks
+        )
         try:
-            print(f"\n[INFO][{idx}/{len(records)}] 프로젝트 시작: Site_Unit={row['Site_Unit']}, Factory={row.get('Factory', '')}")
-
-            # 날짜 유효성 체크
-            start_date = row.get('start_date')
-            end_date = row.get('end_date')
-
-            if not start_date or not end_date or start_date > end_date:
-                print(f"[SKIP] 잘못된 날짜 범위: Site_Unit={row.get('Site_Unit')}, Factory={row.get('Factory', '')}")
-                continue
-
-            crawler.handle_popup()
-
-            # 로그인 시도
+            crawl(valid_records, login_url, max_workers=MAX_WORKERS, checkpoint=checkpoint,
+                  on_site_day=uploader.submit, fixtures=fixtures)
+        finally:
             try:
-                print("[INFO] 로그인 시도 중...")
-                crawler.login(
-                    user_id=row['ID'],
-                    password=row['PW'],
-                    login_url=login_url,  # [변경점] 변수로 교체
-                    id_selector=ID_SELECTOR,
-                    pw_selector=PW_SELECTOR,
-                    submit_selector=SUBMIT_SELECTOR
-                )
-            except Exception as e:
-                print(f"[ERROR] 로그인 실패: Site_Unit={row['Site_Unit']}, Factory={row.get('Factory', '')}, 에러: {e}")
-                continue
-
-            print("[INFO] 데이터 페이지로 이동 중...")
-            crawler.move_to_data_page(DATA_PAGE_URL)
-
-            # 날짜 범위 순회
-            for current_date in utils.generate_date_range(start_date, end_date):
-                print(f"[INFO] Site_Unit={row['Site_Unit']}, Factory={row.get('Factory', '')}, 날짜 {current_date} 처리 중...")
-
-                try:
-                    crawler.set_date(current_date)
-                    crawler.wait_for_background_disappear()
-
-                    # 1. 15분 모드
-                    print("    [STEP] 15분 모드 조회 시작")
-                    crawler.set_mode_15m()
-                    #print("15분 선택 완료")
-                    time.sleep(2)
-                    crawler.click_lookup()
-                    #print("    [STEP] 15분 모드 조회 버튼 클릭")
-                    crawler.wait_for_background_disappear()
-                    df_15m = crawler.extract_table()
-                    df_15m = data_processor.process_dataframe(
-                        df_15m, '15m', row['Project'], row['Site_Unit'], row.get('Factory', ''), current_date
-                    )
-                    dfs_15m.append(df_15m)
-                    print("    [DONE] 15분 데이터 처리 완료")
-
-                    # # 2. 30분 모드
-                    print("    [STEP] 30분 모드 조회 시작")
-                    crawler.set_mode_30m()
-                    time.sleep(2)
-                    crawler.click_lookup()
-                    crawler.wait_for_background_disappear()
-                    df_30m = crawler.extract_table()
-                    df_30m = data_processor.process_dataframe(
-                        df_30m, '30m', row['Project'], row['Site_Unit'], row.get('Factory', ''), current_date
-                    )
-                    dfs_30m.append(df_30m)
-                    #print(f"30분 데이터 행 수: {len(df_30m)}")
-                    print("    [DONE] 30분 데이터 처리 완료")
-
-                except Exception as e:
-                    print(f"[ERROR] 날짜 {current_date} 처리 실패: {e}")
-                    continue
-
-        except Exception as e:
-            print(f"[ERROR] 전체 처리 중 예외 발생: Site_Unit={row.get('Site_Unit')}, 에러: {e}")
-
-    driver.quit()
-    print("\n[INFO] 크롬 드라이버 종료")
-
-    # 결과 병합 및 저장
+                stats = uploader.close()
+            finally:
+                if checkpoint is not None:
+                    checkpoint.close()
+
+        if stats['failed_batches']:
+            error = RuntimeError(f"[ERROR] BigQuery 배치 적재 실패 {stats['failed_batches']}건")
+            finish_shard(shard, file_sinks, folder_id, error=error)
+            raise error
+        finish_shard(shard, file_sinks, folder_id)
+        print("\n[SUCCESS] 전체 KEPCO 작업 완료")
+        return
+
+    if checkpoint is not None:
+        print("[INFO] 일괄 모드: 체크포인트는 BigQuery 적재가 끝난 뒤 기록됩니다. "
+              "중단 시 이어받기가 필요하면 KEPCO_STREAMING_UPLOAD=1로 실행하세요.")
+
+    # 계정별로 독립된 Chrome 세션을 가진 워커 풀에서 병렬 수집
+    # site-day DataFrame을 리스트에 모아 concat하지 않고, 모드별 열 버퍼에 바로 이어 붙임
+    accumulators = {mode: FrameAccumulator(mode) for mode in ('15m', '30m')}
+    crawl(valid_records, login_url, max_workers=MAX_WORKERS, checkpoint=checkpoint,
+          on_site_day=lambda mode, df: accumulators[mode].append(df), fixtures=fixtures)
+    print("\n[INFO] 전체 크롤러 워커 종료")
+
+    # 결과 병합 및 저장: 모드별로 한 번만 병합하여 모든 sink(Drive 파일, BigQuery)에 전달
     current_time = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-    # 15분 데이터 처리
-    if dfs_15m:
-        try:
-            print("[INFO] 15분 데이터 병합 중...")
-            final_15m = data_processor.merge_dataframes(dfs_15m, '15m')
-            file_name_15m = f'kepco_power_15m_{current_time}.xlsx'
-            # 리눅스 컨테이너의 임시 저장소 사용
-            path_15m = os.path.join('/tmp', file_name_15m)
-            final_15m.to_excel(path_15m, index=False)
-            gcp.upload_to_drive(path_15m, file_name_15m, folder_id=folder_id)
-
-            print(f"[UPLOAD] 15분 데이터 업로드 완료: {file_name_15m}")
-        except HttpError as e:
-            print(f"[ERROR] 15분 Google Drive 업로드 실패: {e}")
-        except Exception as e:
-            print(f"[ERROR] 15분 병합 또는 저장 중 오류 발생: {e}")
-
-    # # 30분 데이터 처리
-    if dfs_30m:
-        try:
-            print("[INFO] 30분 데이터 병합 중...")
-            final_30m = data_processor.merge_dataframes(dfs_30m, '30m')
-            file_name_30m = f'kepco_power_30m_{current_time}.xlsx'
-            # 리눅스 임시 폴더(/tmp)로 변경
-            path_30m = os.path.join('/tmp', file_name_30m)
-            final_30m.to_excel(path_30m, index=False)
-            gcp.upload_to_drive(path_30m, file_name_30m, folder_id=folder_id)
-            print(f"[UPLOAD] 30분 데이터 업로드 완료: {file_name_30m}")
-        except HttpError as e:
-            print(f"[ERROR] 30분 Google Drive 업로드 실패: {e}")
-        except Exception as e:
-            print(f"[ERROR] 30분 병합 또는 저장 중 오류 발생: {e}")
-
-    print("\n[INFO] BigQuery 변환 시작")
-
-    if dfs_15m:  # 리스트가 비어있지 않은 경우
-        # 먼저 DataFrame들을 병합
-        merged_15m = data_processor.merge_dataframes(dfs_15m, '15m')
-        # 병합된 DataFrame을 BigQuery용으로 변환
-        transformed_15m = data_processor.transform_for_bigquery(merged_15m, '15m')
-        print("[INFO] 15분 데이터 BigQuery 변환 완료")
-    else:
-        print("[INFO] 15분 데이터가 없어 BigQuery 변환을 건너뜁니다.")
-
-    if dfs_30m:  # 리스트가 비어있지 않은 경우
-        # 먼저 DataFrame들을 병합
-        merged_30m = data_processor.merge_dataframes(dfs_30m, '30m')
-        # 병합된 DataFrame을 BigQuery용으로 변환
-        transformed_30m = data_processor.transform_for_bigquery(merged_30m, '30m')
-        print("[INFO] 30분 데이터 BigQuery 변환 완료")
-    else:
-        print("[INFO] 30분 데이터가 없어 BigQuery 변환을 건너뜁니다.")
-
-    # BigQuery 업로드
+    file_sinks = build_file_sinks(folder_id, current_time, shard)
+    pipeline = PostCrawlPipeline(file_sinks + [
+        BigQuerySink(table_id, checkpoint=checkpoint, write_disposition='WRITE_APPEND', load_mode=BQ_LOAD_MODE),
+    ])
     try:
-        if dfs_15m:
-            # [수정] full_table_id 인자에 Firestore 값(table_id) 전달
-            gcp.upload_to_bigquery(
-                transformed_15m,
-                full_table_id=table_id,  
-                write_disposition='WRITE_APPEND'
-            )
-            
-        if dfs_30m:
-            # [수정] 30분 데이터도 동일하게
-            gcp.upload_to_bigquery(
-                transformed_30m,
-                full_table_id=table_id,
-                write_disposition='WRITE_APPEND'
-            )
-            
+        pipeline.run(accumulators)
     except Exception as e:
         print(f"[ERROR] BigQuery 업로드 실패: {e}")
+        finish_shard(shard, file_sinks, folder_id, error=e)
         raise
+    finish_shard(shard, file_sinks, folder_id)
+
+    if checkpoint is not None:
+        checkpoint.close()
 
-    
     print("\n[SUCCESS] 전체 KEPCO 작업 완료")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # 단계별/사이트별 p50·p95 실행 요약
+        metrics.report()
@@ -0,0 +1,155 @@
+# metrics.py
+import functools
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import METRICS_JSON_LOG, METRICS_SUMMARY_PATH
+
+_lock = threading.Lock()
+_thread_local = threading.local()
+# (step, site_unit) → 소요 시간(초) 목록
+_durations = {}
+_errors = {}
+
+
+def _current_labels():
+    return getattr(_thread_local, 'labels', {})
+
+
+@contextmanager
+def context(**labels):
+    """
+    현재 스레드에서 실행되는 span에 공통 라벨(site_unit, worker 등)을 붙입니다. 중첩 가능합니다.
+    """
+    previous = _current_labels()
+    _thread_local.labels = {**previous, **labels}
+    try:
+        yield
+    finally:
+        _thread_local.labels = previous
+
+
+def _emit(record):
+    # Cloud Logging은 stdout의 한 줄 JSON을 구조화 로그(jsonPayload)로 수집
+    sys.stdout.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def record(step, seconds, error=None, **labels):
+    """
+    측정값 1건을 집계에 추가하고 JSON 로그로 남깁니다.
+    """
+    labels = {**_current_labels(), **labels}
+    key = (step, labels.get('site_unit', '-'))
+    with _lock:
+        _durations.setdefault(key, []).append(seconds)
+        if error is not None:
+            _errors[key] = _errors.get(key, 0) + 1
+
+    if METRICS_JSON_LOG:
+        _emit({
+            'severity': 'ERROR' if error is not None else 'INFO',
+            'message': f"span {step} {seconds * 1000:.1f}ms",
+            'type': 'span',
+            'step': step,
+            'duration_ms': round(seconds * 1000, 3),
+            'status': 'error' if error is not None else 'ok',
+            'error': type(error).__name__ if error is not None else None,
+            'thread': threading.current_thread().name,
+            **labels,
+        })
+
+
+@contextmanager
+def span(step, **labels):
+    """
+    with metrics.span('web.click_lookup'): ... 블록의 소요 시간을 기록합니다. 예외는 그대로 전파됩니다.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        record(step, time.perf_counter() - started, error=error, **labels)
+
+
+def timed(step=None):
+    """
+    함수 호출을 span으로 감싸는 데코레이터. step을 생략하면 '모듈.함수명'을 사용합니다.
+    """
+    def decorator(func):
+        name = step or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _percentiles(values):
+    p50, p95 = np.percentile(values, [50, 95])
+    return {
+        'count': len(values),
+        'p50_ms': round(float(p50) * 1000, 1),
+        'p95_ms': round(float(p95) * 1000, 1),
+        'total_s': round(float(np.sum(values)), 3),
+    }
+
+
+def summary():
+    """
+    실행 중 기록된 span을 단계별, 단계×사이트별 p50/p95로 집계합니다.
+    """
+    with _lock:
+        durations = {key: list(values) for key, values in _durations.items()}
+        errors = dict(_errors)
+
+    by_step = {}
+    for (step, _), values in durations.items():
+        by_step.setdefault(step, []).extend(values)
+
+    return {
+        'steps': {step: _percentiles(values) for step, values in sorted(by_step.items())},
+        'sites': [
+            {'step': step, 'site_unit': site_unit, 'errors': errors.get((step, site_unit), 0), **_percentiles(values)}
+            for (step, site_unit), values in sorted(durations.items())
+        ],
+    }
+
+
+def report(path=METRICS_SUMMARY_PATH):
+    """
+    실행 요약을 출력하고, JSON 로그 1건과 (경로가 있으면) 파일로 남깁니다.
+    """
+    result = summary()
+    if not result['steps']:
+        return result
+
+    print("[METRICS] 단계별 소요 시간 (p50 / p95 / 호출 수 / 합계)")
+    for step, stats in result['steps'].items():
+        print(f"    {step:<45} {stats['p50_ms']:9.1f}ms {stats['p95_ms']:9.1f}ms {stats['count']:7d} {stats['total_s']:9.1f}s")
+
+    if METRICS_JSON_LOG:
+        _emit({'severity': 'INFO', 'message': 'run metrics summary', 'type': 'summary', **result})
+    if path:
+        payload = {'generated_at': datetime.now(timezone.utc).isoformat(), **result}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"[METRICS] 실행 요약 저장: {path}")
+    return result
+
+
+def reset():
+    with _lock:
+        _durations.clear()
+        _errors.clear()
@@ -0,0 +1,135 @@
+# output_writer.py
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import utils
+from google_service import XLSX_MIMETYPE, GOOGLE_SHEET_MIMETYPE
+
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+
+
+def _for_output(df: pd.DataFrame) -> pd.DataFrame:
+    # 파일에는 Time을 슬롯 번호 대신 'HH:MM'(categorical)으로 기록
+    if 'Time' not in df.columns or not pd.api.types.is_integer_dtype(df['Time']):
+        return df
+    return df.assign(Time=utils.time_labels(df['Time']))
+
+
+def _stable_schema(schema: pa.Schema) -> pa.Schema:
+    # pandas는 카테고리 수에 따라 int8/int16 인덱스를 쓰므로, 첫 배치 스키마를 고정하면 이후 배치의 카테고리가
+    # 128개를 넘을 때 변환이 실패합니다. dictionary 인덱스를 int32로 통일합니다.
+    return pa.schema([
+        field.with_type(pa.dictionary(pa.int32(), field.type.value_type)) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ], metadata=schema.metadata)
+
+
+class ParquetOutputWriter:
+    """
+    wide 포맷 DataFrame을 Parquet 파일 하나에 이어서 기록합니다.
+    모드별로 파일을 나누고(파일 = 모드 파티션), write 호출 데이터를 Date 순으로 정렬해 날짜마다
+    별도 row group으로 기록하므로 row group의 Date/DateTime 통계로 날짜 단위 pruning이 가능합니다.
+    """
+    extension = '.parquet'
+    mimetype = PARQUET_MIMETYPE
+    convert_to = None
+
+    def __init__(self, path, compression='zstd'):
+        self.path = path
+        self.compression = compression
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        df = _for_output(df.sort_values(['Date', 'Site_Unit', 'Time'], kind='stable'))
+        if self._writer is None:
+            self._schema = _stable_schema(pa.Table.from_pandas(df.head(1), preserve_index=False).schema)
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression=self.compression)
+        # 첫 배치의 스키마에 맞춰 모든 배치를 기록
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        # 날짜(파티션)마다 row group 하나
+        dates = df['Date'].to_numpy()
+        bounds = [0, *(np.flatnonzero(dates[1:] != dates[:-1]) + 1), len(df)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            self._writer.write_table(table.slice(start, end - start), row_group_size=end - start)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self.path if self.rows else None
+
+
+class ExcelOutputWriter:
+    """
+    엑셀(xlsx) 출력. openpyxl은 이어쓰기가 어려워 close 시점에 한 번에 기록합니다.
+    요약본처럼 작은 데이터에만 사용하세요.
+    """
+    extension = '.xlsx'
+    mimetype = XLSX_MIMETYPE
+    convert_to = GOOGLE_SHEET_MIMETYPE
+
+    def __init__(self, path, **_):
+        self.path = path
+        self.rows = 0
+        self._frames = []
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        self._frames.append(_for_output(df))
+        self.rows += len(df)
+
+    def close(self):
+        if not self._frames:
+            return None
+        pd.concat(self._frames, ignore_index=True).to_excel(self.path, index=False)
+        self._frames = []
+        return self.path
+
+
+OUTPUT_WRITERS = {
+    'parquet': ParquetOutputWriter,
+    'xlsx': ExcelOutputWriter,
+}
+
+
+def create_output_writer(output_format, directory, base_name, compression='zstd'):
+    try:
+        writer_cls = OUTPUT_WRITERS[output_format]
+    except KeyError:
+        raise ValueError(f"[ERROR] 지원되지 않는 출력 형식: {output_format}")
+    path = os.path.join(directory, base_name + writer_cls.extension)
+    return writer_cls(path, compression=compression)
+
+
+def summarize_daily(df: pd.DataFrame, mode: str) -> pd.DataFrame:
+    """
+    엑셀 요약용: site-day별 사용량/무효전력/CO2 합계와 최대수요를 계산합니다.
+    """
+    suffix = '_30m' if mode == '30m' else ''
+    sums = {
+        f'Electricity consumption{suffix}': 'Electricity consumption (kWh)',
+        f'Leading reactive power{suffix}': 'Leading reactive power (kVarh)',
+        f'Lagging reactive power{suffix}': 'Lagging reactive power (kVarh)',
+        f'CO2{suffix}': 'CO2 (tCO2)',
+    }
+    peak_column = f'Peak power{suffix}'
+
+    keys = ['Project', 'Site_Unit', 'Factory', 'Date']
+    aggregations = {column: 'sum' for column in sums if column in df.columns}
+    if peak_column in df.columns:
+        aggregations[peak_column] = 'max'
+
+    summary = df.groupby(keys, sort=True, observed=True).agg(aggregations).reset_index()
+    summary = summary.rename(columns={**sums, peak_column: 'Peak power max (kW)'})
+    summary.insert(4, 'Resolution', mode)
+    return summary
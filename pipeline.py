@@ -0,0 +1,257 @@
+# pipeline.py
+import os
+import resource
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from googleapiclient.errors import HttpError
+
+import data_processor
+import google_service as gcp
+import metrics
+from accumulator import FrameAccumulator
+from checkpoint import frame_site_day_keys
+from output_writer import create_output_writer, summarize_daily
+
+MODE_LABELS = {'15m': '15분', '30m': '30분'}
+
+
+def _current_rss_mb():
+    """
+    현재 프로세스 RSS(MB). /proc을 읽을 수 없으면 최대 RSS로 대신합니다.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def log_stage(name):
+    """
+    단계별 소요 시간과 RSS 변화를 출력합니다.
+    """
+    rss_before = _current_rss_mb()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        rss_after = _current_rss_mb()
+        print(f"[STAGE] {name}: {elapsed:.2f}s, RSS {rss_before:.0f}MB → {rss_after:.0f}MB ({rss_after - rss_before:+.0f}MB)")
+
+
+class FileDriveSink:
+    """
+    병합된 wide 포맷 DataFrame을 파일(Parquet 기본, 엑셀 선택)로 기록하여 Google Drive에 업로드합니다.
+    write는 여러 번 호출될 수 있으며(스트리밍 배치), finish(mode) 시점에 파일을 닫고 업로드합니다.
+    summarize=True이면 site-day 요약본만 기록합니다.
+    """
+    required = False
+
+    def __init__(self, folder_id, current_time, output_format='parquet', compression='zstd',
+                 summarize=False, tmp_dir='/tmp', name=None):
+        self.folder_id = folder_id
+        self.current_time = current_time
+        self.output_format = output_format
+        self.compression = compression
+        self.summarize = summarize
+        self.tmp_dir = tmp_dir
+        self.name = name or f"drive_{output_format}{'_summary' if summarize else ''}"
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def _writer(self, mode):
+        with self._lock:
+            if mode not in self._writers:
+                suffix = '_summary' if self.summarize else ''
+                # 리눅스 컨테이너의 임시 저장소 사용
+                self._writers[mode] = create_output_writer(
+                    self.output_format, self.tmp_dir, f'kepco_power_{mode}{suffix}_{self.current_time}',
+                    compression=self.compression
+                )
+            return self._writers[mode]
+
+    def write(self, mode, merged_df):
+        label = MODE_LABELS[mode]
+        try:
+            frame = summarize_daily(merged_df, mode) if self.summarize else merged_df
+            self._writer(mode).write(frame)
+        except Exception as e:
+            print(f"[ERROR] {label} {self.output_format} 저장 중 오류 발생: {e}")
+            raise
+
+    def finish(self, mode):
+        label = MODE_LABELS[mode]
+        with self._lock:
+            writer = self._writers.pop(mode, None)
+        if writer is None:
+            return
+
+        path = writer.close()
+        if path is None:
+            return
+        file_name = os.path.basename(path)
+        try:
+            gcp.upload_to_drive(path, file_name, folder_id=self.folder_id,
+                                mimetype=writer.mimetype, convert_to=writer.convert_to)
+            print(f"[UPLOAD] {label} 데이터 업로드 완료: {file_name} ({writer.rows}행, {os.path.getsize(path) / 1024:.0f}KB)")
+        except HttpError as e:
+            print(f"[ERROR] {label} Google Drive 업로드 실패: {e}")
+            raise
+
+
+class ShardOutputSink:
+    """
+    샤드(Cloud Run task) 출력: 병합된 wide 포맷 DataFrame을 공유 경로에 모드별 Parquet으로 기록합니다.
+    Drive 업로드는 모든 샤드가 끝난 뒤 reduce 단계(shard.reduce_shards)가 한 번에 합니다.
+    """
+    name = 'shard_output'
+    required = True
+
+    def __init__(self, directory, base_name, compression='zstd'):
+        self.directory = directory
+        self.base_name = base_name
+        self.compression = compression
+        self.outputs = {}
+        self._writers = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _writer(self, mode):
+        with self._lock:
+            if mode not in self._writers:
+                self._writers[mode] = create_output_writer('parquet', self.directory, f'{self.base_name}_{mode}',
+                                                           compression=self.compression)
+            return self._writers[mode]
+
+    def write(self, mode, merged_df):
+        self._writer(mode).write(merged_df)
+
+    def finish(self, mode):
+        with self._lock:
+            writer = self._writers.pop(mode, None)
+        if writer is None:
+            return
+        path = writer.close()
+        if path is not None:
+            self.outputs[mode] = {'file': os.path.basename(path), 'rows': writer.rows}
+            print(f"[INFO] {MODE_LABELS[mode]} 샤드 출력 기록 완료: {path} ({writer.rows}행)")
+
+
+class BigQuerySink:
+    """
+    병합된 wide 포맷 DataFrame을 long 포맷으로 변환해 BigQuery에 적재하고,
+    성공한 site-day를 체크포인트에 기록합니다.
+    """
+    name = 'bigquery'
+    required = True
+
+    def __init__(self, table_id, checkpoint=None, write_disposition='WRITE_APPEND', load_mode='append'):
+        self.table_id = table_id
+        self.checkpoint = checkpoint
+        self.write_disposition = write_disposition
+        self.load_mode = load_mode
+
+    def write(self, mode, merged_df):
+        transformed = data_processor.transform_for_bigquery(merged_df, mode)
+        print(f"[INFO] {MODE_LABELS[mode]} 데이터 BigQuery 변환 완료")
+
+        gcp.upload_to_bigquery(
+            transformed,
+            full_table_id=self.table_id,
+            write_disposition=self.write_disposition,
+            load_mode=self.load_mode
+        )
+        # 적재가 끝난 site-day만 체크포인트에 완료로 기록
+        if self.checkpoint is not None:
+            self.checkpoint.mark_done_many(frame_site_day_keys(merged_df, mode))
+
+
+SinkResult = namedtuple('SinkResult', ['sink_name', 'mode', 'elapsed', 'error'])
+
+
+class PostCrawlPipeline:
+    """
+    수집 결과(모드별 DataFrame 리스트 또는 FrameAccumulator)를 모드별로 한 번만 병합하고,
+    같은 DataFrame을 모든 sink에 전달합니다.
+    sink는 name, required 속성과 write(mode, merged_df) 메서드를 가진 객체이며,
+    finish(mode)가 있으면 write 직후 호출합니다(파일 닫기/업로드 등).
+    """
+
+    def __init__(self, sinks, max_workers=None):
+        self.sinks = list(sinks)
+        self.max_workers = max_workers
+
+    def merge(self, frames_by_mode):
+        merged = {}
+        for mode, dfs in frames_by_mode.items():
+            if not len(dfs):
+                print(f"[INFO] {MODE_LABELS[mode]} 데이터가 없어 병합을 건너뜁니다.")
+                continue
+            if isinstance(dfs, FrameAccumulator):
+                with log_stage(f"materialize {mode} ({dfs.site_days}건)"):
+                    merged[mode] = dfs.to_frame()
+            else:
+                with log_stage(f"merge {mode} ({len(dfs)}건)"):
+                    print(f"[INFO] {MODE_LABELS[mode]} 데이터 병합 중...")
+                    merged[mode] = data_processor.merge_dataframes(dfs, mode)
+            size_mb = merged[mode].memory_usage(deep=True).sum() / 1024 / 1024
+            print(f"[STAGE] merge {mode}: {len(merged[mode])}행, {size_mb:.1f}MB")
+        return merged
+
+    def _write(self, sink, mode, merged_df):
+        started = time.perf_counter()
+        try:
+            with log_stage(f"{sink.name} {mode}"), metrics.span(f'sink.{sink.name}', mode=mode):
+                sink.write(mode, merged_df)
+                if hasattr(sink, 'finish'):
+                    sink.finish(mode)
+            return SinkResult(sink.name, mode, time.perf_counter() - started, None)
+        except Exception as e:
+            return SinkResult(sink.name, mode, time.perf_counter() - started, e)
+
+    def run(self, frames_by_mode):
+        """
+        sink × 모드 조합을 스레드 풀에서 동시에 실행합니다.
+        한 sink가 느리거나 실패해도 다른 sink는 그대로 진행되며, 끝나면 결과 요약을 출력합니다.
+        Returns:
+            SinkResult 목록
+        """
+        merged = self.merge(frames_by_mode)
+        tasks = [(sink, mode, merged_df) for sink in self.sinks for mode, merged_df in merged.items()]
+        if not tasks:
+            return []
+
+        started = time.perf_counter()
+        max_workers = self.max_workers or len(tasks)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sink') as executor:
+            futures = [executor.submit(self._write, sink, mode, merged_df) for sink, mode, merged_df in tasks]
+            results = [future.result() for future in futures]
+        wall_clock = time.perf_counter() - started
+
+        self._print_summary(results, wall_clock)
+
+        failed_required = [result for result in results
+                           if result.error is not None and self._sink(result.sink_name).required]
+        if failed_required:
+            result = failed_required[0]
+            print(f"[ERROR] {result.sink_name} {result.mode} 적재 실패: {result.error}")
+            raise result.error
+        return results
+
+    def _print_summary(self, results, wall_clock):
+        print("[SUMMARY] sink 업로드 결과")
+        for result in results:
+            status = "성공" if result.error is None else f"실패 ({type(result.error).__name__}: {result.error})"
+            print(f"    {result.sink_name:<12} {result.mode:<4} {result.elapsed:7.2f}s  {status}")
+        sequential = sum(result.elapsed for result in results)
+        print(f"[SUMMARY] 업로드 단계 {wall_clock:.2f}s (순차 실행 시 합계 {sequential:.2f}s)")
+
+    def _sink(self, name):
+        return next(sink for sink in self.sinks if sink.name == name)
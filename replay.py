@@ -0,0 +1,275 @@
+# replay.py
+"""
+KEPCO 조회 결과 HTML 기록/재생 도구.
+
+실제 실행 중 KEPCO_RECORD_FIXTURES_DIR를 지정하면 날짜/모드별 조회 결과(tableListChart HTML,
+HTTP 조회 응답)가 fixture로 저장되고, 로컬 재생 서버가 이를 KEPCO 페이지처럼 제공합니다.
+
+사용 예:
+    python replay.py serve --fixtures fixtures --port 8765
+    KEPCO_DATA_PAGE_URL=http://127.0.0.1:8765/data python benchmark.py replay_crawl --browser
+"""
+import argparse
+import html
+import os
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TABLE_ID = 'tableListChart'
+T_MODE_TO_MODE = {'15': '15m', '30': '30m'}
+
+
+def _safe_name(value):
+    return re.sub(r'[^\w.-]+', '_', str(value or '')).strip('_') or '_'
+
+
+class FixtureStore:
+    """
+    조회 결과 HTML을 {directory}/{site_unit}/{date}_{mode}.html 로 저장/조회합니다.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path(self, site_unit, date, mode):
+        return os.path.join(self.directory, _safe_name(site_unit), f"{date}_{mode}.html")
+
+    def save(self, site_unit, date, mode, page_html):
+        path = self.path(site_unit, date, mode)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(page_html)
+        return path
+
+    def load(self, site_unit, date, mode):
+        path = self.path(site_unit, date, mode)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def sites(self):
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def find(self, date, mode, site_unit=None):
+        """
+        site_unit을 지정하지 않으면 해당 날짜/모드의 fixture가 있는 첫 사이트의 것을 반환합니다.
+        """
+        for site in ([site_unit] if site_unit else self.sites()):
+            page_html = self.load(site, date, mode)
+            if page_html is not None:
+                return page_html
+        return None
+
+    def recorder(self, site_unit):
+        """
+        backend.fetch(..., recorder=)에 넘길 콜백. (date, mode, html)을 받아 저장합니다.
+        """
+        def record(date, mode, page_html):
+            try:
+                self.save(site_unit, date, mode, page_html)
+            except OSError as e:
+                print(f"[WARN] fixture 저장 실패: {site_unit} {date} {mode}, 에러: {e}")
+        return record
+
+
+def open_fixture_store(path):
+    """
+    경로가 비어 있으면 fixture를 기록하지 않습니다(None 반환).
+    """
+    if not path:
+        return None
+    print(f"[INFO] 조회 결과 fixture 기록: {path}")
+    return FixtureStore(path)
+
+
+def make_table_rows(mode='15m', seed=0):
+    """
+    KEPCO 조회 결과와 같은 모양(한 행에 16셀 = 좌/우 2개 시간대)의 셀 문자열 행을 만듭니다.
+    """
+    rng = random.Random(seed)
+    step = 15 if mode == '15m' else 30
+    slots = []
+    for minutes in range(step, 24 * 60 + 1, step):
+        slots.append([
+            f"{minutes // 60:02d}:{minutes % 60:02d}",
+            f"{rng.uniform(0, 5000):,.2f}",
+            f"{rng.uniform(0, 20000):,.2f}",
+            f"{rng.uniform(0, 500):.2f}",
+            f"{rng.uniform(0, 2000):,.2f}",
+            f"{rng.uniform(0, 3):.3f}",
+            f"{rng.uniform(0, 100):.2f}",
+            f"{rng.uniform(0, 100):.2f}",
+        ])
+    half = len(slots) // 2
+    return [slots[i] + slots[half + i] for i in range(half)]
+
+
+def render_table_html(rows, table_id=TABLE_ID):
+    body = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+    return f'<table id="{table_id}"><thead><tr><th>시간</th></tr></thead><tbody>{body}</tbody></table>'
+
+
+def _extract_table_html(page_html, table_id=TABLE_ID):
+    """
+    fixture(테이블만 저장된 것 또는 HTTP 응답 전체 페이지)에서 테이블 부분만 잘라냅니다.
+    """
+    start = page_html.find(f'id="{table_id}"')
+    if start < 0:
+        return page_html
+    start = page_html.rfind('<table', 0, start)
+    end = page_html.find('</table>', start)
+    return page_html[start:end + len('</table>')] if end >= 0 else page_html[start:]
+
+
+LOGIN_PAGE = """<html><head><title>replay login</title></head><body>
+<form method="post" action="/login">
+<input id="RSA_USER_ID" name="RSA_USER_ID"><input id="RSA_USER_PWD" name="RSA_USER_PWD" type="password">
+<button class="intro_btn" type="submit">로그인</button>
+</form></body></html>"""
+
+
+def render_data_page(date, t_mode, table_html):
+    checked = {value: ' checked' if value == t_mode else '' for value in T_MODE_TO_MODE}
+    return f"""<html><head><title>rs0101N (replay)</title></head><body>
+<div id="backgroundLayer" style="display:none"></div>
+<form id="searchForm" method="get" action="/data">
+<input id="SELECT_DT" name="SELECT_DT" value="{html.escape(date)}" readonly>
+<label><input type="radio" name="T_MODE" value="15"{checked['15']}>15분</label>
+<label><input type="radio" name="T_MODE" value="30"{checked['30']}>30분</label>
+<img alt="조회" src="btn_blue_lookup.png" style="cursor:pointer" onclick="document.getElementById('searchForm').submit();">
+</form>
+{table_html}
+</body></html>"""
+
+
+class ReplayServer:
+    """
+    fixture를 KEPCO 로그인/데이터 페이지처럼 제공하는 로컬 HTTP 서버.
+    /login(로그인 폼), /data?SELECT_DT=...&T_MODE=15|30 (조회 폼 + 결과 테이블)을 제공하며,
+    fixture가 없는 날짜는 synthesize=True이면 합성 데이터로 응답합니다.
+    """
+
+    def __init__(self, fixtures=None, host='127.0.0.1', port=0, site_unit=None, synthesize=True):
+        self.fixtures = fixtures
+        self.site_unit = site_unit
+        self.synthesize = synthesize
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def table_html(self, date, mode):
+        if self.fixtures is not None:
+            page_html = self.fixtures.find(date, mode, self.site_unit)
+            if page_html is not None:
+                return _extract_table_html(page_html)
+        if not self.synthesize:
+            return None
+        return render_table_html(make_table_rows(mode, seed=f"{date}_{mode}"))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status, body, headers=()):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers:
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _params(self):
+                params = parse_qs(urlparse(self.path).query)
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    params.update(parse_qs(self.rfile.read(length).decode('utf-8')))
+                return {key: values[-1] for key, values in params.items()}
+
+            def _handle(self):
+                server.requests += 1
+                path = urlparse(self.path).path
+                params = self._params()
+                if path == '/login':
+                    if self.command == 'POST':
+                        user = _safe_name(params.get('RSA_USER_ID'))
+                        self._send(303, '', [('Location', '/data'), ('Set-Cookie', f'replay_user={user}; Path=/')])
+                    else:
+                        self._send(200, LOGIN_PAGE)
+                    return
+                if path in ('/', '/data'):
+                    date = params.get('SELECT_DT', '')
+                    t_mode = params.get('T_MODE', '15')
+                    table_html = ''
+                    if date:
+                        table_html = server.table_html(date, T_MODE_TO_MODE.get(t_mode, '15m'))
+                        if table_html is None:
+                            self._send(404, f'fixture 없음: {date} T_MODE={t_mode}')
+                            return
+                    self._send(200, render_data_page(date, t_mode, table_html))
+                    return
+                self._send(404, 'not found')
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        print(f"[INFO] 재생 서버 시작: {self.base_url} (로그인 {self.base_url}/login, 데이터 {self.base_url}/data)")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KEPCO 조회 결과 재생 서버")
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--fixtures', default=None, help="fixture 디렉토리 (없으면 합성 데이터만 제공)")
+    parser.add_argument('--site-unit', default=None, help="특정 사이트의 fixture만 재생")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--no-synthesize', action='store_true', help="fixture가 없는 날짜는 404로 응답")
+    args = parser.parse_args()
+
+    fixtures = FixtureStore(args.fixtures) if args.fixtures else None
+    server = ReplayServer(fixtures, host=args.host, port=args.port, site_unit=args.site_unit,
+                          synthesize=not args.no_synthesize)
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
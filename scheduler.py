@@ -0,0 +1,322 @@
+# scheduler.py
+import asyncio
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from selenium.common.exceptions import TimeoutException
+
+import metrics
+import utils
+from crawl_backend import LEGACY_FIXED_SLEEP_SEC
+from crawler_pool import (CrawlWorker, crawl_site_day, derives_30m, login_and_open, pending_site_days,
+                          report_verification, retry_failed_site_days)
+from failures import FailureTracker, get_artifact_store
+from config import (RATE_LIMIT_PER_SEC, ACCOUNT_RATE_LIMIT_PER_SEC, RETRY_MAX_ATTEMPTS, RETRY_BACKOFF_SEC,
+                    RETRY_FAILED_AT_END)
+
+# 재시도 대상 예외 (조회 버튼/테이블 갱신 대기 시간 초과 등)
+RETRYABLE_EXCEPTIONS = (TimeoutException,)
+
+
+class RateLimiter:
+    """
+    토큰 버킷 방식의 요청 속도 제한. 초당 rate건, 최대 burst건까지 몰아서 허용합니다.
+    rate가 0 이하이면 제한하지 않습니다. 여러 워커 스레드에서 함께 사용할 수 있습니다.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        토큰 1개를 얻을 때까지 대기하고, 대기한 시간(초)을 반환합니다.
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimitedBackend:
+    """
+    backend.fetch(조회 요청 1건) 전에 계정별 → 전역 속도 제한을 차례로 통과하도록 감쌉니다.
+    """
+
+    def __init__(self, backend, limiters):
+        self.backend = backend
+        self.limiters = limiters
+
+    def open(self):
+        self.backend.open()
+
+    def fetch(self, date_string, mode, timer=None, recorder=None):
+        waited = sum(limiter.acquire() for limiter in self.limiters)
+        if waited:
+            metrics.record('scheduler.rate_limit_wait', waited)
+        return self.backend.fetch(date_string, mode, timer=timer, recorder=recorder)
+
+
+class RecordLoginError(Exception):
+    """
+    레코드의 로그인/데이터 페이지 진입 실패. 해당 레코드의 남은 날짜는 실행 끝 재시도로 미룹니다.
+    """
+
+
+class CrawlScheduler:
+    """
+    시트 레코드를 (레코드, 날짜) 작업으로 나누어 최근 날짜부터 크롤러 워커에 배분하는 asyncio 스케줄러.
+
+    - 계정 임대: 한 계정의 작업은 한 번에 한 워커만 처리하며(로그인 세션 공유 불가),
+      워커는 가장 최근 날짜가 남은 계정을 빌려 그 계정의 작업을 최근 날짜 순으로 처리합니다.
+    - 속도 제한: 조회 요청마다 전역/계정별 토큰 버킷을 통과해야 합니다.
+    - 재시도: TimeoutException은 지수 백오프 후 데이터 페이지를 다시 열고 재시도합니다.
+    - 실패 처리: 끝내 실패한 작업과 계정 차단기가 열린 동안의 작업은 실행 끝에 새 세션으로 한 번 더 시도합니다.
+    드라이버 호출은 워커마다 전용 스레드 1개에서 실행되어 asyncio 루프를 막지 않습니다.
+    """
+
+    def __init__(self, records, login_url, max_workers=1, checkpoint=None, on_site_day=None, fixtures=None,
+                 failures=None, rate_limit=RATE_LIMIT_PER_SEC, account_rate_limit=ACCOUNT_RATE_LIMIT_PER_SEC,
+                 max_retries=RETRY_MAX_ATTEMPTS, backoff_sec=RETRY_BACKOFF_SEC):
+        self.records = list(records)
+        self.login_url = login_url
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint
+        self.on_site_day = on_site_day
+        self.fixtures = fixtures
+        self.failures = failures or FailureTracker(artifacts=get_artifact_store())
+        self.account_rate_limit = account_rate_limit
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+
+        self._global_limiter = RateLimiter(rate_limit)
+        self._account_limiters = {}
+        self._plans = {}
+        self._pending = {}
+        self._leased = set()
+        self._failed_records = set()
+        self._frames = {}
+        self._outcomes = {}
+        self._lock = threading.Lock()
+
+    def _plan(self):
+        """
+        레코드별 남은 날짜를 계정별 우선순위 큐(최근 날짜 우선)에 넣습니다.
+        """
+        for idx, row in enumerate(self.records, 1):
+            pending_dates, done_15m, done_30m = pending_site_days(row, self.checkpoint)
+            if not pending_dates:
+                continue
+            self._plans[idx] = (row, done_15m, done_30m)
+            heap = self._pending.setdefault(row.get('ID'), [])
+            for date in pending_dates:
+                ordinal = datetime.strptime(date, '%Y-%m-%d').toordinal()
+                heapq.heappush(heap, (-ordinal, idx, date))
+        return sum(len(heap) for heap in self._pending.values())
+
+    def _lease(self):
+        # asyncio 루프 스레드에서만 호출되므로 잠금이 필요 없음
+        candidates = [(heap[0], account) for account, heap in self._pending.items()
+                      if heap and account not in self._leased]
+        if not candidates:
+            return None
+        _, account = min(candidates)
+        self._leased.add(account)
+        return account
+
+    def _limiters(self, account):
+        with self._lock:
+            if account not in self._account_limiters:
+                self._account_limiters[account] = RateLimiter(self.account_rate_limit)
+            return [self._account_limiters[account], self._global_limiter]
+
+    def _emit(self, idx, date, mode, df):
+        if self.on_site_day is not None:
+            self.on_site_day(mode, df)
+            return
+        with self._lock:
+            self._frames.setdefault(idx, {'15m': [], '30m': []})[mode].append((date, df))
+
+    def _defer(self, idx, current_date, reason, emitted=(), error=None):
+        # 이미 넘긴 모드는 제외하고 실패 목록에 추가
+        row, done_15m, done_30m = self._plans[idx]
+        self.failures.add(idx, row, current_date,
+                          current_date not in done_15m and '15m' not in emitted,
+                          current_date not in done_30m and '30m' not in emitted,
+                          reason, error)
+
+    def _crawl_day(self, worker, idx, current_date, need_15m, need_30m, emit, opened_record):
+        """
+        워커 전용 스레드에서 실행: 필요하면 로그인/데이터 페이지 진입 후 site-day 1건을 수집합니다.
+        """
+        row = self._plans[idx][0]
+        with metrics.context(worker=worker.worker_id, site_unit=row['Site_Unit']):
+            worker.ensure_alive()
+            if opened_record != idx or worker.crawler.logged_in_as != row.get('ID'):
+                try:
+                    login_and_open(worker.crawler, worker.backend, row, self.login_url)
+                except Exception as e:
+                    raise RecordLoginError(e) from e
+                if derives_30m(row['Site_Unit']):
+                    print(f"[INFO] 30분 데이터는 15분 데이터로 재계산합니다: Site_Unit={row['Site_Unit']}")
+
+            print(f"[INFO][W{worker.worker_id}] Site_Unit={row['Site_Unit']}, Factory={row.get('Factory', '')}, "
+                  f"날짜 {current_date} 처리 중...")
+            backend = RateLimitedBackend(worker.backend, self._limiters(row.get('ID')))
+            recorder = self.fixtures.recorder(row['Site_Unit']) if self.fixtures is not None else None
+            timer = utils.StepTimer()
+            try:
+                outcome = crawl_site_day(backend, row, current_date, need_15m, need_30m, emit,
+                                         recorder=recorder, timer=timer)
+            finally:
+                timer.report(
+                    f"Site_Unit={row['Site_Unit']}, 날짜 {current_date}",
+                    baseline_wait_sec=LEGACY_FIXED_SLEEP_SEC * 2
+                )
+            with self._lock:
+                self._outcomes.setdefault(idx, []).append(outcome)
+        return idx
+
+    async def _run_item(self, loop, executor, worker, idx, current_date, opened_record):
+        """
+        site-day 1건을 재시도 정책에 따라 실행하고, 데이터 페이지가 열려 있는 레코드 번호를 반환합니다.
+        """
+        row, done_15m, done_30m = self._plans[idx]
+        emitted = set()
+
+        def emit(mode, df):
+            # 재시도 시 이미 넘긴 모드를 다시 넘기지 않도록 기록
+            emitted.add(mode)
+            self._emit(idx, current_date, mode, df)
+
+        for attempt in range(self.max_retries + 1):
+            need_15m = current_date not in done_15m and '15m' not in emitted
+            need_30m = current_date not in done_30m and '30m' not in emitted
+            try:
+                opened_record = await loop.run_in_executor(executor, self._crawl_day, worker, idx, current_date,
+                                                           need_15m, need_30m, emit, opened_record)
+                self.failures.breaker.record_success(row.get('ID'))
+                return opened_record
+            except RecordLoginError as e:
+                print(f"[ERROR] 로그인 실패, 레코드의 남은 날짜를 보류합니다: Site_Unit={row['Site_Unit']}, "
+                      f"Factory={row.get('Factory', '')}, 에러: {e}")
+                self._failed_records.add(idx)
+                self.failures.breaker.record_failure(row.get('ID'))
+                self._defer(idx, current_date, 'login', emitted, e)
+                return None
+            except RETRYABLE_EXCEPTIONS as e:
+                # 페이지 상태를 알 수 없으므로 다음 시도에서 데이터 페이지를 다시 엶
+                opened_record = None
+                if attempt == self.max_retries:
+                    print(f"[ERROR] 날짜 {current_date} 처리 실패 (재시도 {self.max_retries}회 초과): {e}")
+                    self.failures.breaker.record_failure(row.get('ID'))
+                    self._defer(idx, current_date, 'timeout', emitted, e)
+                    return None
+                delay = self.backoff_sec * 2 ** attempt * random.uniform(0.8, 1.2)
+                metrics.record('scheduler.retry', delay, site_unit=row['Site_Unit'])
+                print(f"[WARN] 날짜 {current_date} 대기 시간 초과, {delay:.1f}초 후 재시도 "
+                      f"({attempt + 1}/{self.max_retries}): {type(e).__name__}")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"[ERROR] 날짜 {current_date} 처리 실패: {e}")
+                self.failures.breaker.record_failure(row.get('ID'))
+                self._defer(idx, current_date, 'error', emitted, e)
+                return None
+        return None
+
+    async def _worker(self, worker_id):
+        loop = asyncio.get_running_loop()
+        # Selenium 드라이버는 한 스레드에서만 다루도록 워커마다 전용 스레드 사용
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'crawler-{worker_id}')
+        worker = CrawlWorker(worker_id)
+        try:
+            await loop.run_in_executor(executor, worker.start)
+        except Exception as e:
+            print(f"[ERROR][W{worker_id}] 워커 시작 실패: {e}")
+            executor.shutdown(wait=False)
+            return
+
+        try:
+            while True:
+                account = self._lease()
+                if account is None:
+                    break
+                try:
+                    heap = self._pending[account]
+                    opened_record = None
+                    while heap:
+                        _, idx, current_date = heapq.heappop(heap)
+                        if idx in self._failed_records:
+                            self._defer(idx, current_date, 'login')
+                            continue
+                        if not self.failures.breaker.allow(account):
+                            self._defer(idx, current_date, 'circuit_open')
+                            continue
+                        opened_record = await self._run_item(loop, executor, worker, idx, current_date, opened_record)
+                finally:
+                    self._leased.discard(account)
+        finally:
+            await loop.run_in_executor(executor, worker.close)
+            executor.shutdown(wait=True)
+            print(f"[INFO][W{worker_id}] 크롬 드라이버 종료")
+
+    async def _run(self):
+        total = self._plan()
+        if not total:
+            return
+        max_workers = max(1, min(self.max_workers, len(self._pending)))
+        print(f"[INFO] async 스케줄러 시작: site-day {total}건, 계정 {len(self._pending)}개, 워커 {max_workers}개, "
+              f"속도 제한 전역 {self._global_limiter.rate}/s, 계정별 {self.account_rate_limit}/s")
+        await asyncio.gather(*(self._worker(worker_id) for worker_id in range(1, max_workers + 1)))
+
+        remaining = sum(len(heap) for heap in self._pending.values())
+        if remaining:
+            print(f"[ERROR] 실행 가능한 워커가 없어 site-day {remaining}건이 처리되지 않았습니다.")
+
+    def run(self):
+        """
+        Returns:
+            (dfs_15m, dfs_30m): run_crawl_pool과 같이 시트 순서, 날짜 순으로 정렬된 DataFrame 리스트
+        """
+        asyncio.run(self._run())
+
+        if RETRY_FAILED_AT_END:
+            retry_failed_site_days(self.failures, self.login_url, self._emit, fixtures=self.fixtures)
+        self.failures.report()
+
+        for idx, outcomes in sorted(self._outcomes.items()):
+            report_verification(self._plans[idx][0], outcomes)
+
+        dfs_15m = []
+        dfs_30m = []
+        for idx in sorted(self._frames):
+            frames = self._frames[idx]
+            dfs_15m.extend(df for _, df in sorted(frames['15m'], key=lambda item: item[0]))
+            dfs_30m.extend(df for _, df in sorted(frames['30m'], key=lambda item: item[0]))
+        return dfs_15m, dfs_30m
+
+
+def run_scheduled_crawl(records, login_url, max_workers=1, checkpoint=None, on_site_day=None, fixtures=None,
+                        failures=None):
+    """
+    run_crawl_pool과 같은 인터페이스로 async 스케줄러를 실행합니다.
+    """
+    return CrawlScheduler(records, login_url, max_workers=max_workers, checkpoint=checkpoint,
+                          on_site_day=on_site_day, fixtures=fixtures, failures=failures).run()
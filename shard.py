@@ -0,0 +1,266 @@
+# shard.py
+"""
+Cloud Run Job 병렬 task 샤딩.
+
+각 task는 CLOUD_RUN_TASK_INDEX/CLOUD_RUN_TASK_COUNT로 자기 몫의 시트 레코드만 수집하고,
+KEPCO_SHARD_OUTPUT_DIR(공유 저장소)에 샤드별 Parquet과 manifest를 남깁니다.
+모든 샤드가 끝나면 reduce 단계가 샤드 출력을 모드별 파일 1개로 합쳐 Drive에 업로드합니다.
+
+로컬 확인 예:
+    CLOUD_RUN_TASK_INDEX=1 CLOUD_RUN_TASK_COUNT=3 python shard.py plan --records records.json
+    python shard.py reduce --dir /mnt/shards --run-id local --count 3 --no-upload
+"""
+import argparse
+import json
+import os
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+
+from config import (TASK_INDEX, TASK_COUNT, RUN_ID, OUTPUT_FORMAT, PARQUET_COMPRESSION)
+
+MODES = ('15m', '30m')
+REDUCE_LOCK = 'reduce.lock'
+
+ShardSpec = namedtuple('ShardSpec', ['index', 'count', 'run_id'])
+
+
+def current_shard(index=TASK_INDEX, count=TASK_COUNT, run_id=RUN_ID):
+    """
+    현재 task의 샤드 정보. 같은 실행의 task들은 run_id(CLOUD_RUN_EXECUTION)로 출력을 모읍니다.
+    """
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"[ERROR] 잘못된 task 샤드 설정: CLOUD_RUN_TASK_INDEX={index}, CLOUD_RUN_TASK_COUNT={count}")
+    return ShardSpec(index, count, run_id or 'local')
+
+
+def shard_label(spec):
+    return f"shard{spec.index + 1:03d}of{spec.count:03d}"
+
+
+def shard_key(row):
+    return f"{row.get('Site_Unit', '')}|{row.get('Factory', '')}"
+
+
+def stable_hash(key):
+    # Python hash()는 프로세스마다 달라지므로 task 간에 같은 값을 주는 crc32 사용
+    return zlib.crc32(key.encode('utf-8'))
+
+
+def record_days(row):
+    """
+    레코드 날짜 범위의 일수(작업량). 형식이 잘못된 레코드는 1일로 봅니다.
+    """
+    try:
+        start = datetime.strptime(row['start_date'], '%Y-%m-%d')
+        end = datetime.strptime(row['end_date'], '%Y-%m-%d')
+    except (KeyError, TypeError, ValueError):
+        return 1
+    return max(1, (end - start).days + 1)
+
+
+def assign_shards(records, count):
+    """
+    레코드를 count개 샤드로 나눕니다. 같은 입력이면 어느 task에서 계산해도 같은 결과가 나옵니다.
+
+    한 계정(ID)은 동시에 두 세션으로 로그인할 수 없으므로 계정 단위로 묶어 배분하며,
+    묶음을 작업량(일수) 큰 순서로 가장 가벼운 샤드에 넣습니다(LPT). 작업량이 같으면
+    Site_Unit/Factory 해시 순서를 따르므로 시트 행 순서가 바뀌어도 배분이 유지됩니다.
+    Returns:
+        (샤드별 레코드 리스트(시트 순서 유지), 샤드별 일수)
+    """
+    groups = {}
+    for position, row in enumerate(records):
+        groups.setdefault(row.get('ID'), []).append((position, row))
+
+    def weight(members):
+        return sum(record_days(row) for _, row in members)
+
+    ordered = sorted(groups.values(),
+                     key=lambda members: (-weight(members), min(stable_hash(shard_key(row)) for _, row in members)))
+
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for members in ordered:
+        target = min(range(count), key=lambda i: (loads[i], i))
+        shards[target].extend(members)
+        loads[target] += weight(members)
+    return [[row for _, row in sorted(members, key=lambda member: member[0])] for members in shards], loads
+
+
+def select_shard(records, spec):
+    """
+    현재 task가 수집할 레코드만 골라 반환합니다. task가 1개이면 전체를 그대로 반환합니다.
+    """
+    if spec.count <= 1:
+        return list(records)
+    shards, loads = assign_shards(records, spec.count)
+    print(f"[INFO] 샤드 {spec.index + 1}/{spec.count} (실행 {spec.run_id}): 레코드 {len(shards[spec.index])}개, "
+          f"{loads[spec.index]}일 / 샤드별 일수 {loads}")
+    return shards[spec.index]
+
+
+def run_directory(directory, run_id):
+    return os.path.join(directory, run_id)
+
+
+def _manifest_path(directory, run_id, index):
+    return os.path.join(run_directory(directory, run_id), f"shard-{index:03d}.json")
+
+
+def write_manifest(directory, spec, outputs, status='ok', error=None):
+    """
+    샤드 결과(모드별 출력 파일, 행 수, 성공 여부)를 기록합니다. 같은 샤드가 재시도되면 덮어씁니다.
+    """
+    path = _manifest_path(directory, spec.run_id, spec.index)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    manifest = {
+        'run_id': spec.run_id,
+        'index': spec.index,
+        'count': spec.count,
+        'status': status,
+        'error': str(error) if error is not None else None,
+        'outputs': outputs,
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+    }
+    # 다른 task가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_manifests(directory, run_id):
+    manifests = {}
+    root = run_directory(directory, run_id)
+    if not os.path.isdir(root):
+        return manifests
+    for name in sorted(os.listdir(root)):
+        if not (name.startswith('shard-') and name.endswith('.json')):
+            continue
+        with open(os.path.join(root, name), encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifests[manifest['index']] = manifest
+    return manifests
+
+
+def _incomplete_shards(manifests, count):
+    return [index for index in range(count)
+            if index not in manifests or manifests[index]['status'] != 'ok']
+
+
+def reduce_shards(directory, run_id, count, folder_id=None, current_time=None,
+                  output_format=OUTPUT_FORMAT, compression=PARQUET_COMPRESSION):
+    """
+    모든 샤드의 출력을 모드별 파일 1개로 합칩니다. folder_id가 있으면 Drive에 업로드합니다.
+    샤드 파일의 row group(날짜순 정렬 단위)을 하나씩 옮겨 쓰므로 전체를 메모리에 올리지 않습니다.
+    Returns:
+        {mode: 병합 파일 경로}
+    """
+    from output_writer import create_output_writer
+
+    manifests = read_manifests(directory, run_id)
+    incomplete = _incomplete_shards(manifests, count)
+    if incomplete:
+        raise RuntimeError(f"[ERROR] 완료되지 않은 샤드가 있어 reduce를 진행할 수 없습니다: "
+                           f"{[index + 1 for index in incomplete]} / {count}")
+
+    root = run_directory(directory, run_id)
+    current_time = current_time or datetime.now().strftime('%Y%m%d_%H%M%S')
+    merged = {}
+    for mode in MODES:
+        paths = [os.path.join(root, manifests[index]['outputs'][mode]['file'])
+                 for index in range(count) if mode in manifests[index]['outputs']]
+        if not paths:
+            print(f"[INFO] {mode} 샤드 출력이 없어 reduce를 건너뜁니다.")
+            continue
+        writer = create_output_writer(output_format, root, f'kepco_power_{mode}_{current_time}',
+                                      compression=compression)
+        for path in paths:
+            parquet_file = pq.ParquetFile(path)
+            for row_group in range(parquet_file.num_row_groups):
+                writer.write(parquet_file.read_row_group(row_group).to_pandas())
+        path = writer.close()
+        if path is None:
+            continue
+        print(f"[INFO] {mode} 샤드 {len(paths)}개 병합 완료: {os.path.basename(path)} ({writer.rows}행)")
+        merged[mode] = path
+        if folder_id:
+            import google_service as gcp
+            gcp.upload_to_drive(path, os.path.basename(path), folder_id=folder_id,
+                                mimetype=writer.mimetype, convert_to=writer.convert_to)
+            print(f"[UPLOAD] {mode} 병합 데이터 업로드 완료: {os.path.basename(path)}")
+    return merged
+
+
+def try_reduce(directory, spec, folder_id=None):
+    """
+    모든 샤드가 끝났으면 reduce를 실행합니다. 여러 task가 동시에 끝나도 잠금 파일을 먼저 만든 task만 실행합니다.
+    Returns:
+        reduce를 실행했으면 {mode: 경로}, 아니면 None
+    """
+    manifests = read_manifests(directory, spec.run_id)
+    incomplete = _incomplete_shards(manifests, spec.count)
+    if incomplete:
+        print(f"[INFO] 남은 샤드 {len(incomplete)}개, reduce는 마지막 샤드에서 실행됩니다.")
+        return None
+
+    lock_path = os.path.join(run_directory(directory, spec.run_id), REDUCE_LOCK)
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        print("[INFO] 다른 task가 reduce를 실행 중이거나 이미 실행했습니다.")
+        return None
+    print(f"[INFO] 모든 샤드 완료, reduce 시작: 실행 {spec.run_id}, 샤드 {spec.count}개")
+    try:
+        return reduce_shards(directory, spec.run_id, spec.count, folder_id=folder_id)
+    except Exception:
+        # 수동 재실행(python shard.py reduce)이 가능하도록 잠금 해제
+        os.remove(lock_path)
+        raise
+
+
+def _load_records(path):
+    if path:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    import google_service as gcp
+    return gcp.read_google_sheet()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cloud Run task 샤딩 도구")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    plan = subparsers.add_parser('plan', help="샤드 배분 결과 출력 (CLOUD_RUN_TASK_* 환경 변수로 task 시뮬레이션)")
+    plan.add_argument('--records', default=None, help="레코드 JSON 파일 (없으면 Google Sheet에서 읽음)")
+    plan.add_argument('--count', type=int, default=None, help="샤드 수 (기본: CLOUD_RUN_TASK_COUNT)")
+
+    reduce = subparsers.add_parser('reduce', help="샤드 출력 병합")
+    reduce.add_argument('--dir', required=True, help="KEPCO_SHARD_OUTPUT_DIR")
+    reduce.add_argument('--run-id', default=RUN_ID or 'local')
+    reduce.add_argument('--count', type=int, default=TASK_COUNT)
+    reduce.add_argument('--folder-id', default=None, help="업로드할 Drive 폴더 ID")
+    reduce.add_argument('--no-upload', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'plan':
+        records = _load_records(args.records)
+        count = args.count or TASK_COUNT
+        shards, loads = assign_shards(records, count)
+        for index, rows in enumerate(shards):
+            marker = '*' if count > 1 and index == TASK_INDEX else ' '
+            print(f"{marker} 샤드 {index + 1}/{count}: 레코드 {len(rows)}개, {loads[index]}일")
+            for row in rows:
+                print(f"      ID={row.get('ID')} Site_Unit={row.get('Site_Unit')} Factory={row.get('Factory', '')} "
+                      f"{row.get('start_date')}~{row.get('end_date')}")
+        return
+
+    reduce_shards(args.dir, args.run_id, args.count, folder_id=None if args.no_upload else args.folder_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# streaming_uploader.py
+import queue
+import threading
+import time
+
+from accumulator import FrameAccumulator
+from pipeline import BigQuerySink, log_stage
+
+_STOP = object()
+
+
+class StreamingUploader:
+    """
+    수집이 끝난 site-day DataFrame을 모드별로 모아 두었다가,
+    행 수(max_rows) 또는 경과 시간(max_seconds) 기준으로 BigQuery에 나누어 적재합니다.
+    변환/업로드는 백그라운드 스레드에서 수행되므로 크롤러(브라우저)를 막지 않습니다.
+    """
+
+    def __init__(self, table_id, max_rows=20000, max_seconds=300, checkpoint=None,
+                 write_disposition='WRITE_APPEND', load_mode='append', max_pending=1000, file_sinks=None):
+        self.table_id = table_id
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self._sink = BigQuerySink(table_id, checkpoint=checkpoint, write_disposition=write_disposition,
+                                  load_mode=load_mode)
+        # 배치마다 이어쓰고 종료 시 한 번에 업로드하는 파일 sink (Parquet 등)
+        self._file_sinks = list(file_sinks or [])
+
+        # 업로드가 밀리면 submit이 대기하도록 큐 크기를 제한 (메모리 상한)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._buffers = {mode: FrameAccumulator(mode) for mode in ('15m', '30m')}
+        self._first_buffered_at = {'15m': None, '30m': None}
+
+        self.stats = {'batches': 0, 'failed_batches': 0, 'rows': 0, 'failed_rows': 0}
+        # 백그라운드 스레드가 예외로 종료되면 기록해 두고 submit/close에서 다시 발생시킴
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='bq-streaming-uploader', daemon=True)
+        self._thread.start()
+
+    def submit(self, mode, df):
+        """
+        크롤러 워커에서 site-day 1건(process_dataframe 결과)을 전달합니다.
+        """
+        if mode not in self._buffers:
+            raise ValueError(f"[ERROR] 지원되지 않는 모드: {mode}")
+        self._put((mode, df))
+
+    def close(self):
+        """
+        남은 버퍼를 모두 적재하고 백그라운드 스레드를 종료합니다. 적재 통계를 반환합니다.
+        백그라운드 스레드가 예외로 종료되었으면 그 예외를 다시 발생시킵니다.
+        """
+        if self._thread.is_alive():
+            try:
+                self._put(_STOP)
+            except RuntimeError:
+                pass
+        self._thread.join()
+        self._raise_if_failed()
+        for sink in self._file_sinks:
+            for mode in self._buffers:
+                try:
+                    sink.finish(mode)
+                except Exception as e:
+                    print(f"[ERROR] {sink.name} {mode} 업로드 실패: {e}")
+        print(f"[INFO] 스트리밍 업로드 종료: 배치 {self.stats['batches']}건 성공 ({self.stats['rows']}행), "
+              f"실패 {self.stats['failed_batches']}건 ({self.stats['failed_rows']}행)")
+        return dict(self.stats)
+
+    def _put(self, item):
+        """
+        큐가 가득 차 있으면 기다리되, 그 사이 백그라운드 스레드가 죽으면 막히지 않고 예외를 발생시킵니다.
+        """
+        while True:
+            self._raise_if_failed()
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f"[ERROR] 스트리밍 업로드 스레드가 중단되었습니다: {self._error}") from self._error
+
+    def _run(self):
+        try:
+            self._loop()
+        except Exception as e:
+            self._error = e
+            print(f"[ERROR] 스트리밍 업로드 스레드 중단 (버퍼의 site-day는 다음 실행에서 재수집): {e}")
+
+    def _loop(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                for mode in self._buffers:
+                    self._flush(mode)
+                return
+
+            if item is not None:
+                mode, df = item
+                if self._first_buffered_at[mode] is None:
+                    self._first_buffered_at[mode] = time.monotonic()
+                self._buffers[mode].append(df)
+
+            for mode in self._buffers:
+                if self._should_flush(mode):
+                    self._flush(mode)
+
+    def _should_flush(self, mode):
+        if not len(self._buffers[mode]):
+            return False
+        if len(self._buffers[mode]) >= self.max_rows:
+            return True
+        return time.monotonic() - self._first_buffered_at[mode] >= self.max_seconds
+
+    def _flush(self, mode):
+        batch = self._buffers[mode]
+        if not len(batch):
+            return
+
+        # 버퍼는 성공/실패와 관계없이 비워 메모리 사용량을 일정하게 유지
+        self._buffers[mode] = FrameAccumulator(mode)
+        self._first_buffered_at[mode] = None
+
+        row_count = len(batch)
+        print(f"[INFO] {mode} 배치 적재 시작: site-day {batch.site_days}건, {row_count}행")
+        try:
+            with log_stage(f"stream batch {mode} ({batch.site_days}건)"):
+                merged = batch.to_frame()
+                for sink in self._file_sinks:
+                    try:
+                        sink.write(mode, merged)
+                    except Exception as e:
+                        print(f"[ERROR] {sink.name} {mode} 배치 기록 실패: {e}")
+                self._sink.write(mode, merged)
+        except Exception as e:
+            # 체크포인트를 남기지 않으므로 다음 실행에서 해당 site-day를 다시 수집
+            self.stats['failed_batches'] += 1
+            self.stats['failed_rows'] += row_count
+            print(f"[ERROR] {mode} 배치 적재 실패 (site-day {batch.site_days}건은 다음 실행에서 재수집): {e}")
+            return
+
+        self.stats['batches'] += 1
+        self.stats['rows'] += row_count
@@ -0,0 +1,109 @@
+# tests/test_accumulator.py
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import data_processor
+from accumulator import FrameAccumulator
+
+# (Project, Site_Unit, Factory, Date): 같은 사이트가 연속/비연속으로 섞이고, 공장 유무와 연말 경계를 포함
+SITE_DAYS = [
+    ('P1', 'S1', '', '2023-12-31'),
+    ('P1', 'S1', '', '2024-01-01'),
+    ('P2', 'S2', 'F1', '2024-01-01'),
+    ('P2', 'S2', 'F2', '2024-01-01'),
+    ('P1', 'S1', '', '2024-01-02'),
+]
+
+
+def _site_day(project, site_unit, factory, date, mode, seed):
+    rng = np.random.default_rng(seed)
+    slots = np.arange(1, 97, dtype='int16')
+    raw = pd.DataFrame({'Time': pd.array(slots, dtype='int16')})
+    for column in ['Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag', 'CO2_t',
+                   'PowerFactor_Lead', 'PowerFactor_Lag']:
+        values = rng.uniform(0, 100, len(slots)).astype('float32')
+        values[seed % len(slots)] = np.nan
+        raw[column] = values
+    df = data_processor.process_dataframe(raw, '15m', project, site_unit, factory, date)
+    return data_processor.resample_15m_to_30m(df) if mode == '30m' else df
+
+
+def _site_day_frames(mode):
+    return [_site_day(*site_day, mode, seed) for seed, site_day in enumerate(SITE_DAYS)]
+
+
+@pytest.mark.parametrize('mode', ['15m', '30m'])
+def test_to_frame_matches_merge_dataframes(mode):
+    dfs = _site_day_frames(mode)
+    accumulator = FrameAccumulator(mode, initial_rows=8)
+    for df in dfs:
+        accumulator.append(df)
+
+    assert len(accumulator) == sum(len(df) for df in dfs)
+    assert accumulator.site_days == len(SITE_DAYS)
+    pd.testing.assert_frame_equal(accumulator.to_frame(), data_processor.merge_dataframes(dfs, mode))
+
+
+@pytest.mark.parametrize('mode', ['15m', '30m'])
+def test_to_arrow_matches_to_frame(mode):
+    accumulator = FrameAccumulator(mode)
+    for df in _site_day_frames(mode):
+        accumulator.append(df)
+
+    table = accumulator.to_arrow()
+    expected = data_processor.merge_dataframes(_site_day_frames(mode), mode)
+
+    assert table.column_names == data_processor.MERGED_COLUMNS[mode]
+    assert table.schema.field('Time').type == pa.int16()
+    for column in data_processor.CATEGORY_COLUMNS:
+        if column in table.column_names:
+            assert pa.types.is_dictionary(table.schema.field(column).type), column
+    pd.testing.assert_frame_equal(table.to_pandas(), expected, check_dtype=False)
+
+def test_run_length_metadata_follows_append_order():
+    accumulator = FrameAccumulator('15m')
+    for df in _site_day_frames('15m'):
+        accumulator.append(df)
+
+    frame = accumulator.to_frame()
+    runs = frame[['Project', 'Site_Unit', 'Factory', 'Date']].astype(str).drop_duplicates()
+
+    assert [tuple(run) for run in runs.itertuples(index=False)] == SITE_DAYS
+    assert (frame.groupby(['Site_Unit', 'Factory', 'Date'], observed=True).size() == 96).all()
+    assert frame['DateTime'].iloc[95] == pd.Timestamp('2024-01-01 00:00')
+
+
+@pytest.mark.parametrize('mode', ['15m', '30m'])
+def test_empty_accumulator(mode):
+    accumulator = FrameAccumulator(mode)
+    accumulator.append(_site_day_frames(mode)[0].iloc[0:0])
+
+    assert len(accumulator) == 0
+    assert accumulator.site_days == 0
+    assert accumulator.to_frame().empty
+    assert list(accumulator.to_frame().columns) == data_processor.MERGED_COLUMNS[mode]
+    assert accumulator.to_arrow().num_rows == 0
+    assert accumulator.to_arrow().column_names == data_processor.MERGED_COLUMNS[mode]
+
+
+def test_clear_drops_rows_and_reuses_accumulator():
+    dfs = _site_day_frames('15m')
+    accumulator = FrameAccumulator('15m')
+    for df in dfs[:3]:
+        accumulator.append(df)
+
+    accumulator.clear()
+
+    assert len(accumulator) == 0
+    assert accumulator.site_days == 0
+    assert accumulator.to_frame().empty
+
+    accumulator.append(dfs[4])
+    pd.testing.assert_frame_equal(accumulator.to_frame(), data_processor.merge_dataframes([dfs[4]], '15m'))
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        FrameAccumulator('5m')
@@ -0,0 +1,130 @@
+# tests/test_checkpoint.py
+import numpy as np
+import pandas as pd
+from google.cloud import firestore
+
+import data_processor
+from checkpoint import CheckpointStore, FirestoreCheckpointStore, frame_site_day_keys
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeDocument:
+    def __init__(self, store, document_id):
+        self.store = store
+        self.id = document_id
+
+    def get(self):
+        return FakeSnapshot(self.store.get(self.id))
+
+
+class FakeCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def document(self, document_id):
+        return FakeDocument(self.store, document_id)
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.writes = []
+
+    def set(self, document, data, merge=False):
+        self.writes.append((document, data))
+
+    def commit(self):
+        self.client.commits += 1
+        for document, data in self.writes:
+            current = dict(self.client.store.get(document.id, {}))
+            for field, value in data.items():
+                if isinstance(value, firestore.ArrayUnion):
+                    current[field] = sorted(set(current.get(field, [])) | set(value.values))
+                else:
+                    current[field] = value
+            self.client.store[document.id] = current
+
+
+class FakeFirestoreClient:
+    def __init__(self):
+        self.store = {}
+        self.commits = 0
+
+    def collection(self, name):
+        return FakeCollection(self.store)
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+def test_firestore_checkpoint_accumulates_dates_per_site_and_mode():
+    client = FakeFirestoreClient()
+    store = FirestoreCheckpointStore('kepco_checkpoints', client=client)
+
+    store.mark_done_many([('S1', '', '15m', '2024-01-01'), ('S1', '', '15m', '2024-01-02'),
+                          ('S1', '', '30m', '2024-01-01'), ('S/2', 'F', '15m', '2024-01-01')])
+    store.mark_done('S1', None, '15m', '2024-01-03')
+
+    # 재시작 후 같은 컬렉션을 다시 열어도 완료 날짜가 남아 있음
+    reopened = FirestoreCheckpointStore('kepco_checkpoints', client=client)
+    assert reopened.completed_dates('S1', '', '15m') == {'2024-01-01', '2024-01-02', '2024-01-03'}
+    assert reopened.completed_dates('S1', '', '30m') == {'2024-01-01'}
+    assert reopened.is_done('S/2', 'F', '15m', '2024-01-01')
+    assert not reopened.is_done('S/2', 'F', '30m', '2024-01-01')
+    assert client.commits == 2
+
+
+def test_sqlite_checkpoint_round_trip(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+    store.mark_done_many([('S1', '', '15m', '2024-01-01'), ('S1', None, '15m', '2024-01-02')])
+    store.close()
+
+    reopened = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+    assert reopened.completed_dates('S1', '', '15m') == {'2024-01-01', '2024-01-02'}
+    reopened.close()
+
+
+def test_firestore_document_ids_do_not_collide():
+    store = FirestoreCheckpointStore('kepco_checkpoints', client=FakeFirestoreClient())
+    store.mark_done('A/B', '', '15m', '2024-01-01')
+    assert store.completed_dates('A_B', '', '15m') == set()
+    assert '/' not in store._document_id('A/B', 'F/1', '15m')
+
+
+def _site_day(site_unit, date, mode='15m', slots=None, missing=()):
+    slots = np.arange(1, 97) if slots is None else slots
+    raw = pd.DataFrame({'Time': pd.array(slots, dtype='int16')})
+    for column in ('Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag',
+                   'CO2_t', 'PowerFactor_Lead', 'PowerFactor_Lag'):
+        raw[column] = np.float32(1)
+    # '-' 셀은 NaN으로 변환됨
+    raw.loc[raw['Time'].isin(missing), 'Usage_kWh'] = np.nan
+    site_day = data_processor.process_dataframe(raw, '15m', 'P1', site_unit, '', date)
+    return data_processor.resample_15m_to_30m(site_day) if mode == '30m' else site_day
+
+
+def test_only_complete_past_site_days_are_checkpointed():
+    frames = [
+        _site_day('S1', '2024-01-01'),
+        _site_day('S2', '2024-01-01', slots=np.arange(1, 60)),
+        _site_day('S3', '2024-01-01', missing=(96,)),
+        _site_day('S1', '2024-01-02'),
+    ]
+    merged = data_processor.merge_dataframes(frames, '15m')
+
+    keys = frame_site_day_keys(merged, '15m', today='2024-01-02')
+
+    assert keys == [('S1', '', '15m', '2024-01-01')]
+
+
+def test_complete_30m_site_day_is_checkpointed():
+    merged = data_processor.merge_dataframes([_site_day('S1', '2024-01-01', mode='30m')], '30m')
+    assert frame_site_day_keys(merged, '30m', today='2024-01-05') == [('S1', '', '30m', '2024-01-01')]
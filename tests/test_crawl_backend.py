@@ -0,0 +1,63 @@
+# tests/test_crawl_backend.py
+import pandas as pd
+
+from crawl_backend import HttpBackend
+
+EMPTY_TABLE = "<table id='tableListChart'><thead><tr><th>시간</th></tr></thead><tbody></tbody></table>"
+FILLED_TABLE = ("<table id='tableListChart'><tbody>"
+                "<tr><td>00:15</td><td>1</td><td>2</td><td>3</td><td>4</td><td>5</td><td>6</td><td>7</td></tr>"
+                "</tbody></table>")
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, text):
+        self.text = text
+
+    def post(self, url, data=None, timeout=None):
+        return FakeResponse(self.text)
+
+
+class FakeFallback:
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, date_string, mode, timer=None, recorder=None):
+        self.fetched.append((date_string, mode))
+        return pd.DataFrame({'Time': [1]})
+
+
+def _backend(text):
+    backend = HttpBackend(crawler=None, fallback=FakeFallback(), session=FakeSession(text))
+    backend.lookup_url = 'http://kepco.test/lookup'
+    return backend
+
+
+def test_empty_http_table_falls_back_to_selenium():
+    backend = _backend(EMPTY_TABLE)
+    recorded = []
+
+    df = backend.fetch('2024-01-01', '15m', recorder=lambda *args: recorded.append(args))
+
+    assert backend.fallback.fetched == [('2024-01-01', '15m')]
+    assert backend.consecutive_failures == 1
+    assert len(df) == 1
+    assert recorded == []
+
+
+def test_filled_http_table_resets_failure_count():
+    backend = _backend(FILLED_TABLE)
+    backend.consecutive_failures = 2
+
+    df = backend.fetch('2024-01-01', '15m')
+
+    assert backend.fallback.fetched == []
+    assert backend.consecutive_failures == 0
+    assert len(df) == 1
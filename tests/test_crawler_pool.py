@@ -0,0 +1,50 @@
+# tests/test_crawler_pool.py
+import crawler_pool
+from failures import CircuitBreaker, FailureTracker
+
+ROW = {'ID': 'acct', 'PW': 'pw', 'Site_Unit': 'S1', 'Factory': '', 'start_date': '2024-01-01', 'end_date': '2024-01-03'}
+
+
+def _half_open_tracker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=0)
+    breaker.record_failure('acct')
+    return FailureTracker(breaker=breaker)
+
+
+def _fake_crawl(monkeypatch, fail_dates=()):
+    fetched = []
+
+    def crawl_site_day(backend, row, current_date, need_15m, need_30m, emit, recorder=None, timer=None):
+        fetched.append(current_date)
+        if current_date in fail_dates:
+            raise RuntimeError('조회 실패')
+        return None
+
+    monkeypatch.setattr(crawler_pool, 'login_and_open', lambda *args: None)
+    monkeypatch.setattr(crawler_pool, 'crawl_site_day', crawl_site_day)
+    monkeypatch.setattr(crawler_pool, 'report_verification', lambda row, outcomes: None)
+    return fetched
+
+
+def test_half_open_trial_runs_first_date_and_closes_breaker(monkeypatch):
+    failures = _half_open_tracker()
+    fetched = _fake_crawl(monkeypatch)
+
+    crawler_pool.crawl_record(None, None, ROW, 'http://login', failures=failures, record_index=0)
+
+    assert fetched == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert failures.drain() == []
+    assert not failures.breaker.is_open('acct')
+
+
+def test_failed_half_open_trial_defers_remaining_dates(monkeypatch):
+    failures = _half_open_tracker()
+    failures.breaker.cooldown_sec = 3600
+    failures.breaker._opened_at['acct'] -= 3600
+    fetched = _fake_crawl(monkeypatch, fail_dates={'2024-01-01'})
+
+    crawler_pool.crawl_record(None, None, ROW, 'http://login', failures=failures, record_index=0)
+
+    assert fetched == ['2024-01-01']
+    reasons = [(item.date, item.reason) for item in failures.drain()]
+    assert reasons == [('2024-01-01', 'error'), ('2024-01-02', 'circuit_open'), ('2024-01-03', 'circuit_open')]
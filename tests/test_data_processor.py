@@ -0,0 +1,173 @@
+# tests/test_data_processor.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor
+import utils
+
+RAW_COLUMNS = ['Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag',
+               'CO2_t', 'PowerFactor_Lead', 'PowerFactor_Lag']
+
+
+def _raw(rows):
+    """
+    rows: [(슬롯 번호, 사용량, 최대수요, 진상 무효전력, 지상 무효전력, CO2), ...] → rows_to_dataframe 형태의 DataFrame
+    """
+    df = pd.DataFrame({'Time': pd.array([row[0] for row in rows], dtype='int16')})
+    for position, column in enumerate(RAW_COLUMNS[:5], 1):
+        df[column] = np.array([row[position] for row in rows], dtype='float32')
+    df['PowerFactor_Lead'] = np.float32(0)
+    df['PowerFactor_Lag'] = np.float32(0)
+    return df
+
+
+def test_resample_pairs_slots_and_aggregates():
+    site_day = data_processor.process_dataframe(_raw([
+        (1, 10, 40, 3, 0, 0.1),    # 00:15 ┐
+        (2, 20, 50, 4, 0, 0.2),    # 00:30 ┘→ 00:30
+        (3, 7, 7, 7, 7, 7),        # 00:45 (01:00 슬롯 없음 → 제외)
+        (93, 0, 0, 0, 0, 0),       # 23:15 ┐
+        (94, 0, 0, 0, 0, 0),       # 23:30 ┘→ 23:30
+        (95, 5, 8, 0, 2, 0),       # 23:45 ┐
+        (96, 5, 9, 0, 3, 0),       # 24:00 ┘→ 24:00
+    ]), '15m', 'P1', 'S1', '', '2024-01-01')
+
+    resampled = data_processor.resample_15m_to_30m(site_day)
+
+    assert list(resampled.columns) == data_processor.COLUMNS_30M + data_processor.METADATA_COLUMNS + ['Resolution']
+    assert resampled['Time'].dtype == 'int16'
+    assert [utils.SLOT_LABELS[slot] for slot in resampled['Time']] == ['00:30', '23:30', '24:00']
+    values = resampled[data_processor.COLUMNS_30M[1:]].to_numpy(dtype='float64')
+    expected = np.array([
+        # 사용량, 최대수요(max), 진상, 지상, CO2, 진상 역률, 지상 역률
+        [30, 50, 7, 0, 0.3, round(30 / np.sqrt(30 ** 2 + 7 ** 2) * 100, 2), 100.0],
+        [0, 0, 0, 0, 0, 0.0, 0.0],
+        [10, 9, 0, 5, 0, 100.0, round(10 / np.sqrt(10 ** 2 + 5 ** 2) * 100, 2)],
+    ])
+    np.testing.assert_allclose(values, expected, rtol=1e-6, atol=1e-5)
+    assert expected[0, 5] == 97.38
+    assert set(resampled['Resolution']) == {'30m'}
+    assert set(resampled['Date']) == {'2024-01-01'}
+
+
+def test_resample_drops_slots_with_missing_values():
+    raw = _raw([(1, 10, 1, 0, 0, 0), (2, 20, 1, 0, 0, 0), (3, 5, 1, 0, 0, 0), (4, 5, 1, 0, 0, 0)])
+    raw.loc[raw['Time'] == 4, 'Usage_kWh'] = np.nan
+    resampled = data_processor.resample_15m_to_30m(
+        data_processor.process_dataframe(raw, '15m', 'P1', 'S1', '', '2024-01-01'))
+
+    assert list(resampled['Time']) == [2, 4]
+    assert resampled['Electricity consumption_30m'].iloc[0] == 30
+    assert np.isnan(resampled['Electricity consumption_30m'].iloc[1])
+
+
+def test_compare_30m_reports_mismatched_and_missing_slots():
+    derived = data_processor.resample_15m_to_30m(data_processor.process_dataframe(
+        _raw([(1, 10, 40, 3, 0, 0.1), (2, 20, 50, 4, 0, 0.2), (95, 5, 8, 0, 2, 0), (96, 5, 9, 0, 3, 0)]),
+        '15m', 'P1', 'S1', '', '2024-01-01'))
+    crawled = derived.copy()
+    crawled.loc[crawled['Time'] == 96, 'Peak power_30m'] = np.float32(12)
+    crawled = pd.concat([crawled, crawled.iloc[[0]].assign(Time=np.int16(48))], ignore_index=True)
+
+    assert data_processor.compare_30m(derived, derived).empty
+
+    mismatches = data_processor.compare_30m(derived, crawled)
+    changed = mismatches[mismatches['Time'] == '24:00']
+    assert changed[['column', 'derived', 'crawled']].values.tolist() == [['Peak power_30m', 9.0, 12.0]]
+    # 재계산 쪽에 없는 12:00 슬롯은 모든 값이 불일치로 보고됨
+    missing = mismatches[mismatches['Time'] == '12:00']
+    assert len(missing) == len(data_processor.COLUMNS_30M) - 1
+    assert missing['derived'].isna().all()
+    assert len(mismatches) == 1 + len(missing)
+
+
+def test_compare_30m_tolerates_rounding():
+    derived = data_processor.resample_15m_to_30m(data_processor.process_dataframe(
+        _raw([(1, 10, 40, 3, 0, 0.1), (2, 20, 50, 4, 0, 0.2)]), '15m', 'P1', 'S1', '', '2024-01-01'))
+    crawled = derived.copy()
+    crawled['Electricity consumption_30m'] = crawled['Electricity consumption_30m'] + np.float32(0.005)
+    assert data_processor.compare_30m(derived, crawled).empty
+
+
+@pytest.mark.parametrize('bad_mode', ['5m', ''])
+def test_process_dataframe_rejects_unknown_mode(bad_mode):
+    with pytest.raises(ValueError):
+        data_processor.process_dataframe(_raw([(1, 1, 1, 1, 1, 1)]), bad_mode, 'P1', 'S1', '', '2024-01-01')
+
+
+MEASURES = ['Electricity consumption', 'Peak power', 'Leading reactive power', 'Lagging reactive power',
+            'CO2', 'Leading power factor', 'Lagging power factor']
+
+
+def _wide(mode, values_dtype='float64'):
+    """
+    merge_dataframes 결과와 같은 wide 포맷: 2개 사이트(공장 포함) x 날짜 경계를 넘는 4개 시각
+    """
+    suffix = '_30m' if mode == '30m' else ''
+    times = pd.to_datetime(['2023-12-31 23:30', '2024-01-01 00:00', '2024-01-01 00:30', '2024-01-01 01:00'])
+    df = pd.DataFrame({'DateTime': list(times) * 2})
+    rng = np.random.default_rng(0)
+    for name in MEASURES:
+        values = rng.uniform(0, 1000, len(df)).round(2)
+        values[3] = np.nan
+        df[name + suffix] = values.astype(values_dtype)
+    df['Project'] = ['P1'] * 4 + ['P2'] * 4
+    df['Site_Unit'] = ['S1'] * 4 + ['S2'] * 4
+    df['Factory'] = [''] * 4 + ['F2'] * 4
+    df['Resolution'] = mode
+    return df
+
+
+@pytest.mark.parametrize('mode', ['15m', '30m'])
+def test_transform_for_bigquery_matches_legacy_melt(mode):
+    import benchmark
+
+    wide = _wide(mode)
+
+    result = data_processor.transform_for_bigquery(wide, mode)
+    legacy = benchmark.legacy_transform_for_bigquery(wide, mode).drop(columns='insertion_time')
+
+    assert list(result.columns) == data_processor.BIGQUERY_COLUMNS
+    assert len(result) == len(wide) * len(MEASURES)
+    # 값/순서: melt와 같은 (측정 항목 → 원래 행) 순서
+    pd.testing.assert_frame_equal(
+        result.drop(columns=['resolution', 'insertion_time']).astype(legacy.dtypes.to_dict()),
+        legacy.reset_index(drop=True),
+    )
+    assert (result['resolution'] == mode).all()
+    # dtype: 시간은 datetime, 값은 float64, 문자열 컬럼은 categorical
+    assert pd.api.types.is_datetime64_any_dtype(result['measure_time'])
+    assert result['measure_value'].dtype == 'float64'
+    for column in ['measure_point', 'measure_unit', 'country', 'source_name',
+                   'business_unit', 'site_unit', 'factory', 'resolution']:
+        assert isinstance(result[column].dtype, pd.CategoricalDtype), column
+    assert str(result['insertion_time'].dt.tz) == 'UTC'
+
+
+def test_transform_for_bigquery_widens_float32_without_tail():
+    import benchmark
+
+    wide = _wide('15m', values_dtype='float32')
+
+    result = data_processor.transform_for_bigquery(wide, '15m')
+    expected = benchmark.legacy_transform_for_bigquery(_wide('15m'), '15m')
+
+    # float32 입력은 float64 원본 값(소수 둘째 자리)으로 복원되어야 함 (12345.669921875 같은 꼬리 없음)
+    np.testing.assert_array_equal(result['measure_value'].to_numpy(), expected['measure_value'].to_numpy())
+
+
+def test_transform_for_bigquery_accepts_datetime_strings():
+    wide = _wide('15m')
+    wide['DateTime'] = wide['DateTime'].dt.strftime('%Y-%m-%d %H:%M')
+
+    result = data_processor.transform_for_bigquery(wide, '15m')
+
+    assert result['measure_time'].iloc[1] == pd.Timestamp('2024-01-01 00:00')
+
+
+def test_transform_for_bigquery_empty_frame():
+    result = data_processor.transform_for_bigquery(_wide('15m').iloc[0:0], '15m')
+
+    assert result.empty
+    assert list(result.columns) == data_processor.BIGQUERY_COLUMNS
@@ -0,0 +1,254 @@
+# tests/test_google_service.py
+import threading
+import time
+
+import pandas as pd
+import pytest
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from google.cloud import bigquery
+
+import data_processor
+import google_service as gcp
+
+TABLE_ID = 'proj.dataset.power'
+
+
+class FakeBigQueryClient:
+    """
+    get_table/update_table만 흉내 내는 가짜 클라이언트. 실제 API처럼 etag가 바뀐 뒤의 update는 412로 실패합니다.
+    """
+
+    def __init__(self, schema):
+        self.schema = list(schema)
+        self.clustering_fields = None
+        self.etag = 0
+        self.updates = 0
+
+    def get_table(self, table_id):
+        table = bigquery.Table(table_id, schema=self.schema)
+        if self.clustering_fields:
+            table.clustering_fields = self.clustering_fields
+        table._properties['etag'] = str(self.etag)
+        time.sleep(0.05)
+        return table
+
+    def update_table(self, table, fields):
+        if table.etag != str(self.etag):
+            raise PreconditionFailed('etag mismatch')
+        self.schema = list(table.schema)
+        self.clustering_fields = table.clustering_fields
+        self.etag += 1
+        self.updates += 1
+        return table
+
+
+class FakeJob:
+    def __init__(self, error=None):
+        self.error = error
+        self.num_dml_affected_rows = 2
+        self.output_rows = 2
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self
+
+
+class FakeUpsertClient:
+    """
+    upsert_to_bigquery가 호출하는 API를 기록하는 가짜 클라이언트. 대상 테이블은 처음에 없습니다.
+    """
+
+    def __init__(self, query_error=None):
+        self.query_error = query_error
+        self.tables = {}
+        self.loaded = {}
+        self.queries = []
+        self.deleted = []
+
+    def get_table(self, table_id):
+        if table_id not in self.tables:
+            raise NotFound(table_id)
+        return self.tables[table_id]
+
+    def create_table(self, table, exists_ok=False):
+        self.tables[f"{table.project}.{table.dataset_id}.{table.table_id}"] = table
+        return table
+
+    def load_table_from_file(self, buffer, table_id, job_config=None):
+        self.loaded[table_id] = pd.read_parquet(buffer)
+        return FakeJob()
+
+    def query(self, query, job_config=None):
+        self.queries.append((query, {param.name: param.value for param in job_config.query_parameters}))
+        return FakeJob(self.query_error)
+
+    def delete_table(self, table_id, not_found_ok=False):
+        self.deleted.append(table_id)
+        self.tables.pop(table_id, None)
+
+
+def _long_frame():
+    return pd.DataFrame({
+        'measure_time': pd.to_datetime(['2024-01-01 00:15', '2024-01-01 00:30']),
+        'measure_point': ['active_power', 'active_power'],
+        'measure_value': [1.5, 2.5],
+        'measure_unit': ['kWh', 'kWh'],
+        'country': ['KR', 'KR'],
+        'source_name': ['KEPCO', 'KEPCO'],
+        'business_unit': ['P1', 'P1'],
+        'site_unit': ['S1', 'S1'],
+        'factory': ['', ''],
+        'resolution': ['15m', '15m'],
+        'insertion_time': pd.Timestamp('2024-01-02', tz='UTC'),
+    })
+
+
+@pytest.fixture(autouse=True)
+def _reset_registry():
+    gcp.reset_clients()
+    yield
+    gcp.reset_clients()
+
+
+def test_concurrent_ensure_updates_existing_table_once():
+    # resolution 컬럼과 클러스터링이 없는 기존(autodetect) 테이블
+    client = FakeBigQueryClient([field for field in gcp.BIGQUERY_SCHEMA if field.name != 'resolution'])
+    errors = []
+
+    def ensure():
+        try:
+            gcp.ensure_bigquery_table(client, TABLE_ID)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=ensure) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert client.updates == 1
+    assert 'resolution' in [field.name for field in client.schema]
+
+
+def test_merge_query_matches_on_keys_and_updates_other_columns():
+    columns = [field.name for field in gcp.BIGQUERY_SCHEMA]
+    query = gcp._build_merge_query(TABLE_ID, TABLE_ID + '__staging', columns, 'DATETIME')
+
+    assert f"MERGE `{TABLE_ID}` T" in query
+    assert f"FROM `{TABLE_ID}__staging`" in query
+    assert "T.measure_time BETWEEN CAST(@min_time AS DATETIME) AND CAST(@max_time AS DATETIME)" in query
+    assert "T.measure_time = S.measure_time" in query
+    for key in ('measure_point', 'site_unit', 'factory', 'resolution'):
+        assert f"IFNULL(T.{key}, '') = IFNULL(S.{key}, '')" in query
+    # staging 안의 중복 키는 마지막 insertion_time 1건만 사용
+    assert f"PARTITION BY {', '.join(gcp.BIGQUERY_MERGE_KEYS)} ORDER BY insertion_time DESC" in query
+    update_clause = query.split('UPDATE SET')[1].split('WHEN NOT MATCHED')[0]
+    assert 'measure_value = S.measure_value' in update_clause
+    assert all(f"{key} = S." not in update_clause for key in gcp.BIGQUERY_MERGE_KEYS)
+    assert f"INSERT ({', '.join(columns)})" in query
+
+
+def test_upsert_loads_staging_merges_and_drops_staging(monkeypatch):
+    client = FakeUpsertClient()
+    monkeypatch.setattr(gcp, 'get_bigquery_client', lambda project_id: client)
+
+    gcp.upsert_to_bigquery(_long_frame(), TABLE_ID)
+
+    (staging_id, staged), = client.loaded.items()
+    assert staging_id.startswith(TABLE_ID + '__staging_')
+    assert len(staged) == 2
+    (query, params), = client.queries
+    assert f"FROM `{staging_id}`" in query
+    assert params == {'min_time': '2024-01-01 00:15:00', 'max_time': '2024-01-01 00:30:00'}
+    assert client.deleted == [staging_id]
+    assert TABLE_ID in client.tables
+
+
+def test_upsert_drops_staging_when_merge_fails(monkeypatch):
+    client = FakeUpsertClient(query_error=RuntimeError('merge failed'))
+    monkeypatch.setattr(gcp, 'get_bigquery_client', lambda project_id: client)
+
+    with pytest.raises(RuntimeError):
+        gcp.upsert_to_bigquery(_long_frame(), TABLE_ID)
+    assert len(client.deleted) == 1
+
+
+def test_upsert_requires_key_columns():
+    with pytest.raises(ValueError, match='resolution'):
+        gcp.upsert_to_bigquery(_long_frame().drop(columns=['resolution']), TABLE_ID)
+
+
+@pytest.mark.parametrize('mode', ['15m', '30m'])
+def test_transformed_frame_has_every_merge_key(mode):
+    raw = pd.DataFrame({'Time': pd.array([2, 4], dtype='int16')})
+    for column in ('Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag',
+                   'CO2_t', 'PowerFactor_Lead', 'PowerFactor_Lag'):
+        raw[column] = pd.array([1.0, 2.0], dtype='float32')
+    site_day = data_processor.process_dataframe(raw, mode, 'P1', 'S1', '', '2024-01-01')
+    transformed = data_processor.transform_for_bigquery(data_processor.merge_dataframes([site_day], mode), mode)
+
+    assert set(gcp.BIGQUERY_MERGE_KEYS) <= set(transformed.columns)
+    assert set(transformed['resolution']) == {mode}
+
+
+class SlowLoadClient(FakeUpsertClient):
+    """
+    적재 job이 0.2초 걸리는 가짜 클라이언트. 동시에 실행 중인 적재/MERGE 수의 최댓값을 기록합니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def _busy(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.2)
+        with self._lock:
+            self.running -= 1
+
+    def load_table_from_file(self, buffer, table_id, job_config=None):
+        if '__staging_' not in table_id:
+            self._busy()
+        return super().load_table_from_file(buffer, table_id, job_config)
+
+    def query(self, query, job_config=None):
+        self._busy()
+        return super().query(query, job_config)
+
+
+def _load_concurrently(client, monkeypatch, load_mode):
+    monkeypatch.setattr(gcp, 'get_bigquery_client', lambda project_id: client)
+    errors = []
+
+    def load():
+        try:
+            gcp.upload_to_bigquery(_long_frame(), TABLE_ID, load_mode=load_mode)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_append_loads_to_same_table_run_concurrently(monkeypatch):
+    client = SlowLoadClient()
+    _load_concurrently(client, monkeypatch, 'append')
+    assert client.max_running == 2
+
+
+def test_upsert_merges_to_same_table_are_serialized(monkeypatch):
+    client = SlowLoadClient()
+    _load_concurrently(client, monkeypatch, 'upsert')
+    assert len(client.queries) == 2
+    assert client.max_running == 1
@@ -0,0 +1,49 @@
+# tests/test_output_writer.py
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import data_processor
+from output_writer import ParquetOutputWriter
+
+
+def _merged_15m(dates, sites=('S1', 'S2')):
+    frames = []
+    for date in dates:
+        for site in sites:
+            raw = pd.DataFrame({'Time': pd.array(np.arange(1, 97), dtype='int16')})
+            for column in ('Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag',
+                           'CO2_t', 'PowerFactor_Lead', 'PowerFactor_Lag'):
+                raw[column] = np.float32(1)
+            frames.append(data_processor.process_dataframe(raw, '15m', 'P1', site, '', date))
+    return data_processor.merge_dataframes(frames, '15m')
+
+
+def test_parquet_writes_one_row_group_per_date(tmp_path):
+    dates = ['2024-01-03', '2024-01-01', '2024-01-02']
+    writer = ParquetOutputWriter(str(tmp_path / 'out.parquet'))
+    writer.write(_merged_15m(dates))
+    writer.write(_merged_15m(['2024-01-04']))
+    path = writer.close()
+
+    metadata = pq.ParquetFile(path).metadata
+    date_column = metadata.schema.names.index('Date')
+    groups = [metadata.row_group(index) for index in range(metadata.num_row_groups)]
+    assert [(group.column(date_column).statistics.min, group.column(date_column).statistics.max) for group in groups] == [
+        ('2024-01-01', '2024-01-01'), ('2024-01-02', '2024-01-02'),
+        ('2024-01-03', '2024-01-03'), ('2024-01-04', '2024-01-04'),
+    ]
+    assert all(group.num_rows == 2 * 96 for group in groups)
+    assert len(pq.read_table(path, filters=[('Date', '=', '2024-01-02')])) == 2 * 96
+
+
+def test_parquet_accepts_later_batch_with_more_categories(tmp_path):
+    writer = ParquetOutputWriter(str(tmp_path / 'out.parquet'))
+    writer.write(_merged_15m(['2024-01-01']))
+    many_sites = [f'S{index:03d}' for index in range(141)]
+    writer.write(_merged_15m(['2024-01-02'], sites=many_sites))
+    path = writer.close()
+
+    table = pq.read_table(path)
+    assert table.num_rows == (2 + 141) * 96
+    assert set(table.column('Site_Unit').to_pylist()) == {'S1', 'S2', *many_sites}
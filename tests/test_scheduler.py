@@ -0,0 +1,58 @@
+# tests/test_scheduler.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import TimeoutException
+
+import scheduler
+from config import RETRY_MAX_ATTEMPTS
+from failures import CircuitBreaker, FailureTracker
+
+ROW = {'ID': 'acct', 'PW': 'pw', 'Site_Unit': 'S1', 'Factory': '', 'start_date': '2024-01-01', 'end_date': '2024-01-01'}
+
+
+def _run_item(monkeypatch, failures_before_success):
+    """
+    _crawl_day가 failures_before_success번 TimeoutException을 던진 뒤 성공하도록 하고 _run_item을 실행합니다.
+    Returns:
+        (시도 횟수, 백오프 대기 시간 목록, 보류된 site-day 목록)
+    """
+    failures = FailureTracker(breaker=CircuitBreaker(failure_threshold=0))
+    crawl_scheduler = scheduler.CrawlScheduler([ROW], 'http://login', failures=failures, backoff_sec=1.0)
+    crawl_scheduler._plans[1] = (ROW, set(), set())
+    attempts = []
+    delays = []
+
+    def crawl_day(worker, idx, current_date, need_15m, need_30m, emit, opened_record):
+        attempts.append(current_date)
+        if len(attempts) <= failures_before_success:
+            raise TimeoutException('backgroundLayer 대기 시간 초과')
+        return idx
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(crawl_scheduler, '_crawl_day', crawl_day)
+    monkeypatch.setattr(scheduler.random, 'uniform', lambda low, high: 1.0)
+    monkeypatch.setattr(scheduler.asyncio, 'sleep', fake_sleep)
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return await crawl_scheduler._run_item(asyncio.get_running_loop(), executor, None, 1, '2024-01-01', None)
+
+    asyncio.run(run())
+    return len(attempts), delays, failures.drain()
+
+
+def test_timeout_is_retried_with_doubling_backoff(monkeypatch):
+    attempts, delays, deferred = _run_item(monkeypatch, failures_before_success=2)
+    assert attempts == 3
+    assert delays == [1.0, 2.0]
+    assert deferred == []
+
+
+def test_timeout_gives_up_after_max_attempts(monkeypatch):
+    attempts, delays, deferred = _run_item(monkeypatch, failures_before_success=100)
+    assert attempts == RETRY_MAX_ATTEMPTS + 1
+    assert delays == [2.0 ** attempt for attempt in range(RETRY_MAX_ATTEMPTS)]
+    assert [(item.date, item.reason) for item in deferred] == [('2024-01-01', 'timeout')]
@@ -0,0 +1,62 @@
+# tests/test_streaming_uploader.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor
+from streaming_uploader import StreamingUploader
+
+
+class RecordingSink:
+    name = 'recording'
+
+    def __init__(self):
+        self.batches = []
+
+    def write(self, mode, merged_df):
+        self.batches.append((mode, merged_df))
+
+
+def _site_day(site_unit, date):
+    raw = pd.DataFrame({'Time': np.arange(1, 97, dtype='int16')})
+    for column in ['Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag', 'CO2_t',
+                   'PowerFactor_Lead', 'PowerFactor_Lag']:
+        raw[column] = np.ones(96, dtype='float32')
+    return data_processor.process_dataframe(raw, '15m', 'P1', site_unit, '', date)
+
+
+def _uploader(**kwargs):
+    uploader = StreamingUploader('project.dataset.table', **kwargs)
+    uploader._sink = RecordingSink()
+    return uploader
+
+
+def test_close_flushes_buffered_site_days():
+    uploader = _uploader(max_rows=10_000, max_seconds=3600)
+    uploader.submit('15m', _site_day('S1', '2024-01-01'))
+    uploader.submit('15m', _site_day('S2', '2024-01-01'))
+
+    stats = uploader.close()
+
+    assert stats['batches'] == 1 and stats['rows'] == 192
+    [(mode, merged)] = uploader._sink.batches
+    assert mode == '15m'
+    assert list(merged['Site_Unit'].unique()) == ['S1', 'S2']
+
+
+def test_background_error_is_raised_instead_of_blocking():
+    uploader = _uploader(max_pending=1)
+    # 컬럼이 맞지 않는 site-day: FrameAccumulator.append에서 예외 → 백그라운드 스레드 종료
+    uploader.submit('15m', _site_day('S1', '2024-01-01').drop(columns='Time'))
+    uploader._thread.join(timeout=5)
+    assert not uploader._thread.is_alive()
+
+    # 큐가 가득 차도 막히지 않고 기록된 예외를 다시 발생시킴
+    with pytest.raises(RuntimeError, match='스트리밍 업로드 스레드') as excinfo:
+        for _ in range(3):
+            uploader.submit('15m', _site_day('S2', '2024-01-01'))
+    assert isinstance(excinfo.value.__cause__, KeyError)
+
+    with pytest.raises(RuntimeError, match='스트리밍 업로드 스레드'):
+        uploader.close()
+    assert uploader._sink.batches == []
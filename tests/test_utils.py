@@ -0,0 +1,56 @@
+# tests/test_utils.py
+import pandas as pd
+import pytest
+
+import utils
+
+BOUNDARY_DATES = ['2023-12-31', '2024-01-31', '2024-02-28', '2024-02-29', '2023-02-28', '2024-06-15']
+
+
+def _date_time_frame(dates, labels):
+    return pd.DataFrame({
+        'Date': [date for date in dates for _ in labels],
+        'Time': [label for _ in dates for label in labels],
+    })
+
+
+def _legacy(frame):
+    return pd.to_datetime(frame.apply(utils.fix_datetime, axis=1))
+
+
+def test_build_datetime_matches_fix_datetime_for_labels():
+    frame = _date_time_frame(BOUNDARY_DATES, utils.SLOT_LABELS[1:])
+
+    result = utils.build_datetime(frame['Date'], frame['Time'])
+
+    pd.testing.assert_series_equal(result, _legacy(frame), check_names=False)
+
+
+def test_build_datetime_matches_fix_datetime_for_slot_numbers():
+    frame = _date_time_frame(BOUNDARY_DATES, utils.SLOT_LABELS[1:])
+    slots = pd.Series(utils.parse_time_slots(frame['Time'].tolist()), dtype='int16')
+
+    result = utils.build_datetime(frame['Date'], slots)
+
+    pd.testing.assert_series_equal(result, _legacy(frame), check_names=False)
+
+
+@pytest.mark.parametrize('date, expected', [
+    ('2023-12-31', '2024-01-01 00:00'),
+    ('2024-01-31', '2024-02-01 00:00'),
+    ('2024-02-28', '2024-02-29 00:00'),
+    ('2024-02-29', '2024-03-01 00:00'),
+    ('2023-02-28', '2023-03-01 00:00'),
+])
+def test_build_datetime_rolls_midnight_into_next_day(date, expected):
+    dates = pd.Series([date, date])
+    labels = utils.build_datetime(dates, pd.Series(['24:00', '24:00']))
+    slots = utils.build_datetime(dates, pd.Series([96, 96], dtype='int16'))
+
+    assert list(labels) == [pd.Timestamp(expected)] * 2
+    assert list(slots) == [pd.Timestamp(expected)] * 2
+
+
+def test_build_datetime_rejects_bad_date():
+    with pytest.raises(ValueError):
+        utils.build_datetime(pd.Series(['2024-13-01']), pd.Series(['00:15']))
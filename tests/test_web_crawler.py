@@ -0,0 +1,101 @@
+# tests/test_web_crawler.py
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from replay import make_table_rows
+from web_crawler import TABLE_COLUMNS, WebCrawler, rows_to_dataframe
+
+
+class FakeDriver:
+    """
+    lookup_state의 execute_script 결과를 순서대로 돌려주는 가짜 드라이버 (마지막 상태는 계속 유지).
+    """
+
+    def __init__(self, states):
+        self.states = list(states)
+
+    def execute_script(self, script, *args):
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+
+def _state(rows=96, hash=7, marked=False, date='2024-01-02', mode='15'):
+    return {'rows': rows, 'hash': hash, 'marked': marked, 'date': date, 'mode': mode}
+
+
+OLD = _state(date='2024-01-01', marked=True)
+
+
+def test_identical_content_counts_as_refreshed_when_tbody_replaced():
+    crawler = WebCrawler(FakeDriver([_state()]))
+    assert crawler.wait_for_table_refresh(OLD, '2024-01-02', '15', timeout=1) is True
+
+
+def test_replaced_but_empty_tbody_is_not_refreshed():
+    driver = FakeDriver([_state(rows=0), _state(rows=0), _state()])
+    crawler = WebCrawler(driver)
+    assert crawler.wait_for_table_refresh(OLD, '2024-01-02', '15', timeout=2) is True
+    assert driver.states == [_state()]
+
+
+def test_table_for_other_date_or_mode_raises():
+    crawler = WebCrawler(FakeDriver([_state(date='2024-01-01')]))
+    with pytest.raises(TimeoutException):
+        crawler.wait_for_table_refresh(OLD, '2024-01-02', '15', timeout=0.5)
+
+    crawler = WebCrawler(FakeDriver([_state(mode='30')]))
+    with pytest.raises(TimeoutException):
+        crawler.wait_for_table_refresh(OLD, '2024-01-02', '15', timeout=0.5)
+
+
+def test_date_format_difference_is_ignored():
+    crawler = WebCrawler(FakeDriver([_state(date='20240102')]))
+    assert crawler.wait_for_table_refresh(OLD, '2024-01-02', '15', timeout=1) is True
+
+
+def test_unchanged_marked_table_raises_instead_of_reading_stale_rows():
+    crawler = WebCrawler(FakeDriver([_state(marked=True, hash=OLD['hash'])]))
+    with pytest.raises(TimeoutException):
+        crawler.wait_for_table_refresh(OLD, '2024-01-02', '15', timeout=0.5)
+
+
+def _table_rows(mode='15m'):
+    # parse_table_html/EXTRACT_ROWS_SCRIPT처럼 쉼표를 제거한 셀 문자열
+    return [[cell.replace(',', '') for cell in row] for row in make_table_rows(mode)]
+
+
+def test_rows_to_dataframe_splits_left_and_right_halves():
+    df = rows_to_dataframe(_table_rows())
+
+    assert list(df.columns) == TABLE_COLUMNS
+    assert df['Time'].dtype == 'int16'
+    assert sorted(df['Time']) == list(range(1, 97))
+    assert (df.dtypes[1:] == 'float32').all()
+    assert not df.isna().any().any()
+
+
+def test_rows_to_dataframe_partial_day_becomes_nan():
+    rows = _table_rows()
+    # 당일 진행 중: 뒤쪽 시간대(우측 절반)는 값 없이 '-' 또는 빈 셀
+    for row in rows:
+        row[9:] = ['-'] * 6 + ['']
+
+    df = rows_to_dataframe(rows)
+
+    assert len(df) == 96
+    later = df['Time'] > 48
+    assert df.loc[later, TABLE_COLUMNS[1:]].isna().all().all()
+    assert not df.loc[~later, TABLE_COLUMNS[1:]].isna().any().any()
+
+
+def test_rows_to_dataframe_raises_with_row_and_column():
+    rows = _table_rows()
+    rows[3][8 + 2] = '12a.5'     # 4번째 행 우측 절반의 MaxDemand_kW
+    rows[5][0] = '25:00'
+
+    with pytest.raises(ValueError) as excinfo:
+        rows_to_dataframe(rows)
+
+    message = str(excinfo.value)
+    assert "셀 2개" in message
+    assert f"행 3 Time={rows[3][8]} MaxDemand_kW: '12a.5'" in message
+    assert "행 5 Time=25:00 Time: '25:00'" in message
@@ -1,15 +1,23 @@
 # utils.py
 import os
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
+import metrics
+
 def ensure_dir_exists(path):
     try:
         os.makedirs(path, exist_ok=True)
     except Exception as e:
         raise RuntimeError(f"[ERROR] 디렉토리 생성 실패: {path}, 에러: {e}")
 
-def generate_date_range(start_date_str, end_date_str, date_format='%Y-%m-%d'):
+def generate_date_range(start_date_str, end_date_str, date_format='%Y-%m-%d', skip_dates=None):
+    """
+    start~end 날짜 문자열을 하루씩 생성합니다. skip_dates에 있는 날짜(체크포인트 완료분)는 건너뜁니다.
+    """
     try:
         start_date = datetime.strptime(start_date_str, date_format)
         end_date = datetime.strptime(end_date_str, date_format)
@@ -19,8 +27,11 @@ def generate_date_range(start_date_str, end_date_str, date_format='%Y-%m-%d'):
     if start_date > end_date:
         raise ValueError(f"[ERROR] 시작일({start_date_str})이 종료일({end_date_str})보다 늦습니다.")
 
+    skip_dates = skip_dates or set()
     while start_date <= end_date:
-        yield start_date.strftime(date_format)
+        date_str = start_date.strftime(date_format)
+        if date_str not in skip_dates:
+            yield date_str
         start_date += timedelta(days=1)
 
 def fix_datetime(row):
@@ -34,3 +45,76 @@ def fix_datetime(row):
         raise ValueError(f"[ERROR] DateTime 생성 실패 - Date: {row.get('Date')}, Time: {row.get('Time')}, 에러: {e}")
 
 
+
+
+# 시간 슬롯: 조회 결과의 Time('HH:MM', 구간 끝 시각)을 15분 단위 번호로 저장 (00:15 → 1, 24:00 → 96)
+# 30분 데이터도 같은 번호 체계를 사용합니다 (00:30 → 2, 24:00 → 96)
+SLOT_MINUTES = 15
+SLOT_LABELS = [f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in range(0, 24 * 60 + 1, SLOT_MINUTES)]
+_SLOT_BY_LABEL = {label: slot for slot, label in enumerate(SLOT_LABELS) if slot > 0}
+
+
+def parse_time_slots(values):
+    """
+    'HH:MM' 문자열 목록을 슬롯 번호(int16) 배열로 변환합니다. 인식할 수 없는 값은 -1입니다.
+    """
+    return np.fromiter((_SLOT_BY_LABEL.get(value, -1) for value in values), dtype='int16', count=len(values))
+
+
+def time_labels(times: pd.Series):
+    """
+    슬롯 번호 Time 컬럼을 'HH:MM' categorical로 바꿉니다(파일 출력용). 이미 문자열이면 그대로 반환합니다.
+    """
+    if not pd.api.types.is_integer_dtype(times):
+        return times
+    return pd.Categorical.from_codes(times.to_numpy(), categories=SLOT_LABELS)
+
+
+def build_datetime(dates: pd.Series, times: pd.Series) -> pd.Series:
+    """
+    fix_datetime의 벡터화 버전. 'YYYY-MM-DD' 날짜 컬럼과 Time 컬럼(슬롯 번호 또는 'HH:MM' 문자열)으로
+    datetime 컬럼을 만들고, 24:00(슬롯 96)은 다음날 00:00으로 변환합니다.
+    """
+    if pd.api.types.is_integer_dtype(times):
+        try:
+            base = pd.to_datetime(dates, format='%Y-%m-%d')
+        except Exception as e:
+            raise ValueError(f"[ERROR] DateTime 생성 실패, 에러: {e}")
+        return base + pd.to_timedelta(times.to_numpy(dtype='int64') * SLOT_MINUTES, unit='m')
+
+    is_midnight = times == '24:00'
+    try:
+        base = pd.to_datetime(dates + ' ' + times.mask(is_midnight, '00:00'), format='%Y-%m-%d %H:%M')
+    except Exception as e:
+        raise ValueError(f"[ERROR] DateTime 생성 실패, 에러: {e}")
+    return base + pd.to_timedelta(is_midnight.astype('int64'), unit='D')
+
+
+class StepTimer:
+    """
+    단계별 소요 시간을 기록하는 간단한 타이머.
+    with timer.step('click_lookup'): ... 형태로 사용합니다. 각 단계는 metrics에도 'step.<name>'으로 집계됩니다.
+    """
+
+    def __init__(self):
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.steps.append((name, seconds))
+            metrics.record(f'step.{name}', seconds)
+
+    def total(self, suffix=''):
+        return sum(seconds for name, seconds in self.steps if name.endswith(suffix))
+
+    def report(self, label, baseline_wait_sec=None):
+        parts = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.steps)
+        print(f"[TIMING] {label}: 총 {self.total():.2f}s ({parts})")
+        if baseline_wait_sec is not None:
+            waited = self.total('_wait')
+            print(f"[TIMING] {label}: 대기 {waited:.2f}s / 기존 고정 대기 {baseline_wait_sec:.2f}s (절감 {baseline_wait_sec - waited:.2f}s)")
@@ -1,20 +1,49 @@
 # web_crawler.py
-import time
+from collections import namedtuple
+
+import numpy as np
 import pandas as pd
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, ElementNotInteractableException
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+import metrics
+import utils
+from failures import get_artifact_store
+from config import MEASURE_DTYPE
+
+
+def _digits(value):
+    # 날짜 표기(2024-01-01 / 20240101 등) 차이를 무시하고 비교
+    return ''.join(ch for ch in str(value or '') if ch.isdigit())
+
 
 class WebCrawler:
-    def __init__(self, driver):
+    def __init__(self, driver, artifacts=None):
         self.driver = driver
+        # 오류 스크린샷 저장소 (개수/용량 상한이 있는 ArtifactStore)
+        self.artifacts = artifacts if artifacts is not None else get_artifact_store()
+        # 현재 브라우저 세션에 로그인된 계정 ID (같은 ID의 레코드는 로그인 재사용)
+        self.logged_in_as = None
+        self._window_ready = False
 
+    @metrics.timed('web.login')
     def login(self, user_id, password, login_url, id_selector, pw_selector, submit_selector):
+        if self.logged_in_as == user_id and self.is_session_alive():
+            print(f"[INFO] 기존 로그인 세션 재사용: {user_id}")
+            return
+
+        # 다른 계정이 로그인되어 있으면 쿠키/스토리지를 비워 계정 간 상태가 섞이지 않게 함
+        if self.logged_in_as is not None:
+            self.reset_session()
+
         try:
             self.driver.get(login_url)
-            self.driver.maximize_window()
+            if not self._window_ready:
+                self.driver.maximize_window()
+                self._window_ready = True
             WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, id_selector))
             )
@@ -25,28 +54,62 @@ class WebCrawler:
             WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.ID, "SELECT_DT"))
             )
+            self.logged_in_as = user_id
             print("[INFO] 로그인 성공")
         except Exception as e:
+            self.logged_in_as = None
             print(f"[ERROR] 로그인 실패: {e}")
             raise
+        self.handle_popup()
 
+    def is_session_alive(self):
+        """
+        현재 페이지에 조회 폼(SELECT_DT)이 있으면 로그인 세션이 유효한 것으로 봅니다. 대기하지 않습니다.
+        """
+        try:
+            return bool(self.driver.find_elements(By.ID, "SELECT_DT"))
+        except Exception:
+            return False
+
+    @metrics.timed('web.reset_session')
+    def reset_session(self):
+        """
+        드라이버를 재시작하지 않고 쿠키와 localStorage/sessionStorage를 비워 로그아웃 상태로 만듭니다.
+        """
+        try:
+            self.driver.delete_all_cookies()
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception as e:
+            print(f"[WARN] 세션 초기화 중 오류: {e}")
+        finally:
+            self.logged_in_as = None
+        print("[INFO] 이전 계정 세션 초기화 완료")
+
+    @metrics.timed('web.handle_popup')
     def handle_popup(self):
+        """
+        "확인" 버튼(비밀번호 변경 안내 팝업)이 현재 보이는 경우에만 닫습니다. 팝업이 없으면 기다리지 않습니다.
+        """
         try:
-            # "확인" 버튼을 찾고 클릭
-            ok_button = WebDriverWait(self.driver, 3).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[text()='확인']"))
-            )
-            ok_button.click()
-            print("[INFO] 비밀번호 변경 팝업 닫힘")
+            buttons = self.driver.find_elements(By.XPATH, "//button[text()='확인']")
+            for ok_button in buttons:
+                if ok_button.is_displayed():
+                    ok_button.click()
+                    print("[INFO] 비밀번호 변경 팝업 닫힘")
+                    return True
         except Exception:
             # 팝업이 없거나 실패해도 무시하고 진행
             pass
+        return False
 
+    @metrics.timed('web.move_to_data_page')
     def move_to_data_page(self, url):
         self.driver.get(url)
         WebDriverWait(self.driver, 10).until(
             EC.presence_of_element_located((By.ID, "SELECT_DT"))
         )
+
+    @metrics.timed('web.set_date')
     def set_date(self, date_string: str):
             try:
                 self.driver.execute_script(
@@ -58,17 +121,21 @@ class WebCrawler:
                 print(f"[ERROR] 날짜 필드 설정 실패: {e}")
                 raise
 
+    @metrics.timed('web.wait_for_background_disappear')
     def wait_for_background_disappear(self):
         try:
             WebDriverWait(self.driver, 30).until(
                 EC.invisibility_of_element_located((By.ID, "backgroundLayer"))
             )
         except TimeoutException:
+            # 로딩 중인 테이블을 읽지 않도록 호출자(스케줄러 재시도 등)에 그대로 전달
             print(f"[WARN] backgroundLayer 비활성화 대기 시간 초과")
+            raise
 
 
 
 
+    @metrics.timed('web.set_mode_15m')
     def set_mode_15m(self):
         try:
             radio_button = WebDriverWait(self.driver, 10).until(
@@ -76,8 +143,8 @@ class WebCrawler:
             )
             if not radio_button.is_selected():
                 radio_button.click()
-                # 실제 상태 변경 검증
-                if radio_button.is_selected():
+                # 실제 상태 변경 검증 (고정 대기 대신 선택 상태가 될 때까지 대기)
+                if self._wait_selected(radio_button):
                     print(f"[INFO] 15분 모드 선택 완료.")
                     return True
                 else:
@@ -93,6 +160,7 @@ class WebCrawler:
             print(f"[ERROR] 15분 모드 설정 중 예외: {e}")
             return False
 
+    @metrics.timed('web.set_mode_30m')
     def set_mode_30m(self):
         try:
             radio_button = WebDriverWait(self.driver, 10).until(
@@ -100,9 +168,12 @@ class WebCrawler:
             )
             if not radio_button.is_selected():
                 radio_button.click()
-                if radio_button.is_selected():
+                if self._wait_selected(radio_button):
                     print(f"[INFO] 30분 모드 선택 완료.")
                     return True
+                else:
+                    print(f"[ERROR] 30분 모드 클릭했지만 선택되지 않음")
+                    return False
             else:
                 print(f"[INFO] 30분 모드 이미 선택됨.")
                 return True
@@ -113,6 +184,13 @@ class WebCrawler:
             print(f"[ERROR] 30분 모드 설정 중 예외: {e}")
             return False
 
+    def _wait_selected(self, element, timeout=5):
+        try:
+            WebDriverWait(self.driver, timeout).until(EC.element_to_be_selected(element))
+            return True
+        except TimeoutException:
+            return False
+
     def debug_lookup_button(self):
         # 모든 가능한 조회 버튼 셀렉터 확인
         selectors = [
@@ -139,7 +217,78 @@ class WebCrawler:
             except Exception as e:
                 print(f"[DEBUG] 셀렉터 {i+1} 오류: {selector} - {e}")
 
-    def click_lookup(self):
+    def lookup_state(self, table_id='tableListChart', mark=False):
+        """
+        조회 결과 테이블의 상태(행 수, 텍스트 해시, 조회 전 표시 남아 있음 여부)와 폼의 날짜(SELECT_DT)/모드(T_MODE)를
+        한 번에 읽습니다. mark=True이면 현재 tbody에 조회 전 표시를 남깁니다. 테이블이 없으면 None.
+        """
+        return self.driver.execute_script("""
+            var table = document.getElementById(arguments[0]);
+            if (!table) { return null; }
+            var bodies = table.tBodies;
+            if (arguments[1]) {
+                for (var b = 0; b < bodies.length; b++) { bodies[b].setAttribute('data-before-lookup', '1'); }
+            }
+            var text = table.innerText || '';
+            var hash = 0;
+            for (var i = 0; i < text.length; i++) { hash = (hash * 31 + text.charCodeAt(i)) | 0; }
+            var date = document.getElementById('SELECT_DT');
+            var mode = document.querySelector("input[name='T_MODE']:checked");
+            return {
+                rows: table.querySelectorAll('tbody tr').length,
+                hash: hash,
+                marked: table.querySelector('tbody[data-before-lookup]') !== null,
+                date: date ? date.value : null,
+                mode: mode ? mode.value : null
+            };
+        """, table_id, mark)
+
+    def table_outer_html(self, table_id='tableListChart'):
+        """
+        조회 결과 테이블의 outerHTML (fixture 기록용). 테이블이 없으면 빈 문자열.
+        """
+        return self.driver.execute_script(
+            "var table = document.getElementById(arguments[0]); return table ? table.outerHTML : '';", table_id
+        )
+
+    @metrics.timed('web.wait_for_table_refresh')
+    def wait_for_table_refresh(self, old_state, expected_date=None, expected_mode=None,
+                               table_id='tableListChart', timeout=15):
+        """
+        조회 클릭 이후 결과 테이블이 다시 그려질 때까지 대기합니다.
+        old_state는 클릭 직전 lookup_state(mark=True) 결과입니다. 행이 채워져 있고, tbody가 교체(조회 전 표시가
+        사라짐)되었거나 내용이 바뀌었으면 갱신된 것으로 봅니다. 내용이 전날과 같아도(유휴 사이트 등) tbody 교체로
+        갱신을 확인할 수 있습니다. 폼의 SELECT_DT/T_MODE는 조회 전에 크롤러가 직접 입력한 값이므로 테이블이
+        그 날짜의 결과라는 증거는 아니며, 입력이 중간에 바뀌지 않았는지만 확인합니다.
+        갱신이 확인되지 않으면 이전 조회 결과를 새 날짜로 읽지 않도록 TimeoutException을 던집니다(재시도 대상).
+        """
+        def matches_request(state):
+            return ((expected_date is None or _digits(state['date']) == _digits(expected_date))
+                    and (expected_mode is None or state['mode'] == expected_mode))
+
+        def refreshed(driver):
+            state = self.lookup_state(table_id)
+            # 로딩 중 tbody가 비워지는 경우를 건너뛰도록 행이 채워진 상태만 인정
+            if state is None or state['rows'] == 0 or not matches_request(state):
+                return False
+            return (not state['marked'] or old_state is None
+                    or (state['rows'], state['hash']) != (old_state['rows'], old_state['hash']))
+
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(refreshed)
+            return True
+        except TimeoutException:
+            state = self.lookup_state(table_id)
+            summary = None if state is None else {key: state[key] for key in ('rows', 'marked', 'date', 'mode')}
+            raise TimeoutException(f"조회 후 테이블 갱신 확인 실패 ({timeout}초, 요청 {expected_date} T_MODE={expected_mode}): "
+                                   f"{summary}")
+
+    @metrics.timed('web.click_lookup')
+    def click_lookup(self, expected_date=None, expected_mode=None):
+        """
+        조회 버튼을 누르고 결과 테이블이 갱신될 때까지 대기합니다.
+        expected_date/expected_mode(T_MODE 값 '15'/'30')를 주면 그 날짜/모드의 결과인지도 확인합니다.
+        """
         try:
             print("[DEBUG] 조회 버튼 찾기 시작...")
             
@@ -180,9 +329,12 @@ class WebCrawler:
             if not lookup_btn:
                 raise Exception("보이는 조회 버튼을 찾을 수 없습니다")
             
+            # 조회 전 테이블에 표시를 남겨 두고, 클릭 후 실제로 갱신되었는지 확인
+            old_state = self.lookup_state(mark=True)
+
             # 스크롤하여 버튼이 화면 중앙에 오도록
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", lookup_btn)
-            time.sleep(1)
+            WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable(lookup_btn))
             
             # 클릭 시도
             try:
@@ -194,55 +346,42 @@ class WebCrawler:
                 print("[INFO] JavaScript 클릭 성공")
             
             # 테이블 로딩 대기
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.ID, "tableListChart"))
-            )
-            
-            time.sleep(2)
+            self.wait_for_table_refresh(old_state, expected_date, expected_mode)
+
             print("[INFO] 조회 완료")
             
         except Exception as e:
-            screenshot_path = f"lookup_error_{int(time.time())}.png"
-            self.driver.save_screenshot(screenshot_path)
+            screenshot_path = self.artifacts.save_screenshot(self.driver, 'lookup_error') if self.artifacts else None
             print(f"[ERROR] 조회 실패 - 스크린샷: {screenshot_path}")
             print(f"[ERROR] 오류 내용: {e}")
             raise e
 
 
 
+    @metrics.timed('web.extract_table')
     def extract_table(self, table_id='tableListChart') -> pd.DataFrame:
         try:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            table = soup.find('table', {'id': table_id})
-
-            if table is None:
-                raise ValueError(f"[ERROR] ID '{table_id}' 테이블이 페이지에 존재하지 않음")
+            df = parse_table_html(self.driver.page_source, table_id)
+            print(f"[INFO] 테이블 데이터 {len(df)}건 추출 완료")
+            return df
 
-            rows = []
-
-            for tr in table.select("tbody tr"):
-                cols = [td.get_text(strip=True).replace(',', '') for td in tr.find_all(['td', 'th'])]
-                if len(cols) == 16:
-                    left = cols[:8]
-                    right = cols[8:]
-                    rows.append(left)
-                    rows.append(right)
-                elif len(cols) == 8:
-                    rows.append(cols)
-                else:
-                    print(f"[WARN] 비정상 행 무시됨 (컬럼 수: {len(cols)})")
+        except Exception as e:
+            print(f"[ERROR] 테이블 추출 실패: {e}")
+            raise
 
-            columns = [
-                'Time', 'Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag',
-                'CO2_t', 'PowerFactor_Lead', 'PowerFactor_Lag'
-            ]
+    @metrics.timed('web.extract_table_fast')
+    def extract_table_fast(self, table_id='tableListChart') -> pd.DataFrame:
+        """
+        page_source 전체를 직렬화/파싱하지 않고, execute_script 1회로
+        테이블 행의 셀 텍스트만 배열로 받아 DataFrame을 만듭니다.
+        """
+        try:
+            raw_rows = self.driver.execute_script(EXTRACT_ROWS_SCRIPT, table_id)
 
-            # 컬럼 수 검사
-            for row in rows:
-                if len(row) != len(columns):
-                    raise ValueError(f"[ERROR] 일부 행의 컬럼 수가 예상({len(columns)})과 다릅니다: {len(row)}")
+            if raw_rows is None:
+                raise ValueError(f"[ERROR] ID '{table_id}' 테이블이 페이지에 존재하지 않음")
 
-            df = pd.DataFrame(rows, columns=columns)
+            df = rows_to_dataframe(raw_rows)
             print(f"[INFO] 테이블 데이터 {len(df)}건 추출 완료")
             return df
 
@@ -250,3 +389,119 @@ class WebCrawler:
             print(f"[ERROR] 테이블 추출 실패: {e}")
             raise
 
+
+TABLE_COLUMNS = [
+    'Time', 'Usage_kWh', 'MaxDemand_kW', 'ReactivePower_Lead', 'ReactivePower_Lag',
+    'CO2_t', 'PowerFactor_Lead', 'PowerFactor_Lag'
+]
+
+# tbody 각 행의 셀 텍스트를 2차원 배열로 반환 (쉼표 제거, 앞뒤 공백 제거)
+EXTRACT_ROWS_SCRIPT = """
+    var table = document.getElementById(arguments[0]);
+    if (!table) { return null; }
+    var rows = [];
+    var trs = table.querySelectorAll('tbody tr');
+    for (var i = 0; i < trs.length; i++) {
+        var cells = trs[i].querySelectorAll('td, th');
+        var row = [];
+        for (var j = 0; j < cells.length; j++) {
+            row.push(cells[j].textContent.trim().replace(/,/g, ''));
+        }
+        rows.push(row);
+    }
+    return rows;
+"""
+
+
+def parse_table_html(html, table_id='tableListChart') -> pd.DataFrame:
+    """
+    HTML 문자열에서 조회 결과 테이블을 찾아 DataFrame으로 변환합니다.
+    브라우저 페이지와 HTTP 응답 양쪽에서 공통으로 사용합니다.
+    """
+    # 테이블 영역만 파싱하여 페이지 전체 트리를 만들지 않음
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('table', id=table_id))
+    table = soup.find('table', {'id': table_id})
+
+    if table is None:
+        raise ValueError(f"[ERROR] ID '{table_id}' 테이블이 페이지에 존재하지 않음")
+
+    rows = [
+        [td.get_text(strip=True).replace(',', '') for td in tr.find_all(['td', 'th'])]
+        for tr in table.select("tbody tr")
+    ]
+    return rows_to_dataframe(rows)
+
+
+# 값이 아직 없는 구간(당일 진행 중 등)에 표시되는 셀. 변환 실패로 보지 않고 NaN으로 둡니다
+MISSING_CELL_VALUES = {'', '-'}
+
+CellParseError = namedtuple('CellParseError', ['row', 'time', 'column', 'value'])
+
+
+def _format_parse_errors(errors, limit=10):
+    lines = [f"[ERROR] 테이블 셀 {len(errors)}개를 변환하지 못했습니다"]
+    lines.extend(f"    행 {error.row} Time={error.time} {error.column}: {error.value!r}" for error in errors[:limit])
+    if len(errors) > limit:
+        lines.append(f"    ... 외 {len(errors) - limit}개")
+    return "\n".join(lines)
+
+
+def rows_to_dataframe(raw_rows) -> pd.DataFrame:
+    """
+    테이블 행(셀 문자열 리스트)을 8개 컬럼 DataFrame으로 변환합니다.
+    한 행에 16개 셀이 있으면 좌/우 8개씩 나누어 두 행으로 취급합니다.
+    Time은 15분 슬롯 번호(int16, utils.parse_time_slots), 측정값은 MEASURE_DTYPE(기본 float32)으로 만듭니다.
+    빈 셀과 '-'는 NaN이 되고, 그 밖에 변환할 수 없는 셀이 있으면 셀마다 행(tbody 행 번호)/Time/컬럼을 담아
+    ValueError를 발생시킵니다.
+    """
+    rows = []
+    source_rows = []
+
+    for index, cols in enumerate(raw_rows):
+        if len(cols) == 16:
+            left = cols[:8]
+            right = cols[8:]
+            rows.append(left)
+            rows.append(right)
+            source_rows.extend([index, index])
+        elif len(cols) == 8:
+            rows.append(cols)
+            source_rows.append(index)
+        else:
+            print(f"[WARN] 비정상 행 무시됨 (컬럼 수: {len(cols)})")
+
+    # 컬럼 수 검사
+    for row in rows:
+        if len(row) != len(TABLE_COLUMNS):
+            raise ValueError(f"[ERROR] 일부 행의 컬럼 수가 예상({len(TABLE_COLUMNS)})과 다릅니다: {len(row)}")
+
+    if not rows:
+        return pd.DataFrame({
+            'Time': np.array([], dtype='int16'),
+            **{name: np.array([], dtype=MEASURE_DTYPE) for name in TABLE_COLUMNS[1:]},
+        }, columns=TABLE_COLUMNS)
+
+    # 행 → 컬럼 전치 후 컬럼별로 바로 변환
+    columns = list(zip(*rows))
+    times = columns[0]
+    errors = []
+
+    slots = utils.parse_time_slots(times)
+    valid = slots >= 0
+    errors.extend(CellParseError(source_rows[index], times[index], 'Time', times[index])
+                  for index in np.flatnonzero(~valid))
+
+    data = {'Time': slots}
+    for name, values in zip(TABLE_COLUMNS[1:], columns[1:]):
+        raw = pd.Series(values, dtype='object')
+        numbers = pd.to_numeric(raw, errors='coerce')
+        failed = (numbers.isna() & ~raw.isin(MISSING_CELL_VALUES)).to_numpy()
+        errors.extend(CellParseError(source_rows[index], times[index], name, values[index])
+                      for index in np.flatnonzero(failed))
+        data[name] = numbers.to_numpy(dtype=MEASURE_DTYPE)
+
+    if errors:
+        errors.sort(key=lambda error: error.row)
+        raise ValueError(_format_parse_errors(errors))
+
+    return pd.DataFrame(data, columns=TABLE_COLUMNS)
@@ -3,11 +3,60 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 
-def initialize_chrome_driver():
+from config import CHROME_LEAN, CHROME_BLOCK_CSS
+
+# 크롤러가 사용하지 않는 리소스 (CDP Network.setBlockedURLs 패턴)
+BLOCKED_RESOURCE_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+]
+BLOCKED_STYLESHEET_PATTERNS = ['*.css']
+
+# 경량 프로필에서 끄는 백그라운드 기능
+LEAN_CHROME_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+]
+
+
+def _apply_lean_options(chrome_options):
+    chrome_options.page_load_strategy = 'eager'  # DOMContentLoaded 시점에 반환 (요소는 명시적 대기로 확인)
+    for argument in LEAN_CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.default_content_setting_values.notifications': 2,
+    })
+
+
+def _block_resources(driver, block_css):
+    """
+    CDP로 이미지/폰트(선택 시 CSS) 요청을 네트워크 단계에서 차단합니다. 실패해도 드라이버는 그대로 사용합니다.
+    """
+    patterns = BLOCKED_RESOURCE_PATTERNS + (BLOCKED_STYLESHEET_PATTERNS if block_css else [])
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as e:
+        print(f"[WARN] 리소스 차단 설정 실패 (기본 로드로 진행): {e}")
+
+
+def initialize_chrome_driver(lean=CHROME_LEAN, block_css=CHROME_BLOCK_CSS):
     """
     Cloud Run Job 환경에 최적화된 Headless Chrome WebDriver를 초기화합니다.
+    lean=True이면 이미지/폰트를 차단하고 eager 로드, 백그라운드 기능 비활성화를 적용합니다.
     """
-    print("[INFO] Chrome 드라이버 초기화 및 옵션 설정 중...")
+    print(f"[INFO] Chrome 드라이버 초기화 및 옵션 설정 중... (경량 프로필: {'사용' if lean else '사용 안 함'})")
     
     chrome_options = Options()
     
@@ -19,11 +68,17 @@ def initialize_chrome_driver():
     # 기타 권장 옵션
     chrome_options.add_argument("--disable-gpu")            # GPU 사용 비활성화
     chrome_options.add_argument("--window-size=1920,1080") 
+
+    # 2. 경량 프로필 (불필요한 리소스/백그라운드 작업 제거)
+    if lean:
+        _apply_lean_options(chrome_options)
     
     try:
         driver = webdriver.Chrome(options=chrome_options)
+        if lean:
+            _block_resources(driver, block_css)
         print("[INFO] Chrome 드라이버 성공적으로 실행됨.")
         return driver
     except Exception as e:
         print(f" Chrome 드라이버 실행 실패: {e}")
-        raise
\ No newline at end of file
+        raise